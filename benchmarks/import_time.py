@@ -0,0 +1,46 @@
+"""Measure how long `import lpm_plot` takes in a fresh interpreter.
+
+Usage:
+    python benchmarks/import_time.py [--runs N] [--max-ms MS]
+
+Exits with a non-zero status when the median import time exceeds `--max-ms`.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+
+def import_time_us(module: str = "lpm_plot") -> int:
+    "Cumulative import time of `module` in microseconds, as reported by -X importtime."
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative_us, name = (part.strip() for part in line.split("|"))
+        if name == module:
+            return int(cumulative_us)
+    raise RuntimeError(f"{module} not found in -X importtime output")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    times_ms = [import_time_us() / 1000 for _ in range(args.runs)]
+    median_ms = statistics.median(times_ms)
+    print(f"import lpm_plot: median {median_ms:.1f} ms over {args.runs} runs")
+    if median_ms > args.max_ms:
+        sys.exit(f"import time regressed: {median_ms:.1f} ms > {args.max_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
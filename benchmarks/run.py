@@ -0,0 +1,419 @@
+"""Benchmark every plotting entry point on synthetic data.
+
+Usage:
+    python benchmarks/run.py [--quick] [--filter PATTERN] [--output results.json]
+                             [--baseline baseline.json] [--tolerance 0.25]
+                             [--backend {altair,spec}]
+
+Each case runs in a fresh process so that its peak RSS is not inflated by earlier
+cases. For every case we record the wall time of the entry point call, the time to
+serialize the chart to JSON, the peak RSS and the size of the serialized spec. With
+`--baseline`, results are compared against a previous run and the script exits with
+a non-zero status when a case regressed.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import platform
+import re
+import resource
+import sys
+import time
+from importlib.metadata import PackageNotFoundError, version
+from queue import Empty
+
+import numpy as np
+import polars as pl
+
+# Wall time differences below this many seconds are treated as noise.
+MIN_TIME_DELTA_S = 0.05
+
+# --- Synthetic data generators ------------------------------------------------------
+
+
+def make_frame(
+    n_rows: int,
+    n_columns: int,
+    cardinality: int = 10,
+    numerical_fraction: float = 0.0,
+    seed: int = 0,
+) -> pl.DataFrame:
+    "A frame of categorical columns `cat_<i>` followed by numerical columns `num_<i>`."
+    rng = np.random.default_rng(seed)
+    n_numerical = round(n_columns * numerical_fraction)
+    levels = np.array([f"level_{i}" for i in range(cardinality)])
+    columns = {}
+    for i in range(n_columns - n_numerical):
+        # Skewed level frequencies, as in real categorical data.
+        weights = rng.dirichlet(np.ones(cardinality))
+        columns[f"cat_{i}"] = levels[rng.choice(cardinality, size=n_rows, p=weights)]
+    for i in range(n_numerical):
+        columns[f"num_{i}"] = rng.normal(i, 1 + i, size=n_rows)
+    return pl.DataFrame(columns)
+
+
+def make_scores(n_columns: int, seed: int = 0) -> pl.DataFrame:
+    "A symmetric `Column 1`/`Column 2`/`Score` table as consumed by plot_heatmap."
+    rng = np.random.default_rng(seed)
+    names = [f"col_{i}" for i in range(n_columns)]
+    scores = rng.uniform(0, 1, size=(n_columns, n_columns))
+    scores = (scores + scores.T) / 2
+    return pl.DataFrame(
+        {
+            "Column 1": [a for a in names for _ in names],
+            "Column 2": [b for _ in names for b in names],
+            "Score": scores.ravel(),
+        }
+    )
+
+
+def make_detail(n_columns: int, n_rows: int, seed: int = 0) -> pl.DataFrame:
+    "Detail data for plot_heatmap with a mix of comparison types, `n_rows` per pair."
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(n_columns):
+        for j in range(n_columns):
+            a, b = f"col_{i}", f"col_{j}"
+            if i == j:
+                kind, x, y = "same-same", [None], [None]
+            else:
+                kind = ["num-num", "num-cat", "cat-num", "cat-cat"][(i + j) % 4]
+                x = _detail_values(rng, kind.split("-")[0], n_rows)
+                y = _detail_values(rng, kind.split("-")[1], n_rows)
+            frames.append(
+                pl.DataFrame(
+                    {
+                        "Column 1": a,
+                        "Column 2": b,
+                        "comparison_type": kind,
+                        "x_data": x,
+                        "y_data": y,
+                    },
+                    schema={
+                        "Column 1": pl.String,
+                        "Column 2": pl.String,
+                        "comparison_type": pl.String,
+                        "x_data": pl.String,
+                        "y_data": pl.String,
+                    },
+                )
+            )
+    return pl.concat(frames)
+
+
+def _detail_values(rng, kind, n_rows):
+    if kind == "num":
+        return [f"{v:.3f}" for v in rng.normal(size=n_rows)]
+    return [f"level_{v}" for v in rng.integers(0, 5, size=n_rows)]
+
+
+def make_fidelity(n_pairs: int, n_models: int, seed: int = 0) -> pl.DataFrame:
+    "A fidelity table with `n_pairs` column pairs per model, as consumed by plot_fidelity."
+    rng = np.random.default_rng(seed)
+    frames = []
+    for m in range(n_models):
+        tvd = np.sort(rng.exponential(0.02, size=n_pairs))
+        frames.append(
+            pl.DataFrame(
+                {
+                    "column-1": [f"col_{i % 97}" for i in range(n_pairs)],
+                    "column-2": [f"col_{i % 89}" for i in range(n_pairs)],
+                    "tvd": tvd,
+                    "model": f"model_{m}",
+                    "index": np.arange(n_pairs),
+                }
+            )
+        )
+    return pl.concat(frames)
+
+
+def make_lines(n_series: int, n_steps: int, seed: int = 0) -> dict[str, list[float]]:
+    rng = np.random.default_rng(seed)
+    return {
+        f"series_{i}": np.cumsum(rng.normal(size=n_steps)).tolist()
+        for i in range(n_series)
+    }
+
+
+# --- Cases --------------------------------------------------------------------------
+
+
+def bench_plot_heatmap(n_columns):
+    from lpm_plot import plot_heatmap
+
+    df = make_scores(n_columns)
+    return lambda: plot_heatmap(df)
+
+
+def bench_plot_heatmap_detail(n_columns, n_rows):
+    from lpm_plot import plot_heatmap
+
+    df, detail = make_scores(n_columns), make_detail(n_columns, n_rows)
+    return lambda: plot_heatmap(df, detail)
+
+
+def bench_reformat_data(n_columns, n_rows):
+    from lpm_plot import reformat_data
+
+    heatmap_df = make_scores(n_columns).with_columns(
+        pl.col("Column 1").str.replace("col", "cat"),
+        pl.col("Column 2").str.replace("col", "cat"),
+    )
+    all_data = make_frame(n_rows, n_columns)
+    return lambda: reformat_data(heatmap_df, all_data)
+
+
+def bench_plot_marginal_1d(n_rows, n_columns, cardinality):
+    from lpm_plot import plot_marginal_1d
+
+    observed = make_frame(n_rows, n_columns, cardinality, seed=0)
+    synthetic = make_frame(n_rows, n_columns, cardinality, seed=1)
+    return lambda: plot_marginal_1d(observed, synthetic, observed.columns)
+
+
+def bench_prepare_2d_marginal_data(n_rows, cardinality):
+    from lpm_plot.plot_marginal import prepare_2d_marginal_data
+
+    observed = make_frame(n_rows, 2, cardinality, seed=0)
+    synthetic = make_frame(n_rows, 2, cardinality, seed=1)
+    return lambda: prepare_2d_marginal_data(observed, synthetic, "cat_0", "cat_1")
+
+
+def bench_plot_marginal_2d(n_rows, cardinality):
+    from lpm_plot import plot_marginal_2d
+    from lpm_plot.plot_marginal import prepare_2d_marginal_data
+
+    observed = make_frame(n_rows, 2, cardinality, seed=0)
+    synthetic = make_frame(n_rows, 2, cardinality, seed=1)
+    return lambda: plot_marginal_2d(
+        prepare_2d_marginal_data(observed, synthetic, "cat_0", "cat_1"),
+        "cat_0",
+        "cat_1",
+    )
+
+
+def bench_plot_marginal_numerical_numerical(n_rows):
+    from lpm_plot import plot_marginal_numerical_numerical
+
+    observed = make_frame(n_rows, 2, numerical_fraction=1.0, seed=0)
+    synthetic = make_frame(n_rows, 2, numerical_fraction=1.0, seed=1)
+    return lambda: plot_marginal_numerical_numerical(
+        observed, synthetic, "num_0", "num_1"
+    )
+
+
+def bench_plot_marginal_numerical_categorical(n_rows, cardinality):
+    from lpm_plot import plot_marginal_numerical_categorical
+
+    observed = make_frame(n_rows, 2, cardinality, numerical_fraction=0.5, seed=0)
+    synthetic = make_frame(n_rows, 2, cardinality, numerical_fraction=0.5, seed=1)
+    return lambda: plot_marginal_numerical_categorical(
+        observed, synthetic, "cat_0", "num_0"
+    )
+
+
+def bench_plot_fidelity(n_pairs, n_models):
+    from lpm_plot import plot_fidelity
+
+    df = make_fidelity(n_pairs, n_models)
+    return lambda: plot_fidelity(df)
+
+
+def bench_compute_fidelity(n_rows, n_columns):
+    from lpm_plot import compute_fidelity
+
+    observed = make_frame(n_rows, n_columns, numerical_fraction=0.5, seed=0)
+    synthetic = make_frame(n_rows, n_columns, numerical_fraction=0.5, seed=1)
+    return lambda: compute_fidelity(observed, synthetic)
+
+
+def bench_compute_mutual_information(n_rows, n_columns):
+    from lpm_plot import compute_mutual_information
+
+    df = make_frame(n_rows, n_columns, numerical_fraction=0.5)
+    return lambda: compute_mutual_information(df)
+
+
+def bench_plot_lines(n_series, n_steps):
+    from lpm_plot import plot_lines
+
+    data = make_lines(n_series, n_steps)
+    return lambda: plot_lines(data)
+
+
+# Parameter grids per benchmark. The first value of every parameter makes up the
+# --quick grid.
+GRIDS = {
+    bench_plot_heatmap: {"n_columns": [10, 50, 150]},
+    bench_plot_heatmap_detail: {"n_columns": [4, 10], "n_rows": [100, 2_000]},
+    bench_reformat_data: {"n_columns": [3, 6], "n_rows": [50, 200]},
+    bench_plot_marginal_1d: {
+        "n_rows": [10_000, 1_000_000],
+        "n_columns": [10, 100],
+        "cardinality": [5, 1_000],
+    },
+    bench_prepare_2d_marginal_data: {
+        "n_rows": [10_000, 1_000_000],
+        "cardinality": [5, 1_000],
+    },
+    bench_plot_marginal_2d: {"n_rows": [10_000, 1_000_000], "cardinality": [5, 100]},
+    bench_plot_marginal_numerical_numerical: {"n_rows": [1_000, 100_000]},
+    bench_plot_marginal_numerical_categorical: {
+        "n_rows": [1_000, 100_000],
+        "cardinality": [5, 50],
+    },
+    bench_plot_fidelity: {"n_pairs": [100, 10_000], "n_models": [1, 5]},
+    bench_compute_fidelity: {"n_rows": [10_000, 1_000_000], "n_columns": [10, 40]},
+    bench_compute_mutual_information: {
+        "n_rows": [10_000, 1_000_000],
+        "n_columns": [10, 40],
+    },
+    bench_plot_lines: {"n_series": [3, 20], "n_steps": [100, 10_000]},
+}
+
+
+def cases(quick: bool = False):
+    "Yield (name, benchmark, params) for every case in the grids."
+    for bench, grid in GRIDS.items():
+        names = list(grid)
+        values = [grid[n][:1] if quick else grid[n] for n in names]
+        for combination in itertools.product(*values):
+            params = dict(zip(names, combination))
+            label = ",".join(f"{k}={v}" for k, v in params.items())
+            yield f"{bench.__name__.removeprefix('bench_')}[{label}]", bench, params
+
+
+# --- Measurement --------------------------------------------------------------------
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _output_bytes(result) -> int:
+    "Size of the serialized chart, or of the data frames for data preparation steps."
+    if isinstance(result, pl.DataFrame):
+        return result.estimated_size()
+    if isinstance(result, tuple):
+        return sum(df.estimated_size() for df in result)
+    return len(result.to_json(indent=None).encode("utf-8"))
+
+
+def _measure(bench, params, repeat, backend, queue):
+    from lpm_plot import set_config
+
+    set_config(backend=backend)
+    call = bench(**params)
+    rss_before_mb = _peak_rss_mb()
+    wall_s, serialize_s = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = call()
+        wall_s.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        spec_bytes = _output_bytes(result)
+        serialize_s.append(time.perf_counter() - start)
+    queue.put(
+        {
+            "wall_s": min(wall_s),
+            "serialize_s": min(serialize_s),
+            "peak_rss_mb": _peak_rss_mb(),
+            "peak_rss_delta_mb": _peak_rss_mb() - rss_before_mb,
+            "spec_bytes": spec_bytes,
+        }
+    )
+
+
+def measure(bench, params, repeat: int = 3, backend: str = "altair") -> dict:
+    "Run one case in a fresh process and return its measurements."
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(
+        target=_measure, args=(bench, params, repeat, backend, queue)
+    )
+    process.start()
+    while True:
+        try:
+            result = queue.get(timeout=1)
+            break
+        except Empty:
+            if not process.is_alive():
+                raise RuntimeError(f"benchmark process exited with {process.exitcode}")
+    process.join()
+    return result
+
+
+def _version(package: str) -> str | None:
+    try:
+        return version(package)
+    except PackageNotFoundError:
+        return None
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    "Describe every case that regressed by more than `tolerance` against `baseline`."
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in ("wall_s", "peak_rss_mb", "spec_bytes"):
+            before, after = previous[metric], current[metric]
+            if metric == "wall_s" and after - before < MIN_TIME_DELTA_S:
+                continue
+            if after > before * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {before:.4g} -> {after:.4g}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="smallest cases only")
+    parser.add_argument("--filter", help="regular expression selecting case names")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this results JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument(
+        "--backend", choices=["altair", "spec"], default="altair", help="chart backend"
+    )
+    args = parser.parse_args()
+
+    results = {}
+    for name, bench, params in cases(quick=args.quick):
+        if args.filter and not re.search(args.filter, name):
+            continue
+        result = measure(bench, params, repeat=args.repeat, backend=args.backend)
+        results[name] = {"params": params, **result}
+        print(
+            f"{name:<80} {result['wall_s']:>9.3f} s {result['serialize_s']:>9.3f} s "
+            f"{result['peak_rss_mb']:>9.1f} MB {result['spec_bytes']:>12,d} B",
+            flush=True,
+        )
+
+    if args.output:
+        meta = {
+            "python": platform.python_version(),
+            "backend": args.backend,
+            "machine": platform.machine(),
+            **{p: _version(p) for p in ("lpm_plot", "polars", "altair")},
+        }
+        with open(args.output, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
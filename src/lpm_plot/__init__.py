@@ -1,15 +1,80 @@
 # src/lpm_plot/__init__.py
 
-from .plot_fidelity import plot_fidelity
-from .plot_heatmap import plot_heatmap, reformat_data
-from .plot_lines import plot_lines
-from .plot_marginal import (
-    plot_marginal_1d,
-    plot_marginal_2d,
-    plot_marginal_numerical_categorical,
-    plot_marginal_numerical_numerical,
-)
-
-import altair as alt
-
-alt.data_transformers.enable("default", max_rows=None)
+import importlib
+import sys
+import types
+
+# Public names and the submodules defining them. Submodules, and the heavy libraries
+# they import (altair, polars, numpy, scipy), are only loaded on first access.
+_EXPORTS = {
+    "AggregationCache": "aggregation_cache",
+    "disable_aggregation_cache": "aggregation_cache",
+    "enable_aggregation_cache": "aggregation_cache",
+    "get_aggregation_cache": "aggregation_cache",
+    "AsyncPlotter": "aio",
+    "Config": "config",
+    "config_context": "config",
+    "get_config": "config",
+    "set_config": "config",
+    "DetailCache": "detail_cache",
+    "compute_fidelity": "fidelity",
+    "HeavyHitters": "heavy_hitters",
+    "count_heavy_hitters": "heavy_hitters",
+    "Trace": "instrument",
+    "add_span_callback": "instrument",
+    "remove_span_callback": "instrument",
+    "trace": "instrument",
+    "MarginalAccumulator": "marginal_accumulator",
+    "compute_mutual_information": "mutual_information",
+    "plot_fidelity": "plot_fidelity",
+    "plot_heatmap": "plot_heatmap",
+    "reformat_data": "plot_heatmap",
+    "plot_lines": "plot_lines",
+    "plot_marginal_1d": "plot_marginal",
+    "plot_marginal_2d": "plot_marginal",
+    "plot_marginal_numerical_categorical": "plot_marginal",
+    "plot_marginal_numerical_numerical": "plot_marginal",
+    "plot_qq": "plot_qq",
+    "PreTransformedChart": "pre_transform",
+    "pre_transform_chart": "pre_transform",
+    "Refinement": "progressive",
+    "progressive": "progressive",
+    "QuantileSketch": "quantile_sketch",
+    "sketch_columns": "quantile_sketch",
+    "RenderCache": "render_cache",
+    "render_chart": "render_cache",
+    "Page": "report",
+    "marginal_report": "report",
+    "to_json": "serialize",
+    "write_json": "serialize",
+    "DetailServer": "server",
+    "serve": "server",
+    "Spec": "spec",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f".{_EXPORTS[name]}", __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+class _Package(types.ModuleType):
+    def __setattr__(self, name, value):
+        # Importing a submodule binds it on the package, which would shadow the
+        # functions named after their submodule (plot_heatmap, plot_lines, ...).
+        if name in _EXPORTS and isinstance(value, types.ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
@@ -0,0 +1,59 @@
+import argparse
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m lpm_plot")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser(
+        "serve",
+        help="serve a mutual information heatmap with on-demand detail views",
+    )
+    serve.add_argument("data", help="path or glob of Parquet or Arrow IPC files")
+    serve.add_argument(
+        "--scores",
+        help="Parquet or Arrow IPC file of heatmap scores (default: mutual information)",
+    )
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument("--sample-rows", type=int, default=1000)
+    serve.add_argument("--cache-size", type=int, default=128)
+
+    report = commands.add_parser(
+        "report", help="write the 1D marginals of every column as pages of charts"
+    )
+    report.add_argument("observed", help="path or glob of Parquet or Arrow IPC files")
+    report.add_argument("synthetic", help="path or glob of Parquet or Arrow IPC files")
+    report.add_argument("directory", help="directory the pages are written to")
+    report.add_argument("--columns", nargs="+", help="columns to plot (default: all)")
+    report.add_argument("--page-size", type=int, default=20)
+    report.add_argument("--format", default="json", help="json, png, svg or html")
+
+    args = parser.parse_args(argv)
+    if args.command == "report":
+        from .report import marginal_report
+
+        for page in marginal_report(
+            args.observed,
+            args.synthetic,
+            columns=args.columns,
+            page_size=args.page_size,
+            directory=args.directory,
+            format=args.format,
+        ):
+            print(f"Wrote {page.path}", flush=True)
+    elif args.command == "serve":
+        from .server import serve
+
+        serve(
+            args.data,
+            scores=args.scores,
+            host=args.host,
+            port=args.port,
+            sample_rows=args.sample_rows,
+            cache_size=args.cache_size,
+        )
+
+
+if __name__ == "__main__":
+    main()
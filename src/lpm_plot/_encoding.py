@@ -0,0 +1,81 @@
+"Integer encoding of columns shared across frames, for the pairwise metric engines."
+
+import numpy as np
+import polars as pl
+
+# Numerical columns with more distinct values than this are discretized into this many
+# quantile bins by default.
+DEFAULT_BINS = 10
+
+PREFIX_ROWS = 10_000
+
+
+def encode_column(
+    series: list[pl.Series], bins: int = DEFAULT_BINS
+) -> tuple[list[np.ndarray], int]:
+    """Encode one column of several frames with a shared dictionary.
+
+    Numerical columns with more than `bins` distinct values are discretized into
+    quantile bins computed over all frames, so that the same bin means the same range
+    everywhere. Other columns are encoded by their sorted distinct values.
+
+    Args:
+        series: The column of each frame.
+        bins: Number of quantile bins for numerical columns.
+
+    Returns:
+        The int32 codes of each frame, -1 for null (and NaN) values, and the number of
+        distinct codes, at least 1.
+    """
+    if len({s.dtype for s in series}) > 1:
+        numeric = all(s.dtype.is_numeric() for s in series)
+        series = [s.cast(pl.Float64 if numeric else pl.String) for s in series]
+    combined = pl.concat(series)
+    # Most continuous columns have more than `bins` distinct values in their first rows
+    # already, which spares counting the distinct values of the whole column.
+    if combined.dtype.is_numeric() and (
+        combined.head(PREFIX_ROWS).n_unique() > bins or combined.n_unique() > bins
+    ):
+        values = combined.drop_nulls().cast(pl.Float64).drop_nans().to_numpy()
+        quantiles = np.linspace(0, 1, bins + 1)[1:-1]
+        edges = np.unique(np.quantile(values, quantiles)) if values.size else []
+        codes = []
+        for s in series:
+            data = s.cast(pl.Float64).to_numpy()
+            code = np.searchsorted(edges, data, side="right").astype(np.int32)
+            code[np.isnan(data)] = -1
+            codes.append(code)
+        return codes, len(edges) + 1
+
+    categories = combined.drop_nulls().unique().sort()
+    if categories.is_empty():
+        # A column without any value still gets one (empty) code, so its pairs have a table.
+        return [np.full(len(s), -1, dtype=np.int32) for s in series], 1
+    if combined.dtype == pl.String:
+        # The physical codes of an Enum are the positions of its categories.
+        enum = pl.Enum(categories)
+        codes = [s.cast(enum).to_physical() for s in series]
+    else:
+        positions = np.arange(len(categories))
+        codes = [s.replace_strict(categories, positions) for s in series]
+    return [c.cast(pl.Int32).fill_null(-1).to_numpy() for c in codes], len(categories)
+
+
+def encode(
+    frames: list[pl.DataFrame], columns: list[str], bins: int = DEFAULT_BINS
+) -> tuple[list[pl.DataFrame], dict[str, int]]:
+    """Encode `columns` of every frame with dictionaries shared across the frames.
+
+    Returns:
+        One frame of int32 codes per input frame (see `encode_column`), and the number of
+        distinct codes per column.
+    """
+    encoded = [{} for _ in frames]
+    cardinalities = {}
+    for column in columns:
+        codes, cardinalities[column] = encode_column(
+            [df.get_column(column) for df in frames], bins
+        )
+        for frame_codes, code in zip(encoded, codes):
+            frame_codes[column] = code
+    return [pl.DataFrame(frame_codes) for frame_codes in encoded], cardinalities
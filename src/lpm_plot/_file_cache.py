@@ -0,0 +1,98 @@
+"A directory of cached files shared between processes."
+
+import os
+import re
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+# Temporary files left behind by a crashed writer are removed after this long.
+STALE_TMP_SECONDS = 3600
+
+
+class _FileCache:
+    """A directory of cached files, evicted least recently used first.
+
+    Every hit refreshes the file's modification time, and once the cache grows beyond
+    `max_bytes` the least recently used files are removed. Files are written to a
+    temporary name and then atomically renamed into place, so several processes can
+    share one directory.
+
+    Only files named after a key, with one of the `EXTENSIONS` of the cache, are
+    managed: other files in the directory, including those of another kind of cache,
+    are never evicted or cleared.
+    """
+
+    EXTENSIONS: tuple[str, ...] = ()
+
+    def __init__(self, directory: str | os.PathLike, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        extensions = "|".join(map(re.escape, self.EXTENSIONS))
+        self._name = re.compile(rf"[0-9a-f]{{64}}\.(?:{extensions})")
+        self._tmp_name = re.compile(rf"{self._name.pattern}\..+\.tmp")
+
+    def path(self, key: str, format: str) -> Path:
+        return self.directory / f"{key}.{format}"
+
+    def _touch(self, path: Path) -> bool:
+        "Mark `path` as recently used; False if it is missing."
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _write(self, path: Path, write: Callable[[str], None]) -> None:
+        "Atomically create `path` with `write(tmp_path)`, then evict if over budget."
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.directory, prefix=f"{path.name}.", suffix=".tmp"
+        )
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        self.evict()
+
+    def size(self) -> int:
+        "Total size in bytes of the cached files."
+        return sum(size for _, _, size in self._entries())
+
+    def evict(self) -> None:
+        "Remove least recently used files until the cache fits in `max_bytes`."
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> None:
+        "Remove every cached file."
+        for path, _, _ in self._entries():
+            path.unlink(missing_ok=True)
+
+    def _entries(self) -> list[tuple[Path, float, int]]:
+        entries = []
+        now = time.time()
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                cached = self._name.fullmatch(entry.name)
+                if not cached and not self._tmp_name.fullmatch(entry.name):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if not cached:
+                    if now - stat.st_mtime > STALE_TMP_SECONDS:
+                        Path(entry.path).unlink(missing_ok=True)
+                    continue
+                entries.append((Path(entry.path), stat.st_mtime, stat.st_size))
+        return entries
@@ -0,0 +1,115 @@
+"Helpers for entry points that accept both eager and lazy Polars frames."
+
+import inspect
+import os
+from pathlib import Path
+
+import polars as pl
+
+from .config import get_config
+
+Frame = pl.DataFrame | pl.LazyFrame
+Source = pl.DataFrame | pl.LazyFrame | str | os.PathLike
+
+PARQUET_SUFFIXES = (".parquet", ".pq")
+IPC_SUFFIXES = (".arrow", ".ipc", ".feather")
+
+# Lazy queries run on the streaming engine where Polars ships it (engine="streaming",
+# Polars >= 1.25); older versions warn that their streaming engine is deprecated, so
+# queries run on the default in-memory engine there.
+_COLLECT_OPTIONS = (
+    {"engine": "streaming"}
+    if "engine" in inspect.signature(pl.collect_all).parameters
+    else {}
+)
+
+
+def scan(source: Source) -> Frame:
+    """Scan paths lazily; return frames and other sources, such as accumulators, as-is.
+
+    Paths and globs ending in a Parquet suffix (.parquet, .pq) are scanned with
+    `pl.scan_parquet` and those ending in an Arrow IPC suffix (.arrow, .ipc, .feather)
+    with `pl.scan_ipc`. Directories are scanned as (hive-partitioned) Parquet datasets.
+    Only the columns, and for Parquet the row groups, a query needs are read.
+    """
+    if not isinstance(source, (str, os.PathLike)):
+        return source
+    path = Path(source)
+    suffix = path.suffix.lower()
+    if suffix in PARQUET_SUFFIXES or (not suffix and path.is_dir()):
+        return pl.scan_parquet(source)
+    if suffix in IPC_SUFFIXES:
+        return pl.scan_ipc(source)
+    raise ValueError(
+        f"cannot scan {str(source)!r}: expected a Parquet ({', '.join(PARQUET_SUFFIXES)}) "
+        f"or Arrow IPC ({', '.join(IPC_SUFFIXES)}) path, glob or directory"
+    )
+
+
+def column_names(df: Frame) -> list[str]:
+    "Column names of `df`, resolved from the query plan for LazyFrames."
+    if isinstance(df, pl.LazyFrame):
+        return df.collect_schema().names()
+    return df.columns
+
+
+def is_lazy(*frames: Frame) -> bool:
+    "Whether any of `frames` is a LazyFrame."
+    return any(isinstance(df, pl.LazyFrame) for df in frames)
+
+
+def n_rows(*frames: Frame) -> int | None:
+    "Total number of rows of `frames`, or None if any of them is lazy."
+    if is_lazy(*frames):
+        return None
+    return sum(df.height for df in frames)
+
+
+def collect(df: Frame) -> pl.DataFrame:
+    "Materialize `df`; DataFrames are returned as they are."
+    if isinstance(df, pl.LazyFrame):
+        return df.collect(**_COLLECT_OPTIONS)
+    return df
+
+
+def collect_all(queries: list[pl.LazyFrame]) -> list[pl.DataFrame]:
+    "Run `queries` in parallel."
+    return pl.collect_all(queries, **_COLLECT_OPTIONS)
+
+
+def round_significant(expr: pl.Expr, digits: int) -> pl.Expr:
+    "Round the finite values of a float expression to `digits` significant digits."
+    return pl.when(expr.is_finite()).then(expr.round_sig_figs(digits)).otherwise(expr)
+
+
+def compact(df: pl.DataFrame) -> pl.DataFrame:
+    """Store `df` in the narrowest dtypes that keep every value, before it is charted.
+
+    Strings repeated across rows, such as source, model and column labels, become
+    lexically ordered Categoricals, which Altair still infers as nominal. Integers are
+    downcast to the narrowest integer type holding them, and floats to Float32 when
+    that is exact, so the inlined values are unchanged. Floats are first rounded to
+    the package-wide `precision`, if set.
+    """
+    precision = get_config().precision
+    if precision is not None:
+        floats = [name for name, dtype in df.schema.items() if dtype.is_float()]
+        df = df.with_columns(
+            round_significant(pl.col(name), precision) for name in floats
+        )
+    casts = {}
+    for name, dtype in df.schema.items():
+        series = df.get_column(name)
+        if dtype == pl.String:
+            if series.n_unique() <= df.height // 2:
+                casts[name] = pl.Categorical("lexical")
+        elif dtype.is_integer():
+            narrow = series.shrink_dtype().dtype
+            if narrow != dtype:
+                casts[name] = narrow
+        elif (
+            dtype == pl.Float64
+            and (series.cast(pl.Float32).cast(pl.Float64) == series).all()
+        ):
+            casts[name] = pl.Float32
+    return df.cast(casts) if casts else df
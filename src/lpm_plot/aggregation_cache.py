@@ -0,0 +1,194 @@
+import hashlib
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import polars as pl
+
+from ._frames import Frame, collect, collect_all
+
+# Number of evenly spaced rows hashed into a frame fingerprint.
+FINGERPRINT_SAMPLE_ROWS = 1024
+
+
+def frame_fingerprint(df: pl.DataFrame) -> str:
+    """Compute a cheap fingerprint of a DataFrame.
+
+    The fingerprint covers the schema, the row count and a hash of a fixed sample of
+    evenly spaced rows. It is not a full content hash: two frames that only differ in
+    rows outside the sample share a fingerprint.
+
+    Args:
+        df: The DataFrame to fingerprint.
+
+    Returns:
+        A hex-encoded SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    digest.update(repr(list(df.schema.items())).encode("utf-8"))
+    digest.update(str(df.height).encode("utf-8"))
+    if df.height > 0 and df.width > 0:
+        n = min(df.height, FINGERPRINT_SAMPLE_ROWS)
+        rows = np.linspace(0, df.height - 1, n).astype(np.int64)
+        digest.update(df[rows].hash_rows(seed=0).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _count_query(df: Frame, columns: list[str]) -> pl.LazyFrame:
+    return df.lazy().group_by(columns).agg(pl.len().alias("count"))
+
+
+def _compute_counts(df: Frame, groupings: list[list[str]]) -> list[pl.DataFrame]:
+    return collect_all([_count_query(df, columns) for columns in groupings])
+
+
+def _compute_stats(df: Frame, column: str) -> dict:
+    return collect(
+        df.lazy().select(
+            pl.col(column).min().alias("min"),
+            pl.col(column).max().alias("max"),
+            pl.col(column).n_unique().alias("n_unique"),
+            pl.col(column).count().alias("count"),
+        )
+    ).row(0, named=True)
+
+
+class AggregationCache:
+    """A memory-bounded cache of group counts and summary statistics.
+
+    Results are keyed by the fingerprint of the source frame (see `frame_fingerprint`)
+    and the grouping columns, so that plotting functions called on the same
+    observed/synthetic pair share their aggregations. Once the cached results exceed
+    `max_bytes`, the least recently used ones are dropped.
+
+    Args:
+        max_bytes: Memory budget for the cached results.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2**20):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._results: OrderedDict[tuple, tuple[object, int]] = OrderedDict()
+        self._fingerprints: dict[int, tuple[weakref.ref, str]] = {}
+
+    def fingerprint(self, df: pl.DataFrame) -> str:
+        "Fingerprint `df`, memoized for as long as the frame is alive."
+        entry = self._fingerprints.get(id(df))
+        if entry is not None and entry[0]() is df:
+            return entry[1]
+        fingerprint = frame_fingerprint(df)
+        key = id(df)
+        ref = weakref.ref(df, lambda _: self._fingerprints.pop(key, None))
+        self._fingerprints[key] = (ref, fingerprint)
+        return fingerprint
+
+    def counts(self, df: pl.DataFrame, columns: list[str]) -> pl.DataFrame:
+        """Count the rows of `df` per combination of values in `columns`.
+
+        Returns:
+            pl.DataFrame: The grouping columns and a UInt32 "count" column. Null values
+            are kept as their own group.
+        """
+        return self.counts_many(df, [columns])[0]
+
+    def counts_many(
+        self, df: pl.DataFrame, groupings: list[list[str]]
+    ) -> list[pl.DataFrame]:
+        "Like `counts`, for several groupings at once. Missing results are computed in parallel."
+        fingerprint = self.fingerprint(df)
+        keys = [("counts", fingerprint, tuple(columns)) for columns in groupings]
+        results = {key: self._lookup(key) for key in keys if key in self._results}
+        self.hits += len(results)
+        missing = {
+            key: columns for key, columns in zip(keys, groupings) if key not in results
+        }
+        if missing:
+            self.misses += len(missing)
+            computed = _compute_counts(df, list(missing.values()))
+            for key, result in zip(missing, computed):
+                results[key] = result
+                self._store(key, result, result.estimated_size())
+        return [results[key] for key in keys]
+
+    def stats(self, df: pl.DataFrame, column: str) -> dict:
+        "Summary statistics of `column`: min, max, number of unique values and non-null count."
+        key = ("stats", self.fingerprint(df), column)
+        if key in self._results:
+            self.hits += 1
+            return self._lookup(key)
+        self.misses += 1
+        result = _compute_stats(df, column)
+        self._store(key, result, 256)
+        return result
+
+    def clear(self) -> None:
+        self._results.clear()
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def _lookup(self, key):
+        self._results.move_to_end(key)
+        return self._results[key][0]
+
+    def _store(self, key, result, nbytes: int) -> None:
+        if nbytes > self.max_bytes or key in self._results:
+            return
+        self._results[key] = (result, nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes:
+            _, (_, evicted) = self._results.popitem(last=False)
+            self.nbytes -= evicted
+
+
+_session_cache: AggregationCache | None = None
+
+
+def enable_aggregation_cache(max_bytes: int = 256 * 2**20) -> AggregationCache:
+    """Enable a session-level aggregation cache shared by the marginal plotting functions.
+
+    Args:
+        max_bytes: Memory budget for the cached results.
+
+    Returns:
+        The new session cache.
+    """
+    global _session_cache
+    _session_cache = AggregationCache(max_bytes=max_bytes)
+    return _session_cache
+
+
+def disable_aggregation_cache() -> None:
+    "Disable the session-level aggregation cache and release its results."
+    global _session_cache
+    _session_cache = None
+
+
+def get_aggregation_cache() -> AggregationCache | None:
+    "Return the session-level aggregation cache, or None if it is disabled."
+    return _session_cache
+
+
+def group_counts(df: Frame, groupings: list[list[str]]) -> list[pl.DataFrame]:
+    """Row counts of `df` per grouping, served from the session cache when it is enabled.
+
+    LazyFrames cannot be fingerprinted without running their query, so their counts
+    are always computed, as one lazy query per grouping collected together on the
+    streaming engine, which shares the scan of the projected grouping columns. Other
+    sources of counts, such as a `MarginalAccumulator`, serve their own.
+    """
+    if not isinstance(df, (pl.DataFrame, pl.LazyFrame)):
+        return df.counts_many(groupings)
+    if _session_cache is not None and isinstance(df, pl.DataFrame):
+        return _session_cache.counts_many(df, groupings)
+    return _compute_counts(df, groupings)
+
+
+def column_stats(df: Frame, column: str) -> dict:
+    "Summary statistics of `column`, served from the session cache when it is enabled."
+    if _session_cache is not None and isinstance(df, pl.DataFrame):
+        return _session_cache.stats(df, column)
+    return _compute_stats(df, column)
@@ -0,0 +1,136 @@
+import asyncio
+import importlib
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+
+from .config import Config, config_context, get_config
+
+
+def _call(config: Config, func, args, kwargs):
+    "Run `func` in a worker with the options of the caller."
+    with config_context(config):
+        return func(*args, **kwargs)
+
+
+def _release(loop: asyncio.AbstractEventLoop, semaphore: asyncio.Semaphore, _future):
+    "Release `semaphore` on its event loop, from the thread that completed `_future`."
+    if not loop.is_closed():
+        loop.call_soon_threadsafe(semaphore.release)
+
+
+def _offloaded(name: str, heavy: bool = False):
+    "An `AsyncPlotter` method running the entry point `name` in its executor."
+
+    async def method(self, *args, timeout: float | None = None, **kwargs):
+        func = getattr(importlib.import_module(__package__), name)
+        return await self.run(func, *args, timeout=timeout, heavy=heavy, **kwargs)
+
+    method.__name__ = method.__qualname__ = name
+    method.__doc__ = f"Run `{name}` in the executor and return its result."
+    return method
+
+
+class AsyncPlotter:
+    """Run the entry points of the package without blocking the event loop.
+
+    Every method is a coroutine counterpart of the entry point of the same name, taking
+    the same arguments plus a `timeout` in seconds. Calls run in `executor` with the
+    options in effect where they are awaited (see `config_context`). Clustering,
+    detail data preparation, metrics, pre-transforms and renders are heavy: at most
+    `max_heavy` of them run at once, the others waiting for a slot.
+
+    Cancelling a call, or reaching its timeout, raises in the awaiting task right away.
+    A call that has not started in the executor yet is dropped, but one already
+    running in a thread runs to completion and its result is discarded.
+
+    Args:
+        executor: Executor running the calls. Defaults to a `ThreadPoolExecutor` with
+            `max_workers` threads, which suits Polars, NumPy, SciPy and vl-convert as
+            they release the GIL for most of their work. A `ProcessPoolExecutor` also
+            works, for picklable arguments and results.
+        max_workers: Number of threads of the default executor.
+        max_heavy: Maximum number of heavy calls running at once.
+        timeout: Default timeout of every call in seconds. If None, calls never time
+            out.
+    """
+
+    def __init__(
+        self,
+        executor: Executor | None = None,
+        max_workers: int | None = None,
+        max_heavy: int = 2,
+        timeout: float | None = None,
+    ):
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers, thread_name_prefix="lpm_plot"
+        )
+        self.heavy = asyncio.Semaphore(max_heavy)
+        self.timeout = timeout
+
+    async def run(
+        self,
+        func,
+        /,
+        *args,
+        timeout: float | None = None,
+        heavy: bool = False,
+        **kwargs,
+    ):
+        """Run `func(*args, **kwargs)` in the executor and return its result.
+
+        Args:
+            func: The function to run.
+            timeout: Timeout in seconds, including the wait for a heavy slot. Defaults
+                to the timeout of the plotter.
+            heavy: Whether the call counts towards `max_heavy`.
+
+        Raises:
+            TimeoutError: If the call did not complete within `timeout`.
+        """
+        loop = asyncio.get_running_loop()
+        call = partial(_call, get_config(), func, args, kwargs)
+        async with asyncio.timeout(self.timeout if timeout is None else timeout):
+            if not heavy:
+                return await loop.run_in_executor(self.executor, call)
+            await self.heavy.acquire()
+            try:
+                future = self.executor.submit(call)
+            except BaseException:
+                self.heavy.release()
+                raise
+            # The slot is held until the call finishes in the executor, rather than
+            # until the awaiting task times out or is cancelled, as a running call
+            # carries on in its thread.
+            future.add_done_callback(partial(_release, loop, self.heavy))
+            return await asyncio.wrap_future(future)
+
+    def close(self) -> None:
+        "Shut down the default executor, without waiting for running calls."
+        if self._owns_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    compute_fidelity = _offloaded("compute_fidelity", heavy=True)
+    compute_mutual_information = _offloaded("compute_mutual_information", heavy=True)
+    count_heavy_hitters = _offloaded("count_heavy_hitters", heavy=True)
+    plot_fidelity = _offloaded("plot_fidelity")
+    plot_heatmap = _offloaded("plot_heatmap", heavy=True)
+    reformat_data = _offloaded("reformat_data", heavy=True)
+    plot_lines = _offloaded("plot_lines")
+    plot_marginal_1d = _offloaded("plot_marginal_1d")
+    plot_marginal_2d = _offloaded("plot_marginal_2d")
+    plot_marginal_numerical_categorical = _offloaded(
+        "plot_marginal_numerical_categorical"
+    )
+    plot_marginal_numerical_numerical = _offloaded("plot_marginal_numerical_numerical")
+    plot_qq = _offloaded("plot_qq", heavy=True)
+    sketch_columns = _offloaded("sketch_columns", heavy=True)
+    pre_transform_chart = _offloaded("pre_transform_chart", heavy=True)
+    render_chart = _offloaded("render_chart", heavy=True)
+    to_json = _offloaded("to_json")
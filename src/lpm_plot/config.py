@@ -0,0 +1,103 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+
+BACKENDS = ("altair", "spec")
+DATA_TRANSFORMERS = ("default", "json", "csv")
+
+
+@dataclass(frozen=True)
+class Config:
+    """Options consulted by every plotting entry point.
+
+    Attributes:
+        pre_transform: Whether to evaluate the data transforms of generated charts with
+            VegaFusion, so that only their results are inlined. Entry points then
+            return a `PreTransformedChart` instead of an Altair chart.
+        dictionary_encode: Whether `to_json` stores the repeated strings of inlined
+            data as dictionary indices.
+        precision: Number of significant digits the floats of the data inlined in
+            generated charts are rounded to. If None, floats keep their full precision.
+        compact_json: Whether `to_json` and `write_json` drop the unused fields of
+            inlined data and write minified, byte-stable JSON.
+        backend: How entry points build charts: by composing Altair charts
+            ("altair"), or by filling in Vega-Lite dictionary templates ("spec"),
+            which is several times faster for large charts and returns a `Spec`.
+        debug: Whether specs built by the "spec" backend are validated against the
+            Vega-Lite schema, as Altair always does.
+        data_transformer: How the data of charts is stored in their specs when they are
+            built: inlined ("default"), or written to a JSON ("json") or CSV
+            ("csv") file in `data_dir` that the spec references by URL.
+        max_rows: Maximum number of rows of a chart's data. Building a chart with more
+            rows raises `altair.MaxRowsError`. If None, there is no limit.
+        data_dir: Directory the "json" and "csv" data transformers write files to.
+    """
+
+    pre_transform: bool = False
+    dictionary_encode: bool = False
+    precision: int | None = None
+    compact_json: bool = False
+    backend: str = "altair"
+    debug: bool = False
+    data_transformer: str = "default"
+    max_rows: int | None = None
+    data_dir: str = "."
+
+    def __post_init__(self):
+        if self.backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {BACKENDS}, got {self.backend!r}")
+        if self.data_transformer not in DATA_TRANSFORMERS:
+            raise ValueError(
+                f"data_transformer must be one of {DATA_TRANSFORMERS}, "
+                f"got {self.data_transformer!r}"
+            )
+
+
+_config = Config()
+_context_config: ContextVar[Config | None] = ContextVar("lpm_plot_config", default=None)
+
+
+def get_config() -> Config:
+    "Return the options of the innermost `config_context`, or the package-wide ones."
+    config = _context_config.get()
+    return _config if config is None else config
+
+
+def set_config(**options) -> Config:
+    """Update package-wide options.
+
+    They apply to every thread, except within a `config_context`.
+
+    Args:
+        **options: Any of the fields of `Config`.
+
+    Returns:
+        The new options.
+    """
+    global _config
+    _config = replace(_config, **options)
+    return _config
+
+
+@contextmanager
+def config_context(config: Config | None = None, **options) -> Iterator[Config]:
+    """Override options for the code run in the block, in the current context only.
+
+    The options are held in a `contextvars.ContextVar`, so concurrent threads and
+    asyncio tasks can build and serialize charts with different options without
+    affecting each other. Threads started in the block do not inherit them, unless they
+    run their work in a copy of the context (`contextvars.copy_context().run`).
+
+    Args:
+        config: The options to use. Defaults to the options currently in effect.
+        **options: Fields of `Config` to override.
+
+    Yields:
+        The options in effect in the block.
+    """
+    token = _context_config.set(replace(config or get_config(), **options))
+    try:
+        yield _context_config.get()
+    finally:
+        _context_config.reset(token)
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+
+import polars as pl
+
+from ._file_cache import _FileCache
+
+# Bumped when the layout of `reformat_data`'s detail table changes, so that files
+# written by older versions are not read back.
+DETAIL_FORMAT_VERSION = 1
+
+
+def _content_hash(df: pl.DataFrame) -> str:
+    "Hash the schema and every row of `df`, in order."
+    digest = hashlib.sha256()
+    digest.update(repr(list(df.schema.items())).encode("utf-8"))
+    digest.update(str(df.height).encode("utf-8"))
+    if df.height > 0 and df.width > 0:
+        digest.update(df.hash_rows(seed=0).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def detail_key(
+    all_data: pl.DataFrame, pairs: list[tuple[str, str]], data_margin: float
+) -> str:
+    """Compute the cache key of the detail table of `reformat_data`.
+
+    The key covers a hash of the full content of the compared columns of `all_data`,
+    the column pairs in order and `data_margin`. Hashing reads every row of those
+    columns, which is cheap next to building the detail table.
+
+    Returns:
+        A hex-encoded SHA-256 digest.
+    """
+    columns = list(
+        dict.fromkeys(c for pair in pairs if pair[0] != pair[1] for c in pair)
+    )
+    payload = json.dumps(
+        {
+            "data": _content_hash(all_data.select(columns)),
+            "pairs": [list(pair) for pair in pairs],
+            "data_margin": float(data_margin),
+            "version": DETAIL_FORMAT_VERSION,
+        },
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DetailCache(_FileCache):
+    """An on-disk cache of `reformat_data` detail tables, shared by memory mapping.
+
+    Tables are stored as uncompressed Arrow IPC files, one per key (see `detail_key`),
+    and read back memory-mapped: the data stays in the page cache of the operating
+    system, shared by every process reading the same file, rather than being copied
+    into the memory of each of them. Restarted sessions read the tables instead of
+    rebuilding them. Files are managed as in `RenderCache`.
+
+    Args:
+        directory: Directory holding the cached tables. Created if missing.
+        max_bytes: Upper bound on the total size of the cached tables.
+    """
+
+    EXTENSIONS = ("arrow",)
+
+    def __init__(self, directory: str | os.PathLike, max_bytes: int = 4 * 2**30):
+        super().__init__(directory, max_bytes)
+
+    def get(self, key: str) -> pl.DataFrame | None:
+        "Return the memory-mapped table for `key`, or None on a miss."
+        path = self.path(key, "arrow")
+        if not self._touch(path):
+            return None
+        try:
+            return pl.read_ipc(path, memory_map=True, rechunk=False)
+        except FileNotFoundError:
+            # Evicted by another process between the touch and the read.
+            return None
+
+    def put(self, key: str, df: pl.DataFrame) -> None:
+        "Atomically store a table and evict old entries if over budget."
+        # Compressed buffers would have to be decompressed into memory when read.
+        self._write(
+            self.path(key, "arrow"),
+            lambda tmp_path: df.write_ipc(tmp_path, compression="uncompressed"),
+        )
@@ -0,0 +1,321 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import polars as pl
+
+from ._frames import Source, collect, column_names, scan
+from .aggregation_cache import group_counts
+from .instrument import stage, traced
+
+# Rows per partition in `count_heavy_hitters`.
+PARTITION_ROWS = 1_000_000
+
+Grouping = str | tuple[str, ...]
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    "Number of significant bits of each of the uint64 `values`."
+    high, low = values >> np.uint64(32), values & np.uint64(0xFFFFFFFF)
+    # Halves below 2**32 convert to floats exactly, and so does their exponent.
+    return np.where(
+        high > 0,
+        32 + np.frexp(high.astype(np.float64))[1],
+        np.frexp(low.astype(np.float64))[1],
+    )
+
+
+class HeavyHitters:
+    """Approximate counts of the most frequent values of a column in fixed memory.
+
+    Three sketches are updated in a single pass over the values:
+
+    - a Space-Saving summary keeps the `capacity` values with the largest counts seen
+      so far, each with an overestimate of its count and a bound on the overestimate;
+    - a Count-Min sketch of `depth` rows of `width` counters bounds the count of any
+      value, summarized or not, within e / `width` of the number of values, with
+      probability 1 - exp(-`depth`);
+    - a HyperLogLog sketch of 2**`precision` registers estimates the number of
+      distinct values within about 1.04 / sqrt(2**`precision`).
+
+    Memory stays the same whatever the number of distinct values. Values are hashed
+    with Polars, so sketches built with the same parameters can be merged, and pickled
+    to be sent between processes running the same Polars version.
+
+    Args:
+        capacity: Number of values kept in the Space-Saving summary.
+        width: Number of counters per row of the Count-Min sketch.
+        depth: Number of rows of the Count-Min sketch.
+        precision: Base-2 logarithm of the number of HyperLogLog registers.
+        seed: Seed of the hash functions.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1000,
+        width: int = 2**16,
+        depth: int = 4,
+        precision: int = 14,
+        seed: int = 0,
+    ):
+        self.capacity = capacity
+        self.width = width
+        self.depth = depth
+        self.precision = precision
+        self.seed = seed
+        self.count = 0
+        self._top: pl.DataFrame | None = None
+        # Upper bound of the count of any value outside the summary.
+        self._floor = 0
+        self._table = np.zeros((depth, width), dtype=np.int64)
+        self._registers = np.zeros(2**precision, dtype=np.uint8)
+
+    def _cells(self, values: pl.Series) -> np.ndarray:
+        "The Count-Min counter of each value in each row, by double hashing."
+        hashes = values.hash(self.seed).to_numpy()
+        first, second = hashes & np.uint64(0xFFFFFFFF), (hashes >> np.uint64(32)) | 1
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((first + rows * second) % np.uint64(self.width)).astype(np.int64)
+
+    def _merge_top(self, top: pl.DataFrame, floor: int) -> None:
+        """Merge a Space-Saving summary into this one and keep the largest counts.
+
+        A value missing from one of the summaries has a count of at most its floor
+        there, which is added to both its count and its error.
+        """
+        if self._top is None:
+            merged = top
+        else:
+            merged = self._top.join(
+                top, on="value", how="full", coalesce=True, nulls_equal=True
+            ).select(
+                "value",
+                (
+                    pl.col("count").fill_null(self._floor)
+                    + pl.col("count_right").fill_null(floor)
+                ),
+                (
+                    pl.col("error").fill_null(self._floor)
+                    + pl.col("error_right").fill_null(floor)
+                ),
+            )
+            floor += self._floor
+        merged = merged.sort("count", "value", descending=True)
+        dropped = merged.slice(self.capacity)
+        if dropped.height:
+            floor = max(floor, dropped["count"].max())
+        self._top = merged.head(self.capacity)
+        self._floor = floor
+
+    def update(self, values: pl.Series, counts=None) -> "HeavyHitters":
+        """Add `values`, each `counts` times if given. Nulls are counted but not tracked.
+
+        Returns:
+            The sketch itself.
+        """
+        values = values.alias("value")
+        if counts is None:
+            self.count += len(values)
+            batch = values.drop_nulls().value_counts(name="count")
+        else:
+            counts = pl.Series(counts, dtype=pl.Int64)
+            self.count += int(counts.sum())
+            batch = (
+                pl.DataFrame({"value": values, "count": counts})
+                .filter(pl.col("value").is_not_null())
+                .group_by("value")
+                .agg(pl.sum("count"))
+            )
+        batch = batch.select(
+            "value",
+            pl.col("count").cast(pl.Int64),
+            pl.lit(0, dtype=pl.Int64).alias("error"),
+        )
+        if batch.height == 0:
+            return self
+
+        weights = batch["count"].to_numpy()
+        for row, cells in enumerate(self._cells(batch["value"])):
+            self._table[row] += np.bincount(
+                cells, weights=weights, minlength=self.width
+            ).astype(np.int64)
+
+        hashes = batch["value"].hash(self.seed + 1).to_numpy()
+        bits = 64 - self.precision
+        registers = (
+            pl.DataFrame(
+                {
+                    "register": (hashes >> np.uint64(bits)).astype(np.int64),
+                    # Position of the first set bit of the remaining bits.
+                    "rank": bits + 1 - _bit_length(hashes & np.uint64(2**bits - 1)),
+                }
+            )
+            .group_by("register")
+            .agg(pl.max("rank"))
+        )
+        index = registers["register"].to_numpy()
+        self._registers[index] = np.maximum(
+            self._registers[index], registers["rank"].to_numpy()
+        )
+
+        # Counts of a batch are exact: values missing from it have a count of 0.
+        self._merge_top(batch, 0)
+        return self
+
+    def merge(self, other: "HeavyHitters") -> "HeavyHitters":
+        """Add the values summarized by `other`, built with the same parameters.
+
+        Returns:
+            The sketch itself.
+        """
+        if (other.width, other.depth, other.precision, other.seed) != (
+            self.width,
+            self.depth,
+            self.precision,
+            self.seed,
+        ):
+            raise ValueError("cannot merge sketches built with different parameters")
+        self.count += other.count
+        self._table += other._table
+        np.maximum(self._registers, other._registers, out=self._registers)
+        if other._top is not None:
+            self._merge_top(other._top, other._floor)
+        return self
+
+    def distinct(self) -> float:
+        "Estimate the number of distinct values."
+        m = len(self._registers)
+        estimate = (
+            0.7213
+            / (1 + 1.079 / m)
+            * m**2
+            / np.ldexp(1.0, -self._registers.astype(np.int64)).sum()
+        )
+        zeros = int((self._registers == 0).sum())
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities.
+            estimate = m * math.log(m / zeros)
+        return float(estimate)
+
+    def estimate(self, values: pl.Series) -> pl.DataFrame:
+        """Estimate the counts of `values`.
+
+        Returns:
+            One row per value, with its "value", an overestimate of its "count" and a
+            bound on the overestimate ("error"): the count is within [count - error,
+            count], with high probability for values outside the Space-Saving summary.
+        """
+        values = pl.Series("value", values).unique(maintain_order=True)
+        if self._top is not None and values.dtype != self._top["value"].dtype:
+            # Hashes depend on the dtype, e.g. of the other source of a comparison.
+            values = values.cast(self._top["value"].dtype, strict=False)
+        cells = self._cells(values)
+        sketched = self._table[np.arange(self.depth)[:, None], cells].min(axis=0)
+        df = pl.DataFrame({"value": values, "sketched": sketched})
+        if self._top is not None:
+            df = df.join(self._top, on="value", how="left", nulls_equal=True)
+        else:
+            df = df.with_columns(
+                pl.lit(None, dtype=pl.Int64).alias("count"),
+                pl.lit(None, dtype=pl.Int64).alias("error"),
+            )
+        upper = pl.min_horizontal(pl.col("count").fill_null(self._floor), "sketched")
+        lower = (pl.col("count") - pl.col("error")).fill_null(0)
+        return df.select(
+            "value",
+            upper.alias("count"),
+            (upper - lower).alias("error"),
+        )
+
+    def top(self, k: int) -> pl.DataFrame:
+        "Estimate the counts of the `k` most frequent values, as in `estimate`."
+        if self._top is None:
+            return self.estimate(pl.Series("value", []))
+        return self.estimate(self._top["value"].head(k))
+
+
+def _keys(df: pl.DataFrame, grouping: Grouping) -> pl.Series:
+    "The values of a column, or the rows of a tuple of columns as structs."
+    columns = [grouping] if isinstance(grouping, str) else list(grouping)
+    # Categoricals hash by their physical codes, which differ between frames.
+    exprs = [
+        pl.col(c).cast(pl.String)
+        if isinstance(df.schema[c], (pl.Categorical, pl.Enum))
+        else pl.col(c)
+        for c in columns
+    ]
+    key = exprs[0] if isinstance(grouping, str) else pl.struct(exprs)
+    return df.select(key.alias("value")).to_series()
+
+
+@traced
+def count_heavy_hitters(
+    df: Source,
+    groupings: list[Grouping],
+    capacity: int = 1000,
+    partition_rows: int = PARTITION_ROWS,
+    max_workers: int | None = None,
+    **options,
+) -> dict[Grouping, HeavyHitters]:
+    """Build a `HeavyHitters` sketch of each column or tuple of columns in one pass.
+
+    The rows are split into partitions of `partition_rows` rows that are sketched in a
+    thread pool, only one partition per worker being in memory at a time, and the
+    sketches of the partitions are merged in order. Memory depends on the partition
+    size and the sketch parameters, not on the number of distinct values. Other
+    sources of counts, such as a `MarginalAccumulator`, are sketched from their counts.
+
+    Args:
+        df: The data, as a DataFrame, a LazyFrame, or a path or glob of Parquet or Arrow
+            IPC files.
+        groupings: Columns, or tuples of columns whose rows are counted jointly.
+        capacity: Number of values kept in each Space-Saving summary.
+        partition_rows: Number of rows per partition.
+        max_workers: Number of threads sketching partitions. Defaults to the
+            `ThreadPoolExecutor` default.
+        **options: Further parameters of the sketches (see `HeavyHitters`).
+
+    Returns:
+        The sketch of each grouping.
+    """
+    df = scan(df)
+    if not isinstance(df, (pl.DataFrame, pl.LazyFrame)):
+        stage("sketch")
+        tables = group_counts(
+            df, [[g] if isinstance(g, str) else list(g) for g in groupings]
+        )
+        return {
+            grouping: HeavyHitters(capacity, **options).update(
+                _keys(table, grouping), table["count"]
+            )
+            for grouping, table in zip(groupings, tables)
+        }
+
+    columns = list(
+        dict.fromkeys(c for g in groupings for c in ([g] if isinstance(g, str) else g))
+    )
+    missing = set(columns) - set(column_names(df))
+    if missing:
+        raise KeyError(f"columns not in the data: {sorted(missing)}")
+    df = df.lazy().select(columns)
+    total = collect(df.select(pl.len())).item()
+
+    stage("sketch", rows_in=total)
+    offsets = range(0, max(total, 1), partition_rows)
+
+    def sketch(partition: int):
+        batch = collect(df.slice(offsets[partition], partition_rows))
+        return {
+            grouping: HeavyHitters(capacity, **options).update(_keys(batch, grouping))
+            for grouping in groupings
+        }
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        partitions = list(pool.map(sketch, range(len(offsets))))
+
+    stage("merge", rows_in=len(partitions))
+    sketches = partitions[0]
+    for partition in partitions[1:]:
+        for grouping in groupings:
+            sketches[grouping].merge(partition[grouping])
+    return sketches
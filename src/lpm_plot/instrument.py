@@ -0,0 +1,201 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_callbacks: list[Callable[["Span"], None]] = []
+
+
+class Span:
+    """A timed stage of chart construction.
+
+    Attributes:
+        name: Stage name, e.g. "plot_heatmap.cluster".
+        start: Start time in seconds, from `time.perf_counter`.
+        duration: Duration in seconds.
+        rows_in: Number of input rows, if known.
+        rows_out: Number of output rows, if known.
+        bytes: Number of bytes produced, e.g. by serialization, if known.
+        thread_id: Identifier of the thread running the stage.
+    """
+
+    __slots__ = (
+        "bytes",
+        "duration",
+        "name",
+        "rows_in",
+        "rows_out",
+        "start",
+        "thread_id",
+    )
+
+    def __init__(self, name: str, rows_in: int | None = None):
+        self.name = name
+        self.start = 0.0
+        self.duration = 0.0
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.bytes = None
+        self.thread_id = threading.get_ident()
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def add_span_callback(callback: Callable[[Span], None]) -> None:
+    "Call `callback` with every finished span, from any thread."
+    _callbacks.append(callback)
+
+
+def remove_span_callback(callback: Callable[[Span], None]) -> None:
+    _callbacks.remove(callback)
+
+
+def _report(record: Span) -> None:
+    record.duration = time.perf_counter() - record.start
+    for callback in _callbacks.copy():
+        callback(record)
+
+
+@contextmanager
+def span(name: str, rows_in: int | None = None):
+    """Time a stage and report it to the registered callbacks.
+
+    The yielded `Span` can be updated with `rows_out` and `bytes` inside the block.
+    When no callback is registered, nothing is timed or reported.
+    """
+    record = Span(name, rows_in)
+    if not _callbacks:
+        yield record
+        return
+    record.start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        _report(record)
+
+
+class _Stages:
+    "The consecutive stages of one call of a traced function."
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.current: Span | None = None
+
+    def next(self, name: str, rows_in: int | None) -> Span:
+        self.close()
+        self.current = Span(f"{self.prefix}.{name}", rows_in)
+        self.current.start = time.perf_counter()
+        return self.current
+
+    def close(self) -> None:
+        if self.current is not None:
+            _report(self.current)
+            self.current = None
+
+
+_stages: ContextVar[_Stages | None] = ContextVar("lpm_plot_stages", default=None)
+
+
+def traced(func):
+    """Report every call of `func` as a span named after it.
+
+    Inside `func`, `stage` splits the call into consecutive named stages.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _callbacks:
+            return func(*args, **kwargs)
+        stages = _Stages(func.__name__)
+        token = _stages.set(stages)
+        try:
+            with span(func.__name__):
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    stages.close()
+        finally:
+            _stages.reset(token)
+
+    return wrapper
+
+
+def stage(name: str, rows_in: int | None = None) -> Span:
+    """Start the next stage of the enclosing traced function, ending the previous one.
+
+    The last stage ends when the traced function returns. The returned `Span` can be
+    updated with `rows_out` and `bytes` until then.
+    """
+    stages = _stages.get()
+    if stages is None:
+        return Span(name, rows_in)
+    return stages.next(name, rows_in)
+
+
+class Trace:
+    "The spans recorded by `trace`."
+
+    def __init__(self):
+        self.spans: list[Span] = []
+
+    def _record(self, record: Span) -> None:
+        self.spans.append(record)
+
+    def to_dicts(self) -> list[dict]:
+        "The recorded spans ordered by start time."
+        return [s.to_dict() for s in sorted(self.spans, key=lambda s: s.start)]
+
+    def to_chrome_trace(self) -> dict:
+        "The recorded spans in the Chrome trace event format (chrome://tracing, Perfetto)."
+        pid = os.getpid()
+        events = []
+        for s in sorted(self.spans, key=lambda s: s.start):
+            args = {
+                name: getattr(s, name)
+                for name in ("rows_in", "rows_out", "bytes")
+                if getattr(s, name) is not None
+            }
+            events.append(
+                {
+                    "name": s.name,
+                    "cat": "lpm_plot",
+                    "ph": "X",
+                    "ts": s.start * 1e6,
+                    "dur": s.duration * 1e6,
+                    "pid": pid,
+                    "tid": s.thread_id,
+                    "args": args,
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save(self, path: str | os.PathLike) -> None:
+        "Write the recorded spans to `path` as a Chrome trace JSON file."
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+
+@contextmanager
+def trace(path: str | os.PathLike | None = None):
+    """Record the spans reported by every entry point while the block runs.
+
+    Args:
+        path: If given, the spans are written there as a Chrome trace JSON file when
+            the block exits.
+
+    Yields:
+        Trace: The spans recorded so far.
+    """
+    recorded = Trace()
+    add_span_callback(recorded._record)
+    try:
+        yield recorded
+    finally:
+        remove_span_callback(recorded._record)
+        if path is not None:
+            recorded.save(path)
@@ -0,0 +1,140 @@
+from collections.abc import Iterable, Sequence
+
+import numpy as np
+import polars as pl
+
+from ._frames import Frame, collect_all
+from .aggregation_cache import _count_query
+
+
+class MarginalAccumulator:
+    """Running marginal counts over a stream of sample batches.
+
+    Every `update` counts the batch and merges the result into one count table per
+    tracked column and pair of columns, so memory grows with the number of distinct
+    values rather than the number of samples. The accumulator can be passed in place of
+    a DataFrame to `plot_marginal_1d` (for the tracked columns) and
+    `prepare_2d_marginal_data` (for the tracked pairs), which then plot the accumulated
+    counts. Columns with histogram `edges` are plotted by `plot_marginal_1d` as binned
+    bars, the other sources being binned over the same edges.
+
+    Args:
+        columns: Columns to count one at a time.
+        pairs: Pairs of columns to count jointly.
+        edges: Fixed histogram bin edges per numerical column, see `histogram`.
+
+    Example:
+        >>> accumulator = MarginalAccumulator(columns=["foo", "bar"], pairs=[("foo", "bar")])
+        >>> for batch in model.sample_batches():
+        ...     accumulator.update(batch)
+        >>> plot_marginal_1d(observed_df, accumulator, ["foo", "bar"])
+    """
+
+    def __init__(
+        self,
+        columns: Iterable[str] = (),
+        pairs: Iterable[tuple[str, str]] = (),
+        edges: dict[str, Sequence[float]] | None = None,
+    ):
+        self.height = 0
+        self._groupings = [(column,) for column in columns] + [
+            tuple(pair) for pair in pairs
+        ]
+        self._tables: dict[tuple[str, ...], pl.DataFrame | None] = dict.fromkeys(
+            self._groupings
+        )
+        self._edges = {
+            column: np.asarray(e, dtype=np.float64)
+            for column, e in (edges or {}).items()
+        }
+        self._histograms = {
+            column: np.zeros(len(e) - 1, dtype=np.int64)
+            for column, e in self._edges.items()
+        }
+
+    @property
+    def columns(self) -> list[str]:
+        "Names of the tracked columns."
+        names = [c for grouping in self._groupings for c in grouping]
+        return list(dict.fromkeys(names + list(self._edges)))
+
+    @property
+    def edges(self) -> dict[str, np.ndarray]:
+        "Histogram bin edges of the binned numerical columns."
+        return dict(self._edges)
+
+    def update(self, batch: Frame) -> None:
+        "Count the rows of `batch` and add them to the running tables and histograms."
+        groupings = [list(grouping) for grouping in self._groupings]
+        histogram_columns = list(self._edges)
+        results = collect_all(
+            [_count_query(batch, columns) for columns in groupings]
+            + [
+                batch.lazy().select(
+                    pl.col(column).cast(pl.Float64).drop_nulls().drop_nans()
+                )
+                for column in histogram_columns
+            ]
+            + [batch.lazy().select(pl.len())]
+        )
+        counts = results[: len(groupings)]
+        values = results[len(groupings) : -1]
+
+        for grouping, batch_counts in zip(self._groupings, counts):
+            batch_counts = batch_counts.with_columns(pl.col("count").cast(pl.Int64))
+            table = self._tables[grouping]
+            if table is not None:
+                batch_counts = (
+                    pl.concat([table, batch_counts])
+                    .group_by(grouping)
+                    .agg(pl.col("count").sum())
+                )
+            self._tables[grouping] = batch_counts
+        for column, frame in zip(histogram_columns, values):
+            self._histograms[column] += np.histogram(
+                frame.get_column(column).to_numpy(), bins=self._edges[column]
+            )[0]
+        self.height += results[-1].item()
+
+    def counts(self, columns: list[str]) -> pl.DataFrame:
+        """Accumulated row counts per combination of values in `columns`.
+
+        Returns:
+            pl.DataFrame: The grouping columns and an Int64 "count" column. Null values
+            are kept as their own group.
+
+        Raises:
+            KeyError: If `columns` is neither a tracked column nor a tracked pair, in
+                either order.
+        """
+        grouping = tuple(columns)
+        if grouping not in self._tables:
+            if grouping[::-1] not in self._tables:
+                raise KeyError(f"{list(columns)} are not counted by this accumulator")
+            return self.counts(list(grouping[::-1])).select(*grouping, "count")
+        table = self._tables[grouping]
+        if table is None:
+            return pl.DataFrame(schema={**dict.fromkeys(grouping), "count": pl.Int64})
+        return table
+
+    def counts_many(self, groupings: list[list[str]]) -> list[pl.DataFrame]:
+        "Like `counts`, for several groupings at once."
+        return [self.counts(columns) for columns in groupings]
+
+    def histogram(self, column: str) -> pl.DataFrame:
+        """Accumulated histogram of a numerical column over its fixed bin edges.
+
+        Bins are half-open except the last one, which includes its upper edge, as in
+        `numpy.histogram`. Null, NaN and out-of-range values are not counted.
+
+        Returns:
+            pl.DataFrame: One row per bin with "bin_start", "bin_end" and "count" columns.
+        """
+        edges = self._edges[column]
+        return pl.DataFrame(
+            {
+                "bin_start": edges[:-1],
+                "bin_end": edges[1:],
+                "count": self._histograms[column],
+            }
+        )
@@ -0,0 +1,123 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+
+import numpy as np
+import polars as pl
+
+from ._encoding import DEFAULT_BINS, encode
+from ._frames import Source, collect, column_names, scan
+from .instrument import stage, traced
+
+NORMALIZATIONS = ("sqrt", "min", "max", "arithmetic", None)
+
+
+def _entropy(p: np.ndarray) -> float:
+    p = p[p > 0]
+    return float(-(p * np.log(p)).sum())
+
+
+def _score(
+    x: np.ndarray,
+    y: np.ndarray,
+    n_x: int,
+    n_y: int,
+    normalization: str | None,
+    has_nulls: bool,
+) -> float:
+    "Mutual information of two code arrays, from their sparse contingency table."
+    if has_nulls:
+        valid = (x >= 0) & (y >= 0)
+        x, y = x[valid], y[valid]
+    if x.size == 0:
+        return float("nan")
+    # Only the cells seen in the data are counted, and the marginals are looked up by
+    # code, so memory grows with the number of rows rather than with n_x * n_y.
+    cells, joint = np.unique(x.astype(np.int64) * n_y + y, return_counts=True)
+    p_xy = joint / x.size
+    p_x = np.bincount(x, minlength=n_x) / x.size
+    p_y = np.bincount(y, minlength=n_y) / x.size
+    cell_x, cell_y = np.divmod(cells, n_y)
+    mi = float((p_xy * np.log(p_xy / (p_x[cell_x] * p_y[cell_y]))).sum())
+    if normalization is None:
+        return mi
+    h_x, h_y = _entropy(p_x), _entropy(p_y)
+    denominator = {
+        "sqrt": np.sqrt(h_x * h_y),
+        "min": min(h_x, h_y),
+        "max": max(h_x, h_y),
+        "arithmetic": (h_x + h_y) / 2,
+    }[normalization]
+    # A constant column shares no information with any other.
+    return mi / denominator if denominator > 0 else 0.0
+
+
+@traced
+def compute_mutual_information(
+    df: Source,
+    columns: list[str] | None = None,
+    bins: int = DEFAULT_BINS,
+    normalization: str | None = "sqrt",
+    max_workers: int | None = None,
+) -> pl.DataFrame:
+    """Compute the mutual information of every pair of columns, as `plot_heatmap` input.
+
+    Every column is dictionary-encoded once into integer codes, numerical columns with
+    more than `bins` distinct values being discretized into quantile bins. The
+    contingency table of each pair is then counted sparsely with `numpy.unique` on the
+    combined codes, with the pairs spread over a thread pool. Rows with a null in either
+    column of a pair are ignored for that pair.
+
+    Args:
+        df: The data, as a DataFrame, a LazyFrame, or a path or glob of Parquet or Arrow
+            IPC files.
+        columns: Columns to compare. Defaults to every column.
+        bins: Number of quantile bins for numerical columns.
+        normalization: How the mutual information (in nats) is scaled to [0, 1]: divided
+            by the geometric mean ("sqrt"), the minimum ("min"), the maximum ("max") or
+            the arithmetic mean ("arithmetic") of the two entropies, or not at all (None).
+        max_workers: Number of threads computing pairs. Defaults to the
+            `ThreadPoolExecutor` default.
+
+    Returns:
+        pl.DataFrame: A symmetric table with "Column 1", "Column 2" and "Score" for every
+        ordered pair of columns. Self-comparisons have a null score, which
+        `plot_heatmap` displays as 1.
+    """
+    if normalization not in NORMALIZATIONS:
+        raise ValueError(
+            f"normalization must be one of {NORMALIZATIONS}, got {normalization!r}"
+        )
+    df = scan(df)
+    if columns is None:
+        columns = column_names(df)
+
+    encode_stage = stage("encode")
+    data = collect(df.lazy().select(columns))
+    encode_stage.rows_in = data.height
+    (codes_df,), cardinalities = encode([data], columns, bins)
+    codes = {column: codes_df.get_column(column).to_numpy() for column in columns}
+    nullable = {column: bool((codes[column] < 0).any()) for column in columns}
+
+    def score(pair):
+        x, y = pair
+        return _score(
+            codes[x],
+            codes[y],
+            cardinalities[x],
+            cardinalities[y],
+            normalization,
+            nullable[x] or nullable[y],
+        )
+
+    stage("contingency", rows_in=data.height)
+    pairs = list(combinations(columns, 2))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        scores = dict(zip(pairs, pool.map(score, pairs)))
+
+    scores.update({(b, a): score for (a, b), score in list(scores.items())})
+    rows = [(a, b, scores.get((a, b))) for a in columns for b in columns]
+    return pl.DataFrame(
+        rows,
+        schema={"Column 1": pl.String, "Column 2": pl.String, "Score": pl.Float64},
+        orient="row",
+    )
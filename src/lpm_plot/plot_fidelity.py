@@ -1,5 +1,10 @@
 import altair as alt
-import polars as pl
+
+from ._frames import Source, collect, column_names, compact, scan
+from .config import get_config
+from .instrument import stage, traced
+from .pre_transform import finish_chart
+from .spec import Spec, dataset_name
 
 METRICS = {
     "tvd": "Total variation distance",
@@ -7,10 +12,35 @@ METRICS = {
     "js": "Jensen–Shannon divergence",
 }
 STROKEDASH = 5
+BAND_OPACITY = 0.2
+
 
+@traced
+def plot_fidelity(
+    fidelity_df: Source,
+    metric="tvd",
+    pre_transform: bool | None = None,
+):
+    """Plot the fidelity of the synthetic data generated by a given model based on a metric (tvd, kl, js).
 
-def plot_fidelity(fidelity_df: pl.DataFrame, metric="tvd"):
-    "Plot the fidelity of the synthetic data generated by a given model based on a metric (tvd, kl, js)."
+    `fidelity_df` can be a DataFrame, a LazyFrame, or a path or glob of Parquet or Arrow IPC files.
+    When it has "<metric>_lower" and "<metric>_upper" columns, e.g. from
+    `compute_fidelity(..., bootstrap=...)`, they are drawn as a confidence band around the line.
+    """
+    fidelity_df = scan(fidelity_df)
+    bounds = [f"{metric}_lower", f"{metric}_upper"]
+    if not set(bounds) <= set(column_names(fidelity_df)):
+        bounds = []
+    fidelity_df = compact(
+        collect(
+            fidelity_df.lazy().select(
+                "index", metric, *bounds, "model", "column-1", "column-2"
+            )
+        )
+    )
+    stage("build", rows_in=fidelity_df.height)
+    if get_config().backend == "spec":
+        return finish_chart(_fidelity_spec(fidelity_df, metric, bounds), pre_transform)
     line_chart = (
         alt.Chart(fidelity_df)
         .mark_line(strokeDash=[STROKEDASH, STROKEDASH])
@@ -39,6 +69,70 @@ def plot_fidelity(fidelity_df: pl.DataFrame, metric="tvd"):
         )
     )
 
-    # Combine the line chart and point chart into one layered chart
-    final_chart = alt.layer(line_chart, point_chart).properties(width=400, height=400)
-    return final_chart
+    layers = [line_chart, point_chart]
+    if bounds:
+        band_chart = (
+            alt.Chart(fidelity_df)
+            .mark_errorband(opacity=BAND_OPACITY)
+            .encode(
+                x=alt.X("index:O"),
+                y=alt.Y(f"{bounds[0]}:Q", title=METRICS.get(metric, metric)),
+                y2=alt.Y2(f"{bounds[1]}:Q"),
+                color=alt.Color("model:N", legend=None),
+            )
+        )
+        layers.insert(0, band_chart)
+
+    # Combine the band, line chart and point chart into one layered chart
+    final_chart = alt.layer(*layers).properties(width=400, height=400)
+    return finish_chart(final_chart, pre_transform)
+
+
+def _fidelity_spec(fidelity_df, metric, bounds) -> Spec:
+    "Template of the `plot_fidelity` chart for the `spec` backend."
+    title = METRICS.get(metric, metric)
+    index = {"field": "index", "type": "ordinal"}
+    model = {"field": "model", "type": "nominal"}
+    layers = [
+        {
+            "mark": {"type": "line", "strokeDash": [STROKEDASH, STROKEDASH]},
+            "encoding": {
+                "color": model,
+                "x": index,
+                "y": {"field": metric, "title": title, "type": "quantitative"},
+            },
+        },
+        {
+            "mark": {"type": "point"},
+            "encoding": {
+                "color": model,
+                "tooltip": [
+                    {"field": "column-1", "title": "Column 1", "type": "nominal"},
+                    {"field": "column-2", "title": "Column 2", "type": "nominal"},
+                ],
+                "x": {
+                    "axis": {"labels": False},
+                    "field": "index",
+                    "title": "Pairs of columns (ordered from best fit to worst)",
+                    "type": "ordinal",
+                },
+                "y": {"field": metric, "type": "quantitative"},
+            },
+        },
+    ]
+    if bounds:
+        band = {
+            "mark": {"type": "errorband", "opacity": BAND_OPACITY},
+            "encoding": {
+                "color": {**model, "legend": None},
+                "x": index,
+                "y": {"field": bounds[0], "title": title, "type": "quantitative"},
+                "y2": {"field": bounds[1]},
+            },
+        }
+        layers.insert(0, band)
+    name = dataset_name(fidelity_df)
+    return Spec(
+        {"layer": layers, "data": {"name": name}, "height": 400, "width": 400},
+        {name: fidelity_df},
+    )
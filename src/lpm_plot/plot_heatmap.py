@@ -1,28 +1,41 @@
 import altair as alt
 import numpy as np
 import polars as pl
-from scipy.cluster.hierarchy import leaves_list, linkage
-from scipy.spatial.distance import squareform
 
+from ._frames import collect, column_names, compact, n_rows, round_significant
+from .config import get_config
+from .detail_cache import DetailCache, detail_key
+from .instrument import stage, traced
+from .pre_transform import finish_chart
+from .spec import Spec, dataset_name
 
+DETAIL_COLUMNS = ["Column 1", "Column 2", "comparison_type", "x_data", "y_data"]
+DETAIL_SCHEMA = dict.fromkeys(DETAIL_COLUMNS, pl.String)
+
+# The comparison types whose x and y data are numbers, stored as strings.
+NUMERICAL_SIDES = {"x_data": ["num-num", "num-cat"], "y_data": ["num-num", "cat-num"]}
+
+
+@traced
 def plot_heatmap(
-    df: pl.DataFrame,
-    detailed_df: pl.DataFrame = None,
+    df: pl.DataFrame | pl.LazyFrame,
+    detailed_df: pl.DataFrame | pl.LazyFrame = None,
     cmap_main: str = "greens",
     cmap_detail: str = "greys",
     detail_color: str = "black",
     interactive: bool = True,
+    pre_transform: bool | None = None,
 ):
     """
     Generates a clustered heatmap using hierarchical clustering on a Polars DataFrame and visualizes it with Altair.
 
     Parameters
     ----------
-    df : pl.DataFrame
+    df : pl.DataFrame or pl.LazyFrame
         A Polars DataFrame with columns named "Column 1", "Column 2", and "Score."
         "Column 1" and "Column 2" represent categorical labels along the x- and y-axes, respectively,
         while "Score" provides numerical values for coloring the heatmap.
-    detailed_df : pl.DataFrame, optional
+    detailed_df : pl.DataFrame or pl.LazyFrame, optional
         A Polars DataFrame containing more detailed information about the additional graph displayed after clicking specific heatmap cells.
         The detailed_df has the following columns:
         - "Column 1": Data class 1
@@ -39,6 +52,9 @@ def plot_heatmap(
     interactive : bool, optional
         Whether to make the plot interactive. When True, enables zooming, panning, and a detailed 2D subplot of the selected heatmap cell.
         Defaults to True.
+    pre_transform : bool, optional
+        Whether to evaluate the data transforms with VegaFusion and return a PreTransformedChart.
+        Defaults to the package-wide `pre_transform` option.
 
     Returns
     -------
@@ -58,10 +74,12 @@ def plot_heatmap(
       side to avoid overlaps. This is an unavoidable consequence of making an interactive vega-lite graphs like this.
     - The detail graph has a frequency bar that is unable to be hidden while non-heatmap graphs are displayed due to the limitations of vega-lite
     """
-    assert "Column 1" in df.columns
-    assert "Column 2" in df.columns
-    assert "Score" in df.columns
+    assert "Column 1" in column_names(df)
+    assert "Column 2" in column_names(df)
+    assert "Score" in column_names(df)
+    df = collect(df.lazy().select("Column 1", "Column 2", "Score"))
 
+    stage("cluster", rows_in=df.height)
     # Get all unique values from both columns to ensure square matrix
     all_unique_values = sorted(
         set(df["Column 1"].unique().to_list() + df["Column 2"].unique().to_list())
@@ -92,6 +110,10 @@ def plot_heatmap(
     df_pivot = df_pivot.sort("Column 1").select(["Column 1"] + all_unique_values)
     data_matrix = df_pivot.select(all_unique_values).fill_null(0).to_numpy()
 
+    # scipy is slow to import, so only load it once we actually cluster.
+    from scipy.cluster.hierarchy import leaves_list, linkage
+    from scipy.spatial.distance import squareform
+
     distance_matrix = 1 - data_matrix
     np.fill_diagonal(distance_matrix, 0)
 
@@ -101,6 +123,7 @@ def plot_heatmap(
 
     order = [all_unique_values[i] for i in leaves_list(linkage_matrix)]
 
+    stage("build", rows_in=df.height)
     # Define filter fields for selected cells (only if interactive)
     if interactive:
         click = alt.selection_point(
@@ -120,6 +143,12 @@ def plot_heatmap(
         .alias("Score")
     )
 
+    df = compact(df)
+    if get_config().backend == "spec" and (detailed_df is None or not interactive):
+        return finish_chart(
+            _heatmap_spec(df, order, cmap_main, interactive), pre_transform
+        )
+
     # Create the heatmap using Altair
     base = alt.Chart(df).mark_rect()
 
@@ -145,75 +174,91 @@ def plot_heatmap(
                 "Score:Q", scale=alt.Scale(scheme=cmap_main), legend=alt.Legend()
             ),
         ),
-        tooltip=["Column 1", "Column 2", "Score:Q"],
+        tooltip=["Column 1:N", "Column 2:N", "Score:Q"],
     ).properties(width=400, height=400)  # Default scale
 
     # Return heatmap if no detailed data is provided
     if detailed_df is None:
         if interactive:
-            return base.interactive()
+            return finish_chart(base.interactive(), pre_transform)
         else:
-            return base.properties(title="Mutual Information Heatmap")
+            return finish_chart(
+                base.properties(title="Mutual Information Heatmap"), pre_transform
+            )
 
     # If not interactive, return just the base heatmap even if detailed_df is provided
     if not interactive:
-        return base.properties(title="Mutual Information Heatmap")
-
-    detailed_df = detailed_df.vstack(
-        pl.DataFrame(
-            {
-                "Column 1": None,
-                "Column 2": None,
-                "comparison_type": "none",
-                "x_data": None,
-                "y_data": None,
-            }
+        return finish_chart(
+            base.properties(title="Mutual Information Heatmap"), pre_transform
         )
+
+    detail_counts = stage("detail_counts", rows_in=n_rows(detailed_df))
+    detailed = pl.concat(
+        [
+            detailed_df.lazy().select(DETAIL_COLUMNS),
+            pl.LazyFrame(
+                {
+                    "Column 1": None,
+                    "Column 2": None,
+                    "comparison_type": "none",
+                    "x_data": None,
+                    "y_data": None,
+                }
+            ),
+        ],
+        how="vertical_relaxed",
     )
+    precision = get_config().precision
+    if precision is not None:
+        detailed = _round_numbers(detailed, precision)
 
-    cat_cat_df = detailed_df.filter(pl.col("comparison_type") == "cat-cat")
+    cat_cat = detailed.filter(pl.col("comparison_type") == "cat-cat")
 
-    # Get frequency counts for all categorical-categorical data
-    counted_df = (
-        cat_cat_df.group_by(
-            ["Column 1", "Column 2", "comparison_type", "x_data", "y_data"]
-        )
+    # Get frequency counts for all categorical-categorical data. Counted and missing
+    # combos are sorted so that the inlined data does not depend on the group order.
+    counted = (
+        cat_cat.group_by(DETAIL_COLUMNS)
         .len()
         .rename({"len": "Frequency"})
+        .sort(DETAIL_COLUMNS)
     )
 
-    # Get all present unique category combo for each cat-cat comparison
-    column_combos = cat_cat_df["Column 1", "Column 2"].unique()
-    combo_filtered_dfs: list[pl.DataFrame] = []
-    for combo in column_combos.iter_rows():
-        combo_filtered_dfs.append(
-            cat_cat_df.filter(
-                (pl.col("Column 1") == combo[0]) & (pl.col("Column 2") == combo[1])
-            ).unique(subset=["x_data", "y_data"])
-        )
-
-    # Add missing category combos with a frequency of 0
-    for combo_filered_df in combo_filtered_dfs:
-        combos = combo_filered_df["x_data", "y_data"].rows()
-        x_vals = combo_filered_df["x_data"].unique()
-        y_vals = combo_filered_df["y_data"].unique()
-        for x in x_vals:
-            for y in y_vals:
-                if not x == y and (x, y) not in combos:
-                    counted_df = counted_df.vstack(
-                        pl.DataFrame(
-                            [combo_filered_df.row(0)[:3] + (x, y, 0)],
-                            schema=counted_df.schema,
-                            orient="row",
-                        )
-                    )
+    # Add the missing category combos of each cat-cat comparison with a frequency of 0
+    comparison = ["Column 1", "Column 2", "comparison_type"]
+    missing = (
+        cat_cat.select(*comparison, "x_data")
+        .unique()
+        .join(cat_cat.select(*comparison, "y_data").unique(), on=comparison)
+        .filter(pl.col("x_data").ne_missing(pl.col("y_data")))
+        .join(counted, on=DETAIL_COLUMNS, how="anti")
+        .with_columns(pl.lit(0, dtype=pl.UInt32).alias("Frequency"))
+        .sort(DETAIL_COLUMNS)
+    )
 
     # Replace detail_df cat-cat comparisons with counted versions
-    detailed_df = (
-        detailed_df.filter(pl.col("comparison_type") != "cat-cat")
-        .with_columns(pl.lit(0, dtype=pl.UInt32).alias("Frequency"))
-        .vstack(counted_df)
+    detailed_df = compact(
+        collect(
+            pl.concat(
+                [
+                    detailed.filter(
+                        pl.col("comparison_type") != "cat-cat"
+                    ).with_columns(pl.lit(0, dtype=pl.UInt32).alias("Frequency")),
+                    counted,
+                    missing,
+                ]
+            )
+        )
     )
+    detail_counts.rows_out = detailed_df.height
+
+    stage("build_detail", rows_in=detailed_df.height)
+    if get_config().backend == "spec":
+        return finish_chart(
+            _detailed_heatmap_spec(
+                df, detailed_df, order, cmap_main, cmap_detail, detail_color
+            ),
+            pre_transform,
+        )
 
     # Empty graph that is displayed when data is compared to itself
     empty = alt.Chart(detailed_df).mark_text(
@@ -387,28 +432,301 @@ def plot_heatmap(
 
     # Apply interactivity if requested
     if interactive:
-        return chart.interactive()
+        return finish_chart(chart.interactive(), pre_transform)
     else:
-        return chart
+        return finish_chart(chart, pre_transform)
+
+
+def _heatmap_encoding(order, cmap_main):
+    return {
+        "color": {
+            "condition": {"test": "(datum.Score === 0)", "value": "white"},
+            "field": "Score",
+            "legend": {},
+            "scale": {"scheme": cmap_main},
+            "type": "quantitative",
+        },
+        "tooltip": [
+            {"field": "Column 1", "type": "nominal"},
+            {"field": "Column 2", "type": "nominal"},
+            {"field": "Score", "type": "quantitative"},
+        ],
+        "x": {
+            "field": "Column 1",
+            "sort": order,
+            "title": "Column 1",
+            "type": "nominal",
+        },
+        "y": {
+            "field": "Column 2",
+            "sort": order,
+            "title": "Column 2",
+            "type": "nominal",
+        },
+    }
+
+
+# The selection of a heatmap cell, and the zoom and pan of the heatmap.
+CLICK = {
+    "name": "param_1",
+    "select": {
+        "type": "point",
+        "clear": False,
+        "fields": ["Column 1", "Column 2"],
+        "on": "click",
+    },
+    "value": [{"Column 1": None}, {"Column 2": None}],
+}
+ZOOM = {
+    "name": "param_2",
+    "select": {"type": "interval", "encodings": ["x", "y"]},
+    "bind": "scales",
+}
+
+
+def _heatmap_spec(df, order, cmap_main, interactive) -> Spec:
+    "Template of the heatmap without detail view, for the `spec` backend."
+    name = dataset_name(df)
+    spec = {
+        "data": {"name": name},
+        "mark": {"type": "rect"},
+        "encoding": _heatmap_encoding(order, cmap_main),
+        "height": 400,
+        "width": 400,
+    }
+    if interactive:
+        spec["params"] = [CLICK, ZOOM]
+    else:
+        spec["title"] = "Mutual Information Heatmap"
+    return Spec(spec, {name: df})
+
 
+def _detailed_heatmap_spec(
+    df, detailed_df, order, cmap_main, cmap_detail, detail_color
+) -> Spec:
+    "Template of the interactive heatmap with its detail view, for the `spec` backend."
 
+    def selected(comparison_type):
+        return [
+            {
+                "filter": {
+                    "and": [
+                        {"param": "param_1"},
+                        f"(datum.comparison_type === {comparison_type!r})",
+                    ]
+                }
+            }
+        ]
+
+    def detail_axis(field, type, orient, padding=False):
+        channel = {"axis": {"orient": orient}, "field": field, "title": None}
+        if padding:
+            channel["scale"] = {"padding": 0.5}
+        return {**channel, "type": type}
+
+    def tooltip(*channels):
+        return [{"field": field, "type": type} for field, type in channels]
+
+    box_mark = {"type": "boxplot", "color": detail_color, "size": 60}
+    detail_layer = {
+        "layer": [
+            {
+                "name": "view_2",
+                "mark": {
+                    "type": "text",
+                    "strokeWidth": 0.5,
+                    "text": "No Data: self comparison",
+                },
+                "transform": selected("same-same"),
+            },
+            {
+                "mark": {
+                    "type": "text",
+                    "strokeWidth": 0.5,
+                    "text": "Nothing selected",
+                },
+                "transform": selected("none"),
+            },
+            {
+                "mark": {"type": "circle", "color": detail_color, "size": 60},
+                "encoding": {
+                    "tooltip": tooltip(
+                        ("x_data", "quantitative"), ("y_data", "quantitative")
+                    ),
+                    "x": detail_axis("x_data", "quantitative", "bottom"),
+                    "y": detail_axis("y_data", "quantitative", "left"),
+                },
+                "transform": selected("num-num"),
+            },
+            {
+                "mark": box_mark,
+                "encoding": {
+                    "tooltip": tooltip(
+                        ("x_data", "nominal"), ("y_data", "quantitative")
+                    ),
+                    "x": detail_axis("x_data", "quantitative", "top"),
+                    "y": detail_axis("y_data", "nominal", "left", padding=True),
+                },
+                "transform": selected("num-cat"),
+            },
+            {
+                "mark": box_mark,
+                "encoding": {
+                    "tooltip": tooltip(
+                        ("x_data", "nominal"), ("y_data", "quantitative")
+                    ),
+                    "x": detail_axis("x_data", "nominal", "bottom", padding=True),
+                    "y": detail_axis("y_data", "quantitative", "right"),
+                },
+                "transform": selected("cat-num"),
+            },
+            {
+                "mark": {"type": "rect", "stroke": "white"},
+                "encoding": {
+                    "color": {
+                        "condition": {
+                            "test": "(datum.Frequency === 0)",
+                            "value": "white",
+                        },
+                        "field": "Frequency",
+                        "legend": {"offset": 10, "orient": "right"},
+                        "scale": {"domainMin": 0, "scheme": cmap_detail},
+                        "type": "quantitative",
+                    },
+                    "tooltip": tooltip(
+                        ("x_data", "nominal"),
+                        ("y_data", "nominal"),
+                        ("Frequency", "quantitative"),
+                    ),
+                    "x": detail_axis("x_data", "nominal", "bottom"),
+                    "y": detail_axis("y_data", "nominal", "left"),
+                },
+                "transform": selected("cat-cat"),
+            },
+        ],
+        "height": 300,
+        "resolve": {
+            "legend": {"color": "independent"},
+            "scale": {"color": "independent", "x": "shared", "y": "shared"},
+        },
+        "width": 400,
+    }
+    labels_y = {
+        "name": "view_3",
+        "mark": {"type": "text", "angle": 270, "fontSize": 12, "strokeWidth": 0.5},
+        "encoding": {
+            "text": {"field": "Column 2", "type": "nominal"},
+            "x": {"value": 15},
+            "y": {"value": 150},
+        },
+        "transform": [{"filter": {"param": "param_1"}}],
+        "width": 30,
+    }
+    spacer = {
+        "name": "view_4",
+        "mark": {"type": "text", "opacity": 0},
+        "height": 30,
+        "transform": [{"filter": "(datum.comparison_type === 'never-matches')"}],
+        "width": 30,
+    }
+    labels_x = {
+        "name": "view_5",
+        "mark": {"type": "text", "align": "center", "fontSize": 12, "strokeWidth": 0.5},
+        "encoding": {
+            "text": {"field": "Column 1", "type": "nominal"},
+            "x": {"value": 200},
+            "y": {"value": 15},
+        },
+        "height": 30,
+        "transform": [{"filter": {"param": "param_1"}}],
+        "width": 400,
+    }
+
+    name, detail_name = dataset_name(df), dataset_name(detailed_df)
+    base = {
+        "data": {"name": name},
+        "name": "view_1",
+        "mark": {"type": "rect"},
+        "encoding": _heatmap_encoding(order, cmap_main),
+        "height": 400,
+        "title": "Mutual Information Heatmap",
+        "width": 400,
+    }
+    detail_section = {
+        "vconcat": [
+            {"hconcat": [labels_y, detail_layer], "spacing": 5},
+            {"hconcat": [spacer, labels_x], "spacing": 5},
+        ],
+        "data": {"name": detail_name},
+        "title": "2D Detailed View (click on heatmap cells)",
+    }
+    return Spec(
+        {
+            "vconcat": [base, detail_section],
+            "padding": {"left": 60, "right": 130, "top": 40, "bottom": 80},
+            "params": [
+                {**CLICK, "views": ["view_1"]},
+                {**ZOOM, "views": ["view_1", "view_3", "view_2", "view_4", "view_5"]},
+            ],
+            "spacing": 20,
+        },
+        {name: df, detail_name: detailed_df},
+    )
+
+
+def _round_numbers(detailed: pl.LazyFrame, precision: int) -> pl.LazyFrame:
+    """Round the numerical x and y data of the detail rows to `precision` digits.
+
+    Values that rounding leaves unchanged keep their string, so integers are not
+    rewritten as floats.
+    """
+    for side, comparison_types in NUMERICAL_SIDES.items():
+        value = pl.col(side).cast(pl.Float64, strict=False)
+        rounded = round_significant(value, precision)
+        detailed = detailed.with_columns(
+            pl.when(
+                pl.col("comparison_type").is_in(comparison_types) & (rounded != value)
+            )
+            .then(rounded.cast(pl.String))
+            .otherwise(pl.col(side))
+            .alias(side)
+        )
+    return detailed
+
+
+def _variable_kind(dtype: pl.DataType) -> str:
+    if dtype == pl.String:
+        return "cat"
+    if dtype.is_numeric():
+        return "num"
+    return ""
+
+
+@traced
 def reformat_data(
-    heatmap_df: pl.DataFrame, all_data: pl.DataFrame, data_margin: float = 1.0
+    heatmap_df: pl.DataFrame | pl.LazyFrame,
+    all_data: pl.DataFrame | pl.LazyFrame,
+    data_margin: float = 1.0,
+    cache: DetailCache | None = None,
 ):
     """
     Reformats the provided polars data frame so they can be used by the plot_heatmap function
 
     Parameters
     ----------
-    heatmap_df : pl.DataFrame
+    heatmap_df : pl.DataFrame or pl.LazyFrame
         A Polars DataFrame containing the data to be plotted, with columns "Column 1", "Column 2", and "Score".
         "Column 1" and "Column 2" represent categorical labels along the x- and y-axes, respectively,
         while "Score" provides quantitative values for coloring the heatmap.
-    all_data : pl.DataFrame
+    all_data : pl.DataFrame or pl.LazyFrame
         A Polars DataFrame containing more detailed data about the data used to make the heatmap. Columns are specific data classes
-        and each row should represent all the data about specific sample.
+        and each row should represent all the data about specific sample. Only the columns named in heatmap_df are read.
     data_margin : float, optional
         Ratio all_data that should be reformatted from 0-1
+    cache : DetailCache, optional
+        On-disk cache the detail data frame is read from, memory-mapped, when it was built before
+        for the same all_data, column pairs and data_margin, and written to otherwise. Only
+        DataFrames are cached, as LazyFrames cannot be hashed without running their query.
 
     Returns
     -------
@@ -421,84 +739,83 @@ def reformat_data(
     - all_data is reformatted to have "Column 1", "Column 2", "comparison_type", "x_data", and "y_data". "Column 1" and "Column 2"
       represent which 2 data classes are being compared and "comparison_tpye" determines which graph is used to show
       the comparison and can be "num-num", "num-cat", "cat-num", "cat-cat", and "same-same". "x_data" and "y_data" are the
-      data being shown in the comparison referring to "Column 1" and "Column 2" respectively.
+      data being shown in the comparison referring to "Column 1" and "Column 2" respectively, as strings.
+    - The rows of every column pair are selected in one lazy query, so with a LazyFrame only the
+      compared columns are scanned.
     """
-    # Create df that will become the return resilt for all_data
-    detail_df = pl.DataFrame(
-        {
-            "Column 1": pl.Series("Column 1", [], dtype=pl.String),
-            "Column 2": pl.Series("Column 2", [], dtype=pl.String),
-            "comparison_type": pl.Series("comparison_type", [], dtype=pl.String),
-            "x_data": pl.Series("x_data", [], dtype=pl.Object),
-            "y_data": pl.Series("y_data", [], dtype=pl.Object),
-        }
+    heatmap_df = collect(heatmap_df.lazy().select("Column 1", "Column 2", "Score"))
+    pairs = heatmap_df.select("Column 1", "Column 2").rows()
+    columns = list(
+        dict.fromkeys(c for pair in pairs if pair[0] != pair[1] for c in pair)
     )
 
-    # Get margin of all_data to be used
-    data_slice = int(len(all_data) * data_margin)
-    all_data = all_data[:data_slice]
+    key = None
+    if cache is not None and isinstance(all_data, pl.DataFrame):
+        stage("cache")
+        key = detail_key(all_data, pairs, data_margin)
+        detail_df = cache.get(key)
+        if detail_df is not None:
+            return _self_scores(heatmap_df), detail_df
 
-    for row in heatmap_df.iter_rows():
-        # Iterate through every column combo and get data pertaining to it
-        cat1_data = all_data.get_column(row[0])
-        cat2_data = all_data.get_column(row[1])
+    # Get margin of all_data to be used
+    data = all_data.lazy().select(columns)
+    if data_margin < 1.0:
+        data = data.filter(
+            pl.int_range(pl.len()) < (pl.len() * data_margin).cast(pl.Int64)
+        )
+    height = n_rows(all_data)
+    reformat = stage(
+        "reformat", rows_in=None if height is None else int(height * data_margin)
+    )
 
+    schema = data.collect_schema()
+    comparisons = [pl.LazyFrame(schema=DETAIL_SCHEMA)]
+    for column_1, column_2 in pairs:
         # Handle if the combo is a self comparison
-        if row[0] == row[1]:
-            detail_df = pl.concat(
-                [
-                    detail_df,
-                    pl.DataFrame(
-                        {
-                            "Column 1": [row[0]],
-                            "Column 2": [row[1]],
-                            "comparison_type": ["same-same"],
-                            "x_data": [None],
-                            "y_data": [None],
-                        }
-                    ),
-                ],
-                how="vertical_relaxed",
+        if column_1 == column_2:
+            comparisons.append(
+                pl.LazyFrame(
+                    {
+                        "Column 1": [column_1],
+                        "Column 2": [column_2],
+                        "comparison_type": ["same-same"],
+                        "x_data": [None],
+                        "y_data": [None],
+                    },
+                    schema=DETAIL_SCHEMA,
+                )
             )
-        else:
-            for i in range(len(all_data)):
-                if cat1_data[i] is not None and cat2_data[i] is not None:
-                    # Determine the comparison type
-                    comparison_type = ""
-                    if cat1_data.dtype == pl.String:
-                        comparison_type = "cat-" + comparison_type
-                    elif cat1_data.dtype == pl.Int64 or cat1_data.dtype == pl.Float64:
-                        comparison_type = "num-" + comparison_type
-
-                    if cat2_data.dtype == pl.String:
-                        comparison_type += "cat"
-                    elif cat2_data.dtype == pl.Int64 or cat1_data.dtype == pl.Float64:
-                        comparison_type += "num"
-
-                    # Add the data to the resulting data frame
-                    detail_df = pl.concat(
-                        [
-                            detail_df,
-                            pl.DataFrame(
-                                {
-                                    "Column 1": [row[0]],
-                                    "Column 2": [row[1]],
-                                    "comparison_type": [comparison_type],
-                                    "x_data": [cat1_data[i]],
-                                    "y_data": [cat2_data[i]],
-                                }
-                            ),
-                        ],
-                        how="vertical_relaxed",
-                    )
-
-    return (
-        # Make all self-comparisons have a score of 0 in heatmap_df
-        heatmap_df.with_columns(
-            pl.when(pl.col("Column 1") == pl.col("Column 2"))
-            .then(pl.lit(1.0))
-            .otherwise(pl.col("Score"))
-            .alias("Score")
-        ),
-        detail_df,
+            continue
+        comparison_type = (
+            f"{_variable_kind(schema[column_1])}-{_variable_kind(schema[column_2])}"
+        )
+        comparisons.append(
+            data.select(
+                pl.lit(column_1).alias("Column 1"),
+                pl.lit(column_2).alias("Column 2"),
+                pl.lit(comparison_type).alias("comparison_type"),
+                pl.col(column_1).cast(pl.String).alias("x_data"),
+                pl.col(column_2).cast(pl.String).alias("y_data"),
+            ).drop_nulls(["x_data", "y_data"])
+        )
+    detail_df = collect(pl.concat(comparisons))
+
+    reformat.rows_out = detail_df.height
+    if key is not None:
+        stage("cache", rows_in=detail_df.height)
+        cache.put(key, detail_df)
+        # Continue from the mapped file, releasing the table built in memory.
+        mapped = cache.get(key)
+        if mapped is not None:
+            detail_df = mapped
+    return _self_scores(heatmap_df), detail_df
+
+
+def _self_scores(heatmap_df: pl.DataFrame) -> pl.DataFrame:
+    "Make all self-comparisons have a score of 1 in heatmap_df."
+    return heatmap_df.with_columns(
+        pl.when(pl.col("Column 1") == pl.col("Column 2"))
+        .then(pl.lit(1.0))
+        .otherwise(pl.col("Score"))
+        .alias("Score")
     )
@@ -1,7 +1,14 @@
 import altair as alt
 import polars as pl
 
+from ._frames import compact
+from .config import get_config
+from .instrument import stage, traced
+from .pre_transform import PreTransformedChart, finish_chart
+from .spec import Spec, dataset_name
 
+
+@traced
 def plot_lines(
     data: dict[str, list[float]],
     x_title: str = "Step",
@@ -9,7 +16,8 @@ def plot_lines(
     width: int = 500,
     height: int = 300,
     y_scale: str | None = None,
-) -> alt.Chart:
+    pre_transform: bool | None = None,
+) -> alt.Chart | PreTransformedChart | Spec:
     """Plot multiple lines on a single chart.
 
     Args:
@@ -21,6 +29,8 @@ def plot_lines(
         height: Chart height in pixels.
         y_scale: Scale type for y-axis (e.g., "log", "sqrt", "symlog").
             If None, uses linear scale.
+        pre_transform: Whether to evaluate the data transforms with VegaFusion and
+            return a PreTransformedChart. Defaults to the package-wide option.
 
     Returns:
         Altair Chart with one line per series.
@@ -32,16 +42,48 @@ def plot_lines(
     if len(set(lengths)) != 1:
         raise ValueError("All series must have the same length")
 
+    prepare = stage("prepare")
     n_steps = lengths[0]
     series_names = list(data.keys())
 
-    df = pl.DataFrame(
-        {
-            "x": list(range(n_steps)) * len(series_names),
-            "y": [v for series in series_names for v in data[series]],
-            "series": [name for name in series_names for _ in range(n_steps)],
-        }
+    df = compact(
+        pl.DataFrame(
+            {
+                "x": list(range(n_steps)) * len(series_names),
+                "y": [v for series in series_names for v in data[series]],
+                "series": [name for name in series_names for _ in range(n_steps)],
+            }
+        )
     )
+    prepare.rows_out = df.height
+
+    stage("build", rows_in=df.height)
+    if get_config().backend == "spec":
+        name = dataset_name(df)
+        y = {"field": "y", "title": y_title, "type": "quantitative"}
+        if y_scale:
+            y["scale"] = {"type": y_scale}
+        spec = {
+            "data": {"name": name},
+            "mark": {"type": "line"},
+            "encoding": {
+                "color": {
+                    "field": "series",
+                    "legend": {"title": "Series"},
+                    "type": "nominal",
+                },
+                "x": {
+                    "axis": {"labelAngle": 0},
+                    "field": "x",
+                    "title": x_title,
+                    "type": "ordinal",
+                },
+                "y": y,
+            },
+            "height": height,
+            "width": width,
+        }
+        return finish_chart(Spec(spec, {name: df}), pre_transform)
 
     chart = (
         alt.Chart(df)
@@ -58,4 +100,4 @@ def plot_lines(
         .properties(width=width, height=height)
     )
 
-    return chart
+    return finish_chart(chart, pre_transform)
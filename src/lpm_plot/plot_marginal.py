@@ -1,9 +1,252 @@
+import json
+from collections.abc import Mapping
+
 import altair as alt
+import numpy as np
 import polars as pl
 
+from ._frames import (
+    Frame,
+    Source,
+    collect,
+    collect_all,
+    column_names,
+    compact,
+    is_lazy,
+    n_rows,
+    scan,
+)
+from .aggregation_cache import column_stats, group_counts
+from .config import get_config
+from .heavy_hitters import count_heavy_hitters
+from .instrument import stage, traced
+from .marginal_accumulator import MarginalAccumulator
+from .pre_transform import finish_chart
+from .spec import Spec, dataset_name, field_type
+
 OBSERVED_COLOR = "#000000"
 SYNTHETIC_COLOR = "#f28e2b"
 
+# Colors of the synthetic sources when several models are compared, in order.
+MODEL_COLORS = [
+    SYNTHETIC_COLOR,
+    "#4e79a7",
+    "#e15759",
+    "#76b7b2",
+    "#59a14f",
+    "#edc948",
+    "#b07aa1",
+    "#ff9da7",
+    "#9c755f",
+    "#bab0ac",
+]
+
+JITTER = {
+    # Generate Gaussian jitter with a Box-Muller transform for the categorical axis
+    "xJitter": "sqrt(-2*log(random()))*cos(2*PI*random())",
+    # Combine dataset offset with x jitter (scale jitter to 30% of offset_size)
+    "xOffsetWithJitter": "(datum.dataset == 'Observed' ? -datum.offset_size : datum.offset_size) + datum.xJitter * datum.offset_size * 0.3",
+}
+
+
+def _jitter(names: list[str]) -> dict[str, str]:
+    "Jitter calculations of `plot_marginal_numerical_categorical` for the sources."
+    if len(names) == 2:
+        return JITTER
+    # Spread the sources around each category, 2 * offset_size apart.
+    offset = f"(2 * indexof({json.dumps(names)}, datum.dataset) - {len(names) - 1})"
+    return {
+        **JITTER,
+        "xOffsetWithJitter": f"{offset} * datum.offset_size + datum.xJitter * datum.offset_size * 0.3",
+    }
+
+
+LEGEND_DATA = pl.DataFrame({"category": ["Observed", "Synthetic"], "dummy": [0, 0]})
+
+
+def _sources(observed_df, synthetic_df) -> dict[str, Source]:
+    """Label the sources of a comparison, scanning paths lazily.
+
+    `synthetic_df` is either one source, labelled "Synthetic", or a mapping of model
+    names to sources, which are compared with the observed data side by side.
+    """
+    if not isinstance(synthetic_df, Mapping):
+        return {"Observed": scan(observed_df), "Synthetic": scan(synthetic_df)}
+    if not synthetic_df:
+        raise ValueError("expected at least one synthetic source")
+    if "Observed" in synthetic_df:
+        raise ValueError('"Observed" is reserved for the observed data')
+    return {
+        "Observed": scan(observed_df),
+        **{str(name): scan(df) for name, df in synthetic_df.items()},
+    }
+
+
+def _source_scale(names: list[str]) -> dict:
+    "Color scale of the sources, the observed data first."
+    colors = [MODEL_COLORS[i % len(MODEL_COLORS)] for i in range(len(names) - 1)]
+    return {"domain": list(names), "range": [OBSERVED_COLOR, *colors]}
+
+
+def _stacked_counts(
+    sources: dict[str, Source], groupings: list[list[str]], label: str
+) -> list[pl.DataFrame]:
+    """Row counts of every source per grouping, with the source in a `label` column.
+
+    Frames are stacked into one query keyed by an Enum of the source names, each
+    grouping is counted in a single `group_by` over the stack, and the groupings are
+    collected together, so that every source is scanned once however many there are.
+    Other sources of counts, such as a `MarginalAccumulator`, serve their own.
+    """
+    key = pl.Enum(list(sources))
+    columns = list(dict.fromkeys(c for grouping in groupings for c in grouping))
+    frames = {
+        name: df
+        for name, df in sources.items()
+        if isinstance(df, (pl.DataFrame, pl.LazyFrame))
+    }
+    tables = [[] for _ in groupings]
+    if frames:
+
+        def plain(df: Frame) -> list[pl.Expr]:
+            # Categoricals of different frames do not share their encodings.
+            schema = df.collect_schema() if isinstance(df, pl.LazyFrame) else df.schema
+            return [
+                pl.col(column).cast(pl.String)
+                if isinstance(schema[column], (pl.Categorical, pl.Enum))
+                else pl.col(column)
+                for column in columns
+            ]
+
+        stack = pl.concat(
+            [
+                df.lazy().select(pl.lit(name, dtype=key).alias(label), *plain(df))
+                for name, df in frames.items()
+            ],
+            how="vertical_relaxed",
+        )
+        counted = collect_all(
+            [
+                stack.group_by(label, *dict.fromkeys(grouping)).agg(
+                    pl.len().alias("count")
+                )
+                for grouping in groupings
+            ]
+        )
+        for table, counts in zip(tables, counted):
+            table.append(counts)
+    for name, df in sources.items():
+        if name not in frames:
+            for table, grouping, counts in zip(
+                tables, groupings, group_counts(df, groupings)
+            ):
+                table.append(
+                    counts.select(
+                        pl.lit(name, dtype=key).alias(label), *grouping, "count"
+                    )
+                )
+    return [
+        pl.concat(
+            [counts.with_columns(pl.col("count").cast(pl.Int64)) for counts in table],
+            how="vertical_relaxed",
+        )
+        .sort(label, *grouping)
+        .with_columns(pl.col(label).cast(pl.String))
+        for table, grouping in zip(tables, groupings)
+    ]
+
+
+def _bin_edges(sources, columns: list[str]) -> dict[str, np.ndarray]:
+    "Histogram edges of the `columns` binned by a `MarginalAccumulator` of `sources`."
+    edges = {}
+    for df in sources:
+        if isinstance(df, MarginalAccumulator):
+            for column, column_edges in df.edges.items():
+                edges.setdefault(column, column_edges)
+    return {column: edges[column] for column in columns if column in edges}
+
+
+def _histogram_query(df: Frame, column: str, edges: np.ndarray) -> pl.LazyFrame:
+    "Lazy counts of `column` of `df` per bin of `edges`, with `numpy.histogram` bins."
+    bins = pl.LazyFrame(
+        {"bin": range(len(edges) - 1), "bin_start": edges[:-1], "bin_end": edges[1:]},
+        schema_overrides={"bin": pl.UInt32},
+    )
+    # The bins are closed on the left, and the last one on the right too.
+    counts = (
+        df.lazy()
+        .select(pl.col(column).cast(pl.Float64))
+        .filter(pl.col(column).is_between(edges[0], edges[-1]))
+        .group_by(
+            pl.col(column)
+            .cut(
+                list(edges[1:-1]),
+                labels=[str(i) for i in range(len(edges) - 1)],
+                left_closed=True,
+            )
+            .cast(pl.String)
+            .cast(pl.UInt32)
+            .alias("bin")
+        )
+        .agg(pl.len().alias("count"))
+    )
+    return (
+        bins.join(counts, on="bin", how="left")
+        .sort("bin")
+        .select("bin_start", "bin_end", pl.col("count").fill_null(0))
+    )
+
+
+def _histograms(df: Source, edges: dict[str, np.ndarray]) -> dict[str, pl.DataFrame]:
+    """Counts of each column of `edges` per histogram bin, in one pass over `df`.
+
+    Bins are given by their "bin_start" and "bin_end", as for `numpy.histogram` and
+    `MarginalAccumulator.histogram`; null, NaN and out-of-range values are not
+    counted.
+    """
+    if isinstance(df, MarginalAccumulator):
+        histograms = {}
+        for column, column_edges in edges.items():
+            if not np.array_equal(df.edges.get(column, []), column_edges):
+                raise ValueError(
+                    f"column {column!r} is not binned over the same edges by every "
+                    "accumulator"
+                )
+            histograms[column] = df.histogram(column)
+    else:
+        queries = [_histogram_query(df, column, edges[column]) for column in edges]
+        histograms = dict(zip(edges, collect_all(queries)))
+    return {
+        column: histogram.select("bin_start", "bin_end", pl.col("count").cast(pl.Int64))
+        for column, histogram in histograms.items()
+    }
+
+
+def _bars(column: str, binned: bool, count_scale=alt.Undefined) -> dict:
+    """Encoding of the count bars of `column`, as binned bars if `binned`.
+
+    Counts of values are horizontal bars; counts of histogram bins are vertical bars
+    spanning their bin.
+    """
+    if binned:
+        return {
+            "x": alt.X("bin_start:Q", bin="binned", title=column),
+            "x2": alt.X2("bin_end"),
+            "y": alt.Y("count:Q", scale=count_scale),
+        }
+    return {
+        "x": alt.X("count:Q", scale=count_scale, axis=alt.Axis(orient="top")),
+        "y": alt.Y(
+            f"{column}:N",
+            axis=alt.Axis(
+                titleAnchor="start",
+                titleAlign="right",
+                titlePadding=1,
+                titleAngle=0,
+            ),
+        ),
+    }
+
 
 def get_max_frequency(column, data):
     "Calculate the maximum frequency value for a given column. This is used to align the axes of the comparison plots."
@@ -16,29 +259,77 @@ def get_max_frequency(column, data):
     return result.select(pl.max("max_count")).item()
 
 
-def plot_marginal_1d(observed_df, synthetic_df, columns):
-    "Plot 1D marginal plots for a given list of columns."
+@traced
+def plot_marginal_1d(
+    observed_df, synthetic_df, columns, pre_transform=None, top_k=None
+):
+    """Plot 1D marginal plots for a given list of columns.
+
+    The observed and synthetic data can be DataFrames, LazyFrames, paths or globs of
+    Parquet or Arrow IPC files, which are scanned lazily, or `MarginalAccumulator`s
+    tracking the columns. Columns an accumulator bins over histogram edges are plotted
+    as binned bars, every source being counted over the same edges.
+
+    To compare several models, `synthetic_df` can be a mapping of model names to their
+    data. All sources are then counted together in one pass, in which the observed
+    data is scanned once, and each column is plotted as a row of bar charts, one per
+    source, sharing their scales.
+
+    With `top_k`, the values of columns with too many distinct values to count exactly
+    are counted approximately in fixed memory (see `HeavyHitters`), and only the `top_k`
+    most frequent values of each source are plotted. The title of each plot reports
+    the estimated number of distinct values and the largest overestimate of the
+    plotted counts.
+    """
     assert len(columns) > 0.0
+    if isinstance(synthetic_df, Mapping):
+        if top_k is not None:
+            raise ValueError("top_k compares a single synthetic source")
+        return _plot_marginal_1d_models(
+            _sources(observed_df, synthetic_df), columns, pre_transform
+        )
+    observed_df, synthetic_df = scan(observed_df), scan(synthetic_df)
+    observed_columns = set(column_names(observed_df))
+    synthetic_columns = set(column_names(synthetic_df))
     for c in columns:
-        assert c in observed_df.columns, "column not in observed data"
-        assert c in synthetic_df.columns, "column not in synthetic data"
+        assert c in observed_columns, "column not in observed data"
+        assert c in synthetic_columns, "column not in synthetic data"
 
-    observed_df = observed_df[columns].with_columns(
-        pl.lit("observed").alias("data_source")
-    )
-    synthetic_df = synthetic_df[columns].with_columns(
-        pl.lit("synthetic").alias("data_source")
+    aggregate = stage("aggregate", rows_in=n_rows(observed_df, synthetic_df))
+    titles = None
+    edges = {}
+    if top_k is not None:
+        counts, titles = _top_counts(observed_df, synthetic_df, columns, top_k)
+    else:
+        # Count each column once per source; the counts are shared with other
+        # marginal plots through the aggregation cache when it is enabled. Columns
+        # binned by an accumulator are counted per bin in every source.
+        edges = _bin_edges([observed_df, synthetic_df], columns)
+        counted = [column for column in columns if column not in edges]
+        groupings = [[column] for column in counted]
+        counts = {}
+        for source, df in (("observed", observed_df), ("synthetic", synthetic_df)):
+            counts[source] = dict(zip(counted, group_counts(df, groupings)))
+            if edges:
+                counts[source].update(_histograms(df, edges))
+    aggregate.rows_out = sum(
+        df.height for source in counts.values() for df in source.values()
     )
 
-    data = pl.concat([observed_df, synthetic_df])
+    stage("build")
+    counts_dfs = {
+        column: _counts_frame(
+            counts, column, "bin_start" if column in edges else column
+        )
+        for column in columns
+    }
+    if get_config().backend == "spec":
+        return finish_chart(
+            _marginal_1d_spec(counts_dfs, titles, set(edges)), pre_transform
+        )
 
     # Issue: Altair doesn't allow me to add a custom legend, using this dummy data workaround.
-    dummy_data_for_legend = pl.DataFrame(
-        {
-            "category": ["Observed", "Synthetic"],
-            "dummy": [0, 0],
-        }
-    )
+    dummy_data_for_legend = LEGEND_DATA
 
     # Create an empty plot with a legend and no visible marks
     legend = (
@@ -57,114 +348,235 @@ def plot_marginal_1d(observed_df, synthetic_df, columns):
     )
 
     # Creating the charts for observed and synthetic collections
-    def create_comparison(column, data):
-        max_count = get_max_frequency(column, data)
-
-        # Pre-aggregate data in Polars to avoid VegaFusion type casting issues
-        # Filter and aggregate observed data
-        observed_agg = (
-            data.filter(pl.col("data_source") == "observed")
-            .filter(pl.col(column).is_not_null())
-            .group_by(column)
-            .agg(pl.len().alias("count"))
-            .with_columns(pl.lit("observed").alias("data_source"))
-        )
-
-        # Filter and aggregate synthetic data
-        synthetic_agg = (
-            data.filter(pl.col("data_source") == "synthetic")
-            .filter(pl.col(column).is_not_null())
-            .group_by(column)
-            .agg(pl.len().alias("count"))
-            .with_columns(pl.lit("synthetic").alias("data_source"))
-        )
+    def create_comparison(column):
+        counts_df = counts_dfs[column]
+        # Align the count axes of the observed and synthetic plots.
+        max_count = counts_df["count"].max() or 0
 
         # Create charts with pre-aggregated data
         chart_observed = (
-            alt.Chart(observed_agg)
+            alt.Chart(counts_df)
+            .transform_filter(alt.datum.data_source == "observed")
             .mark_bar(color=OBSERVED_COLOR)
             .encode(
-                x=alt.X(
-                    "count:Q",
-                    scale=alt.Scale(domain=[0, max_count]),
-                    axis=alt.Axis(orient="top"),
-                ),
-                y=alt.Y(
-                    f"{column}:N",
-                    axis=alt.Axis(
-                        titleAnchor="start",
-                        titleAlign="right",
-                        titlePadding=1,
-                        titleAngle=0,
-                    ),
-                ),
+                **_bars(column, column in edges, alt.Scale(domain=[0, max_count])),
                 color=alt.value(OBSERVED_COLOR),
             )
             .properties(width=300, height=200)
         )
 
         chart_synthetic = (
-            alt.Chart(synthetic_agg)
+            alt.Chart(counts_df)
+            .transform_filter(alt.datum.data_source == "synthetic")
             .mark_bar(color=SYNTHETIC_COLOR)
             .encode(
-                x=alt.X(
-                    "count:Q",
-                    scale=alt.Scale(domain=[0, max_count]),
-                    axis=alt.Axis(orient="top"),
-                ),
-                y=alt.Y(
-                    f"{column}:N",
-                    axis=alt.Axis(
-                        titleAnchor="start",
-                        titleAlign="right",
-                        titlePadding=1,
-                        titleAngle=0,
-                    ),
-                ),
+                **_bars(column, column in edges, alt.Scale(domain=[0, max_count])),
                 color=alt.value(SYNTHETIC_COLOR),
             )
             .properties(width=300, height=200)
         )
+        if titles is not None:
+            chart_observed = chart_observed.properties(title=titles[column]["observed"])
+            chart_synthetic = chart_synthetic.properties(
+                title=titles[column]["synthetic"]
+            )
         return alt.hconcat(chart_observed, chart_synthetic)
 
-    one_d_plots = [create_comparison(column, data) for column in columns]
+    one_d_plots = [create_comparison(column) for column in columns]
     combined_chart = (
         alt.vconcat(*one_d_plots, legend)
         .resolve_scale(color="independent")
         .properties(title="1-D Marginals")
     )
-    return combined_chart
+    return finish_chart(combined_chart, pre_transform)
+
+
+def _plot_marginal_1d_models(sources, columns, pre_transform):
+    "`plot_marginal_1d` with several synthetic sources, faceted by source."
+    for name, df in sources.items():
+        names = set(column_names(df))
+        for c in columns:
+            assert c in names, f"column not in {name} data"
+
+    aggregate = stage("aggregate", rows_in=n_rows(*sources.values()))
+    edges = _bin_edges(sources.values(), columns)
+    counted = [column for column in columns if column not in edges]
+    tables = {}
+    if counted:
+        groupings = [[column] for column in counted]
+        tables = dict(zip(counted, _stacked_counts(sources, groupings, "data_source")))
+    if edges:
+        histograms = {name: _histograms(df, edges) for name, df in sources.items()}
+        for column in edges:
+            tables[column] = pl.concat(
+                [
+                    source_histograms[column].select(
+                        pl.lit(name).alias("data_source"), pl.all()
+                    )
+                    for name, source_histograms in histograms.items()
+                ]
+            )
+    tables = [tables[column] for column in columns]
+    aggregate.rows_out = sum(table.height for table in tables)
+
+    stage("build")
+    names = list(sources)
+    counts_dfs = {
+        column: compact(
+            table if column in edges else table.filter(pl.col(column).is_not_null())
+        )
+        for column, table in zip(columns, tables)
+    }
+    if get_config().backend == "spec":
+        return finish_chart(
+            _marginal_1d_models_spec(counts_dfs, names, set(edges)), pre_transform
+        )
+
+    def create_comparison(column):
+        return (
+            alt.Chart(counts_dfs[column])
+            .mark_bar()
+            .encode(
+                **_bars(column, column in edges),
+                color=alt.Color(
+                    "data_source:N",
+                    scale=alt.Scale(**_source_scale(names)),
+                    legend=alt.Legend(title="Legend", symbolStrokeWidth=4),
+                ),
+            )
+            .properties(width=300, height=200)
+            # Facets share their scales, so the counts of all sources line up.
+            .facet(column=alt.Facet("data_source:N", sort=names, title=None))
+        )
+
+    chart = alt.vconcat(*[create_comparison(column) for column in columns])
+    return finish_chart(chart.properties(title="1-D Marginals"), pre_transform)
+
+
+def _top_counts(observed_df, synthetic_df, columns, top_k):
+    """Approximate counts of the `top_k` most frequent values of each source.
+
+    Both sources are counted for the union of their most frequent values, so that the
+    two sides of a comparison plot the same values.
+
+    Returns:
+        The counts of each column per source, as from `group_counts`, and the title of
+        each plot, reporting the error of its counts.
+    """
+    capacity = max(1000, 10 * top_k)
+    sketches = {
+        "observed": count_heavy_hitters(observed_df, columns, capacity=capacity),
+        "synthetic": count_heavy_hitters(synthetic_df, columns, capacity=capacity),
+    }
+    counts = {source: {} for source in sketches}
+    titles = {}
+    for column in columns:
+        values = pl.concat(
+            [
+                sketches[source][column].top(top_k).select("value")
+                for source in sketches
+            ],
+            how="vertical_relaxed",
+        )["value"]
+        titles[column] = {}
+        for source, source_sketches in sketches.items():
+            sketch = source_sketches[column]
+            estimates = sketch.estimate(values)
+            counts[source][column] = estimates.select(
+                pl.col("value").alias(column), "count"
+            )
+            titles[column][source] = (
+                f"Top {top_k} of ~{sketch.distinct():,.0f} values, "
+                f"counts overestimated by at most {estimates['error'].max() or 0:,}"
+            )
+    return counts, titles
+
+
+def _counts_frame(counts, column, field):
+    """Stack the counts of `column` in both sources with a "data_source" label.
+
+    The counts are keyed by `field`: the column itself, or the "bin_start" of the
+    histogram bins of a binned column.
+
+    The data is pre-aggregated in Polars to avoid VegaFusion type casting issues.
+    Sorting keeps the inlined data, and so the spec, independent of the group order.
+    Both sources are stacked into one dataset, which each side of the comparison
+    filters.
+    """
+    return compact(
+        pl.concat(
+            [
+                counts[source][column]
+                .filter(pl.col(field).is_not_null())
+                .sort(field)
+                .with_columns(pl.lit(source).alias("data_source"))
+                for source in ("observed", "synthetic")
+            ],
+            how="vertical_relaxed",
+        )
+    )
 
 
-def prepare_2d_marginal_data(observed_df, synthetic_df, x, y):
+@traced
+def prepare_2d_marginal_data(observed_df, synthetic_df, x, y, top_k=None):
     """
     Prepare data for 2D marginal plotting by calculating normalized frequencies.
 
     Args:
-        observed_df (pl.DataFrame): Observed data
-        synthetic_df (pl.DataFrame): Synthetic data
+        observed_df (pl.DataFrame | pl.LazyFrame | str): Observed data, or a path or glob of
+            Parquet or Arrow IPC files to scan
+        synthetic_df (pl.DataFrame | pl.LazyFrame | str | Mapping): Synthetic data, or a path or
+            glob of Parquet or Arrow IPC files to scan. Either source can also be a
+            `MarginalAccumulator` tracking the (x, y) pair. A mapping of model names to data
+            compares several models, counted together in one pass over the stacked sources, and
+            labelled by their names in the "Source" column.
         x (str): First categorical column name
         y (str): Second categorical column name
+        top_k (int, optional): If set, count the (x, y) pairs approximately in fixed memory
+            (see `HeavyHitters`) and only keep the `top_k` most frequent pairs of each source,
+            for columns with too many distinct pairs to count exactly. The result then has an
+            "error" column bounding the overestimate of each count.
 
     Returns:
         pl.DataFrame: Combined dataframe with Source and Normalized frequency columns
     """
-    # Ensure both dataframes have the same column order
-    columns = [x, y]
-    observed_subset = observed_df.select(columns)
-    synthetic_subset = synthetic_df.select(columns)
-
-    observed_labeled = observed_subset.with_columns(pl.lit("Observed").alias("Source"))
-    synthetic_labeled = synthetic_subset.with_columns(
-        pl.lit("Synthetic").alias("Source")
-    )
-
-    combined = pl.concat([observed_labeled, synthetic_labeled])
+    if isinstance(synthetic_df, Mapping):
+        if top_k is not None:
+            raise ValueError("top_k compares a single synthetic source")
+        sources = _sources(observed_df, synthetic_df)
+        aggregate = stage("aggregate", rows_in=n_rows(*sources.values()))
+        result = _normalize_counts(
+            _stacked_counts(sources, [[x, y]], "Source")[0], x, y
+        )
+        aggregate.rows_out = result.height
+        return result
 
-    freq_data = combined.group_by(["Source", x, y]).agg(
-        pl.count().cast(pl.Int64).alias("count")
+    observed_df, synthetic_df = scan(observed_df), scan(synthetic_df)
+    aggregate = stage("aggregate", rows_in=n_rows(observed_df, synthetic_df))
+    if top_k is not None:
+        result = _top_pairs(observed_df, synthetic_df, x, y, top_k)
+        aggregate.rows_out = result.height
+        return result
+    # Count per source, then label; the counts are shared with other marginal plots
+    # through the aggregation cache when it is enabled.
+    freq_data = pl.concat(
+        [
+            group_counts(df, [[x, y]])[0].select(
+                pl.lit(source).alias("Source"),
+                pl.col(x),
+                pl.col(y),
+                pl.col("count").cast(pl.Int64),
+            )
+            for source, df in [("Observed", observed_df), ("Synthetic", synthetic_df)]
+        ]
     )
+    result = _normalize_counts(freq_data, x, y)
+    aggregate.rows_out = result.height
+    return result
 
+
+def _normalize_counts(freq_data, x, y):
+    "Divide the counts of each source by its number of rows."
     total_counts = freq_data.group_by("Source").agg(
         pl.sum("count").cast(pl.Int64).alias("total_count")
     )
@@ -178,12 +590,44 @@ def prepare_2d_marginal_data(observed_df, synthetic_df, x, y):
             ).alias("Normalized frequency")
         )
         .drop("total_count")
+        # Sorted so that the inlined data does not depend on the group order.
+        .sort("Source", x, y)
     )
-
     return result
 
 
-def plot_marginal_2d(combined_df, x, y, hm_order=None, cmap="oranges"):
+def _top_pairs(observed_df, synthetic_df, x, y, top_k):
+    "Approximate normalized frequencies of the `top_k` most frequent pairs per source."
+    pair = (x, y)
+    capacity = max(1000, 10 * top_k)
+    sketches = {
+        "Observed": count_heavy_hitters(observed_df, [pair], capacity=capacity)[pair],
+        "Synthetic": count_heavy_hitters(synthetic_df, [pair], capacity=capacity)[pair],
+    }
+    values = pl.concat(
+        [sketch.top(top_k).select("value") for sketch in sketches.values()],
+        how="vertical_relaxed",
+    )["value"]
+    frames = []
+    for source, sketch in sketches.items():
+        estimates = sketch.estimate(values)
+        frames.append(
+            estimates.select(
+                pl.lit(source).alias("Source"),
+                pl.col("value").struct.field(x),
+                pl.col("value").struct.field(y),
+                "count",
+                (pl.col("count") / max(sketch.count, 1)).alias("Normalized frequency"),
+                "error",
+            )
+        )
+    return pl.concat(frames, how="vertical_relaxed").sort("Source", x, y)
+
+
+@traced
+def plot_marginal_2d(
+    combined_df, x, y, hm_order=None, cmap="oranges", pre_transform=None
+):
     """
     Plots 2D marginal heatmaps of normalized frequencies to compare relationships between categorical variables in different dataset sources (e.g. observed and synthetic).
 
@@ -193,30 +637,47 @@ def plot_marginal_2d(combined_df, x, y, hm_order=None, cmap="oranges"):
     color intensity indicates the frequency.
 
     Args:
-        combined_df (pl.DataFrame): A Polars DataFrame containing the combined data from different sources.
+        combined_df (pl.DataFrame | pl.LazyFrame | str): A Polars DataFrame containing the combined data from different sources.
             It must contain the columns specified by `x`, `y`, and a "Source" column, as well as a
             "Normalized frequency" column with the normalized frequencies pre-calculated (can use prepare_2d_marginal_data for this).
+            Only these columns are collected and inlined in the chart. A path or glob of Parquet or
+            Arrow IPC files is scanned lazily.
         x (str): The name of the first categorical column (horizontal axis of the heatmap).
         y (str): The name of the second categorical column (vertical axis of the heatmap).
         hm_order (list of str, optional): A custom order for the sources for the plot.
         cmap (str, optional): The color map to be used for the heatmap. Defaults to "oranges". Can be
             any valid Altair color scheme (e.g., "blues", "reds").
+        pre_transform (bool, optional): Whether to evaluate the data transforms with VegaFusion
+            and return a PreTransformedChart. Defaults to the package-wide option.
 
     Returns:
         alt.Chart: An Altair chart object containing the concatenated heatmaps, one for each source.
     """
+    combined_df = compact(
+        collect(
+            scan(combined_df)
+            .lazy()
+            .select(*dict.fromkeys([x, y]), "Source", "Normalized frequency")
+        )
+    )
+
+    stage("build", rows_in=combined_df.height)
     # Check if users wanted to order the datasources.
     if hm_order is None:
         order = sorted(combined_df["Source"].unique().to_list())
     else:
         order = hm_order
+    if get_config().backend == "spec":
+        return finish_chart(
+            _marginal_2d_spec(combined_df, x, y, order, cmap), pre_transform
+        )
 
-    # Pre-filter data in Polars for each source to avoid VegaFusion type casting issues
+    # All sources share one dataset, which each heatmap filters.
     heatmaps = []
     for source in order:
-        source_df = combined_df.filter(pl.col("Source") == source)
         heatmap = (
-            alt.Chart(source_df)
+            alt.Chart(combined_df)
+            .transform_filter(alt.datum.Source == source)
             .mark_rect()
             .encode(
                 x=alt.X(f"{x}:N", title=f"{x}"),
@@ -226,33 +687,79 @@ def plot_marginal_2d(combined_df, x, y, hm_order=None, cmap="oranges"):
                     scale=alt.Scale(scheme=cmap),
                     title="Normalized Count",
                 ),
-                tooltip=[x, y, "Normalized frequency:Q"],
+                tooltip=[
+                    alt.Tooltip(x, type=field_type(combined_df.schema[x])),
+                    alt.Tooltip(y, type=field_type(combined_df.schema[y])),
+                    "Normalized frequency:Q",
+                ],
             )
             .properties(width=400, height=400, title=source)
         )
         heatmaps.append(heatmap)
 
     combined_heatmap = alt.hconcat(*heatmaps).resolve_scale(color="shared")
-    return combined_heatmap
+    return finish_chart(combined_heatmap, pre_transform)
+
+
+def _combine(sources, x, y):
+    """Stack the `x` and `y` columns of the sources with a "dataset" label.
+
+    Only the plotted columns are kept, so LazyFrames are scanned with their projection
+    pushed down and only those columns are inlined in the chart.
+    """
+    return collect(
+        pl.concat(
+            [
+                df.lazy().select(*dict.fromkeys([x, y]), pl.lit(label).alias("dataset"))
+                for label, df in sources.items()
+            ],
+            how="vertical_relaxed",
+        )
+    )
+
+
+def _fill_domain(domain, sources, combined_df, column):
+    """Replace the None bounds of `domain` with the range of `column` in the sources.
+
+    DataFrames go through the aggregation cache. LazyFrames have already been collected
+    into `combined_df`, so the range is read from there rather than running their
+    queries again.
+    """
+    if is_lazy(*sources.values()):
+        series = combined_df.get_column(column)
+        low, high = series.min(), series.max()
+    else:
+        stats = [column_stats(df, column) for df in sources.values()]
+        low = min(s["min"] for s in stats)
+        high = max(s["max"] for s in stats)
+    return [
+        low if domain[0] is None else domain[0],
+        high if domain[1] is None else domain[1],
+    ]
 
 
+@traced
 def plot_marginal_numerical_numerical(
-    observed_df: pl.DataFrame,
-    synthetic_df: pl.DataFrame,
+    observed_df: Source,
+    synthetic_df: Source,
     x: str,
     y: str,
     x_domain: tuple[float | None, float | None] = [None, None],
     y_domain: tuple[float | None, float | None] = [None, None],
+    pre_transform: bool | None = None,
 ):
     """
     Plots 2D marginal scatter plot comparing numerical observed and synthetic data
     which are displayed black and orange respectively.
 
     Args:
-        observed_df : pl.DataFrame
-            A Polars DataFrame containing the observed data and it must contain the columns specified by `x`, `y`
-        synthetic_df : pl.DataFrame
-            A Polars DataFrame containing the synthetic data and it must contain the columns specified by `x`, `y`
+        observed_df : pl.DataFrame | pl.LazyFrame | str
+            A Polars DataFrame containing the observed data and it must contain the columns specified by `x`, `y`.
+            Only these columns are collected and inlined in the chart. A path or glob of Parquet or Arrow IPC
+            files is scanned lazily.
+        synthetic_df : pl.DataFrame | pl.LazyFrame | str | Mapping
+            A Polars DataFrame containing the synthetic data and it must contain the columns specified by `x`, `y`.
+            A mapping of model names to data compares several models, each in its own color.
         x : str
             The name of the first numerical column (horizontal axis of the plot).
         y : str
@@ -263,86 +770,84 @@ def plot_marginal_numerical_numerical(
         y_domain : tuple[float | None, float | None], optional
             The domain of the y-axis and defaults to min and max of data. If None is provided instead of a min
             or a max, then the program will default to using the min or max of the data respectively.
+        pre_transform : bool, optional
+            Whether to evaluate the data transforms with VegaFusion and return a PreTransformedChart.
+            Defaults to the package-wide option.
 
     Returns:
         alt.Chart: An Altair chart object containing the scatter plot.
     """
-    x_domain = [
-        (
-            min(observed_df[x].min(), synthetic_df[x].min())
-            if x_domain[0] is None
-            else x_domain[0]
-        ),
-        (
-            max(observed_df[x].max(), synthetic_df[x].max())
-            if x_domain[1] is None
-            else x_domain[1]
-        ),
-    ]
-    y_domain = [
-        (
-            min(observed_df[y].min(), synthetic_df[y].min())
-            if y_domain[0] is None
-            else y_domain[0]
-        ),
-        (
-            max(observed_df[y].max(), synthetic_df[y].max())
-            if y_domain[1] is None
-            else y_domain[1]
-        ),
-    ]
-
+    sources = _sources(observed_df, synthetic_df)
+    combine = stage("combine", rows_in=n_rows(*sources.values()))
     # Make a combined data frame with a new dataset column specifying if the data is observed or synthetic
-    observed_df_labeled = observed_df.with_columns(pl.lit("Observed").alias("dataset"))
-    synthetic_df_labeled = synthetic_df.with_columns(
-        pl.lit("Synthetic").alias("dataset")
-    )
-    combined_df = pl.concat([observed_df_labeled, synthetic_df_labeled], how="vertical")
+    combined_df = _combine(sources, x, y)
+    combine.rows_out = combined_df.height
+
+    stage("aggregate", rows_in=combined_df.height)
+    x_domain = _fill_domain(x_domain, sources, combined_df, x)
+    y_domain = _fill_domain(y_domain, sources, combined_df, y)
+
+    stage("build", rows_in=combined_df.height)
+    combined_df = compact(combined_df)
+    names = list(sources)
+    if get_config().backend == "spec":
+        return finish_chart(
+            _numerical_numerical_spec(combined_df, x, y, x_domain, y_domain, names),
+            pre_transform,
+        )
 
     chart = (
         alt.Chart(combined_df)
         .mark_circle(color=OBSERVED_COLOR)
         .encode(
-            x=alt.X(x, scale=alt.Scale(domain=x_domain)),
-            y=alt.Y(y, scale=alt.Scale(domain=y_domain)),
+            x=alt.X(
+                x,
+                type=field_type(combined_df.schema[x]),
+                scale=alt.Scale(domain=x_domain),
+            ),
+            y=alt.Y(
+                y,
+                type=field_type(combined_df.schema[y]),
+                scale=alt.Scale(domain=y_domain),
+            ),
             color=alt.Color(
                 "dataset:N",
-                scale=alt.Scale(
-                    domain=["Observed", "Synthetic"],
-                    range=[OBSERVED_COLOR, SYNTHETIC_COLOR],
-                ),
+                scale=alt.Scale(**_source_scale(names)),
                 legend=alt.Legend(title="Legend", symbolStrokeWidth=4),
             ),
         )
         .properties(width=500, height=500)
     )
 
-    return chart
+    return finish_chart(chart, pre_transform)
 
 
+@traced
 def plot_marginal_numerical_categorical(
-    observed_df: pl.DataFrame,
-    synthetic_df: pl.DataFrame,
+    observed_df: Source,
+    synthetic_df: Source,
     x: str,
     y: str,
     size: float = 30.0,
     y_domain: tuple[float, float] = [None, None],
     jitter: bool = False,
+    pre_transform: bool | None = None,
 ):
     """
     Plots 2D marginal box plot comparing numerical vs categorical observed and synthetic data
     which are displayed black and orange respectively.
 
     Args:
-        observed_df : pl.DataFrame
+        observed_df : pl.DataFrame | pl.LazyFrame | str
             A Polars DataFrame containing the observed data. The columns of the dataframe should be the names
             of each category of the categorical data and each column contains the numerical data pertaining to that
-            category.
-        synthetic_df : pl.DataFrame
+            category. A path or glob of Parquet or Arrow IPC files is scanned lazily.
+        synthetic_df : pl.DataFrame | pl.LazyFrame | str
             A Polars DataFrame containing the synthetix data. The columns of the dataframe should be the names
             of each category of the categorical data and each column contains the numerical data pertaining to that
             category. Must have the
-            same columns as the observed dataframe
+            same columns as the observed dataframe. A mapping of model names to data compares several models,
+            side by side within each category.
         x : str
             The name of the categorical data (horizontal axis of the plot).
         y : str
@@ -354,68 +859,314 @@ def plot_marginal_numerical_categorical(
             or a max, then the program will default to using the min or max of the data respectively.
         jitter: bool, optional
             Whether to create on the data points on the categorical axis, rather make a box plot. The default is False.
+        pre_transform : bool, optional
+            Whether to evaluate the data transforms with VegaFusion and return a PreTransformedChart.
+            Defaults to the package-wide option.
 
     Returns:
         alt.Chart: An Altair chart object containing the box plot.
     """
+    sources = _sources(observed_df, synthetic_df)
+    combine = stage("combine", rows_in=n_rows(*sources.values()))
     # Add a new column to distinguish which data set the data came from
-    observed_df_labeled = observed_df.with_columns(pl.lit("Observed").alias("dataset"))
-    synthetic_df_labeled = synthetic_df.with_columns(
-        pl.lit("Synthetic").alias("dataset")
-    )
+    combined_df = _combine(sources, x, y)
+    combine.rows_out = combined_df.height
 
-    combined_df = pl.concat([observed_df_labeled, synthetic_df_labeled])
+    stage("aggregate", rows_in=combined_df.height)
+    y_domain = _fill_domain(y_domain, sources, combined_df, y)
+    # Number of categories across the sources, used to size the plot.
+    if is_lazy(*sources.values()):
+        n_categories = combined_df.get_column(x).n_unique()
+    else:
+        n_categories = pl.concat(
+            [group_counts(df, [[x]])[0].get_column(x) for df in sources.values()]
+        ).n_unique()
 
-    y_domain = [
-        combined_df[y].min() if y_domain[0] is None else y_domain[0],
-        combined_df[y].max() if y_domain[1] is None else y_domain[1],
-    ]
+    stage("build", rows_in=combined_df.height)
     if jitter:
         combined_df = combined_df.with_columns(pl.lit(size).alias("offset_size"))
-        return (
+    combined_df = compact(combined_df)
+    names = list(sources)
+    # Boxes of the sources are spread around each category, 2 * size apart.
+    offsets = [size * (2 * i - (len(names) - 1)) for i in range(len(names))]
+    width = (size * 2 * (len(names) - 1) + 50) * n_categories
+    if get_config().backend == "spec":
+        return finish_chart(
+            _numerical_categorical_spec(
+                combined_df, x, y, size, y_domain, jitter, names, offsets, width
+            ),
+            pre_transform,
+        )
+    if jitter:
+        chart = (
             alt.Chart(combined_df)
             .mark_circle(size=size)
             .encode(
                 x=alt.X(f"{x}:N", scale=alt.Scale(padding=0.5)),
                 y=alt.Y(f"{y}:Q", scale=alt.Scale(domain=y_domain)),
-                color=alt.Color(
-                    "dataset:N",
-                    scale=alt.Scale(
-                        domain=["Observed", "Synthetic"],
-                        range=[OBSERVED_COLOR, SYNTHETIC_COLOR],
-                    ),
-                ),
+                color=alt.Color("dataset:N", scale=alt.Scale(**_source_scale(names))),
                 xOffset=alt.XOffset("xOffsetWithJitter:Q"),
             )
-            .transform_calculate(
-                # Generate Gaussian jitter with a Box-Muller transform for the categorical axis
-                xJitter="sqrt(-2*log(random()))*cos(2*PI*random())",
-                # Combine dataset offset with x jitter (scale jitter to 30% of offset_size)
-                xOffsetWithJitter="(datum.dataset == 'Observed' ? -datum.offset_size : datum.offset_size) + datum.xJitter * datum.offset_size * 0.3",
-            )
-            .properties(width=(size * 2 + 50) * combined_df[x].n_unique(), height=400)
+            .transform_calculate(**_jitter(names))
+            .properties(width=width, height=400)
         )
     else:
-        return (
+        chart = (
             alt.Chart(combined_df)
             .mark_boxplot(size=size, outliers=True)
             .encode(
                 x=alt.X(f"{x}:N", scale=alt.Scale(padding=0.5)),
                 y=alt.Y(f"{y}:Q", scale=alt.Scale(domain=y_domain)),
-                color=alt.Color(
-                    "dataset:N",
-                    scale=alt.Scale(
-                        domain=["Observed", "Synthetic"],
-                        range=[OBSERVED_COLOR, SYNTHETIC_COLOR],
-                    ),
-                ),
+                color=alt.Color("dataset:N", scale=alt.Scale(**_source_scale(names))),
                 xOffset=alt.XOffset(
-                    "dataset:N",
-                    scale=alt.Scale(
-                        domain=["Observed", "Synthetic"],
-                        range=[-size, size],
-                    ),
+                    "dataset:N", scale=alt.Scale(domain=names, range=offsets)
                 ),
             )
-            .properties(width=(size * 2 + 50) * combined_df[x].n_unique(), height=400)
+            .properties(width=width, height=400)
+        )
+    return finish_chart(chart, pre_transform)
+
+
+# Templates of the charts above for the "spec" backend, which produce the same specs as
+# Altair without building chart objects.
+
+DATASET_SCALE = {
+    "domain": ["Observed", "Synthetic"],
+    "range": [OBSERVED_COLOR, SYNTHETIC_COLOR],
+}
+LEGEND = {"symbolStrokeWidth": 4, "title": "Legend"}
+
+
+def _bars_spec(column: str, binned: bool, count_scale=None) -> dict:
+    "`_bars` as a Vega-Lite encoding."
+    scale = {} if count_scale is None else {"scale": count_scale}
+    if binned:
+        return {
+            "x": {
+                "bin": "binned",
+                "field": "bin_start",
+                "title": column,
+                "type": "quantitative",
+            },
+            "x2": {"field": "bin_end"},
+            "y": {"field": "count", **scale, "type": "quantitative"},
+        }
+    return {
+        "x": {
+            "axis": {"orient": "top"},
+            "field": "count",
+            **scale,
+            "type": "quantitative",
+        },
+        "y": {
+            "axis": {
+                "titleAlign": "right",
+                "titleAnchor": "start",
+                "titleAngle": 0,
+                "titlePadding": 1,
+            },
+            "field": column,
+            "type": "nominal",
+        },
+    }
+
+
+def _marginal_1d_spec(
+    counts_dfs: dict[str, pl.DataFrame], titles=None, binned=frozenset()
+) -> Spec:
+    def bars(column, source, color, max_count):
+        title = {} if titles is None else {"title": titles[column][source]}
+        return {
+            "mark": {"type": "bar", "color": color},
+            "encoding": {
+                "color": {"value": color},
+                **_bars_spec(column, column in binned, {"domain": [0, max_count]}),
+            },
+            "height": 200,
+            **title,
+            "transform": [{"filter": f"(datum.data_source === {source!r})"}],
+            "width": 300,
+        }
+
+    datasets = {}
+    rows = []
+    for column, counts_df in counts_dfs.items():
+        name = dataset_name(counts_df)
+        datasets[name] = counts_df
+        max_count = counts_df["count"].max() or 0
+        rows.append(
+            {
+                "hconcat": [
+                    bars(column, "observed", OBSERVED_COLOR, max_count),
+                    bars(column, "synthetic", SYNTHETIC_COLOR, max_count),
+                ],
+                "data": {"name": name},
+            }
         )
+    legend_name = dataset_name(LEGEND_DATA)
+    datasets[legend_name] = LEGEND_DATA
+    legend = {
+        "data": {"name": legend_name},
+        "mark": {"type": "point", "opacity": 0, "size": 0},
+        "encoding": {
+            "color": {
+                "field": "category",
+                "legend": LEGEND,
+                "scale": DATASET_SCALE,
+                "type": "nominal",
+            }
+        },
+    }
+    return Spec(
+        {
+            "vconcat": [*rows, legend],
+            "resolve": {"scale": {"color": "independent"}},
+            "title": "1-D Marginals",
+        },
+        datasets,
+    )
+
+
+def _marginal_1d_models_spec(
+    counts_dfs: dict[str, pl.DataFrame], names, binned=frozenset()
+) -> Spec:
+    datasets = {}
+    rows = []
+    for column, counts_df in counts_dfs.items():
+        name = dataset_name(counts_df)
+        datasets[name] = counts_df
+        rows.append(
+            {
+                "data": {"name": name},
+                "facet": {
+                    "column": {
+                        "field": "data_source",
+                        "sort": names,
+                        "title": None,
+                        "type": "nominal",
+                    }
+                },
+                "spec": {
+                    "mark": {"type": "bar"},
+                    "encoding": {
+                        "color": {
+                            "field": "data_source",
+                            "legend": LEGEND,
+                            "scale": _source_scale(names),
+                            "type": "nominal",
+                        },
+                        **_bars_spec(column, column in binned),
+                    },
+                    "height": 200,
+                    "width": 300,
+                },
+            }
+        )
+    return Spec({"vconcat": rows, "title": "1-D Marginals"}, datasets)
+
+
+def _marginal_2d_spec(combined_df, x, y, order, cmap) -> Spec:
+    heatmaps = [
+        {
+            "mark": {"type": "rect"},
+            "encoding": {
+                "color": {
+                    "field": "Normalized frequency",
+                    "scale": {"scheme": cmap},
+                    "title": "Normalized Count",
+                    "type": "quantitative",
+                },
+                "tooltip": [
+                    {"field": x, "type": "nominal"},
+                    {"field": y, "type": "nominal"},
+                    {"field": "Normalized frequency", "type": "quantitative"},
+                ],
+                "x": {"field": x, "title": x, "type": "nominal"},
+                "y": {"field": y, "title": y, "type": "nominal"},
+            },
+            "height": 400,
+            "title": source,
+            "transform": [{"filter": f"(datum.Source === {source!r})"}],
+            "width": 400,
+        }
+        for source in order
+    ]
+    name = dataset_name(combined_df)
+    return Spec(
+        {
+            "hconcat": heatmaps,
+            "data": {"name": name},
+            "resolve": {"scale": {"color": "shared"}},
+        },
+        {name: combined_df},
+    )
+
+
+def _numerical_numerical_spec(combined_df, x, y, x_domain, y_domain, names) -> Spec:
+    name = dataset_name(combined_df)
+    return Spec(
+        {
+            "data": {"name": name},
+            "mark": {"type": "circle", "color": OBSERVED_COLOR},
+            "encoding": {
+                "color": {
+                    "field": "dataset",
+                    "legend": LEGEND,
+                    "scale": _source_scale(names),
+                    "type": "nominal",
+                },
+                "x": {
+                    "field": x,
+                    "scale": {"domain": x_domain},
+                    "type": field_type(combined_df.schema[x]),
+                },
+                "y": {
+                    "field": y,
+                    "scale": {"domain": y_domain},
+                    "type": field_type(combined_df.schema[y]),
+                },
+            },
+            "height": 500,
+            "width": 500,
+        },
+        {name: combined_df},
+    )
+
+
+def _numerical_categorical_spec(
+    combined_df, x, y, size, y_domain, jitter, names, offsets, width
+) -> Spec:
+    name = dataset_name(combined_df)
+    encoding = {
+        "color": {"field": "dataset", "scale": _source_scale(names), "type": "nominal"},
+        "x": {"field": x, "scale": {"padding": 0.5}, "type": "nominal"},
+        "y": {"field": y, "scale": {"domain": y_domain}, "type": "quantitative"},
+    }
+    if jitter:
+        mark = {"type": "circle", "size": size}
+        encoding["xOffset"] = {"field": "xOffsetWithJitter", "type": "quantitative"}
+        transform = {
+            "transform": [
+                {"calculate": expression, "as": field}
+                for field, expression in _jitter(names).items()
+            ]
+        }
+    else:
+        mark = {"type": "boxplot", "outliers": True, "size": size}
+        encoding["xOffset"] = {
+            "field": "dataset",
+            "scale": {"domain": names, "range": offsets},
+            "type": "nominal",
+        }
+        transform = {}
+    return Spec(
+        {
+            "data": {"name": name},
+            "mark": mark,
+            "encoding": encoding,
+            "height": 400,
+            **transform,
+            "width": width,
+        },
+        {name: combined_df},
+    )
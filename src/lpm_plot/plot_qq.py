@@ -0,0 +1,172 @@
+import altair as alt
+import numpy as np
+import polars as pl
+
+from ._frames import Source, compact
+from .config import get_config
+from .instrument import stage, traced
+from .plot_marginal import OBSERVED_COLOR, SYNTHETIC_COLOR
+from .pre_transform import finish_chart
+from .quantile_sketch import QuantileSketch, sketch_columns
+from .spec import Spec, dataset_name
+
+
+def _sketch(source: Source | QuantileSketch, column: str, k: int) -> QuantileSketch:
+    if isinstance(source, QuantileSketch):
+        return source
+    return sketch_columns(source, [column], k=k)[column]
+
+
+@traced
+def plot_qq(
+    observed_df: Source | QuantileSketch,
+    synthetic_df: Source | QuantileSketch,
+    column: str,
+    n_quantiles: int = 99,
+    difference: bool = False,
+    k: int = 200,
+    width: int = 400,
+    height: int = 400,
+    pre_transform: bool | None = None,
+):
+    """Compare the distributions of a numerical column with their quantiles.
+
+    The quantiles are estimated from streaming quantile sketches (see
+    `QuantileSketch`), so only `n_quantiles` points per source are inlined in the chart,
+    however many rows the data has.
+
+    Args:
+        observed_df: Observed data, as a DataFrame, a LazyFrame, a path or glob of
+            Parquet or Arrow IPC files, or a `QuantileSketch` of the column, e.g.
+            merged from the sketches of several partitions or processes.
+        synthetic_df: Synthetic data, in the same forms.
+        column: The numerical column to compare.
+        n_quantiles: Number of evenly spaced quantiles plotted, excluding the minimum
+            and maximum.
+        difference: Whether to plot the difference between the synthetic and observed
+            quantiles against the probability, instead of a Q-Q plot of the synthetic
+            against the observed quantiles.
+        k: Accuracy parameter of the sketches built from data.
+        width: Chart width in pixels.
+        height: Chart height in pixels.
+        pre_transform: Whether to evaluate the data transforms with VegaFusion and
+            return a PreTransformedChart. Defaults to the package-wide option.
+
+    Returns:
+        alt.LayerChart: The quantiles of the synthetic data against those of the
+        observed data, over the diagonal where they are equal; or, with `difference`,
+        their difference against the probability, over a rule at 0.
+    """
+    stage("sketch")
+    observed = _sketch(observed_df, column, k)
+    synthetic = _sketch(synthetic_df, column, k)
+
+    stage("quantiles", rows_in=observed.count + synthetic.count)
+    probabilities = np.arange(1, n_quantiles + 1) / (n_quantiles + 1)
+    observed_quantiles = observed.quantiles(probabilities)
+    synthetic_quantiles = synthetic.quantiles(probabilities)
+    df = compact(
+        pl.DataFrame(
+            {
+                "probability": probabilities,
+                "observed": observed_quantiles,
+                "synthetic": synthetic_quantiles,
+                "difference": synthetic_quantiles - observed_quantiles,
+            }
+        )
+    )
+
+    stage("build", rows_in=df.height)
+    if get_config().backend == "spec":
+        return finish_chart(
+            _qq_spec(df, column, difference, width, height), pre_transform
+        )
+
+    tooltip = [
+        alt.Tooltip("probability:Q", format=".2f"),
+        "observed:Q",
+        "synthetic:Q",
+    ]
+    base = alt.Chart(df)
+    if difference:
+        reference = base.mark_rule(color=OBSERVED_COLOR).encode(y=alt.datum(0))
+        points = base.mark_line(color=SYNTHETIC_COLOR, point=True).encode(
+            x=alt.X("probability:Q", title="Probability"),
+            y=alt.Y("difference:Q", title=f"Synthetic − observed {column} quantile"),
+            tooltip=tooltip,
+        )
+    else:
+        reference = base.mark_line(color=OBSERVED_COLOR, strokeDash=[4, 4]).encode(
+            x="observed:Q", y="observed:Q"
+        )
+        points = base.mark_point(color=SYNTHETIC_COLOR).encode(
+            x=alt.X("observed:Q", title=f"Observed {column} quantile"),
+            y=alt.Y("synthetic:Q", title=f"Synthetic {column} quantile"),
+            tooltip=tooltip,
+        )
+    chart = alt.layer(reference, points).properties(width=width, height=height)
+    return finish_chart(chart, pre_transform)
+
+
+def _qq_spec(df, column, difference, width, height) -> Spec:
+    "Template of the `plot_qq` chart for the `spec` backend."
+    tooltip = [
+        {"field": "probability", "format": ".2f", "type": "quantitative"},
+        {"field": "observed", "type": "quantitative"},
+        {"field": "synthetic", "type": "quantitative"},
+    ]
+    if difference:
+        reference = {
+            "mark": {"type": "rule", "color": OBSERVED_COLOR},
+            "encoding": {"y": {"datum": 0}},
+        }
+        points = {
+            "mark": {"type": "line", "color": SYNTHETIC_COLOR, "point": True},
+            "encoding": {
+                "tooltip": tooltip,
+                "x": {
+                    "field": "probability",
+                    "title": "Probability",
+                    "type": "quantitative",
+                },
+                "y": {
+                    "field": "difference",
+                    "title": f"Synthetic − observed {column} quantile",
+                    "type": "quantitative",
+                },
+            },
+        }
+    else:
+        reference = {
+            "mark": {"type": "line", "color": OBSERVED_COLOR, "strokeDash": [4, 4]},
+            "encoding": {
+                "x": {"field": "observed", "type": "quantitative"},
+                "y": {"field": "observed", "type": "quantitative"},
+            },
+        }
+        points = {
+            "mark": {"type": "point", "color": SYNTHETIC_COLOR},
+            "encoding": {
+                "tooltip": tooltip,
+                "x": {
+                    "field": "observed",
+                    "title": f"Observed {column} quantile",
+                    "type": "quantitative",
+                },
+                "y": {
+                    "field": "synthetic",
+                    "title": f"Synthetic {column} quantile",
+                    "type": "quantitative",
+                },
+            },
+        }
+    name = dataset_name(df)
+    return Spec(
+        {
+            "layer": [reference, points],
+            "data": {"name": name},
+            "height": height,
+            "width": width,
+        },
+        {name: df},
+    )
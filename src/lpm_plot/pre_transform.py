@@ -0,0 +1,180 @@
+import json
+import os
+
+import altair as alt
+import polars as pl
+from altair.utils.data import limit_rows, to_csv, to_json, to_values
+
+from .config import get_config
+from .instrument import stage, traced
+
+VEGA_MIMETYPE = "application/vnd.vega.v5+json"
+
+
+def transform_data(data):
+    """Convert chart data to Vega-Lite data as the options currently in effect say.
+
+    Entry points apply it to the data of their charts as they finish them (see
+    `store_chart_data`), so the options where a chart is built decide how its data is
+    stored. Altair's process-wide data transformer is never switched, so threads and
+    asyncio tasks using different `config_context`s do not affect each other or the
+    other charts of the process.
+    """
+    config = get_config()
+    data = limit_rows(data, max_rows=config.max_rows)
+    if config.data_transformer == "default":
+        return to_values(data)
+    to_file = to_json if config.data_transformer == "json" else to_csv
+    return to_file(
+        data, filename=os.path.join(config.data_dir, "{prefix}-{hash}.{extension}")
+    )
+
+
+# Attributes of Altair charts holding their subcharts.
+_SUBCHART_KEYS = ("layer", "hconcat", "vconcat", "concat", "spec")
+
+
+def _data_object(data: dict):
+    # Rather than a dict, which Altair would try to infer encoding types from.
+    return alt.InlineData(**data) if "values" in data else alt.UrlData(**data)
+
+
+def store_chart_data(chart):
+    """Replace the DataFrames of `chart` and its subcharts by their `transform_data` form.
+
+    The chart then serializes the same whatever Altair data transformer is enabled, and
+    is not subject to its row limit. A frame shared by several subcharts is converted
+    once. Other objects, such as a `Spec`, are returned as they are.
+
+    Returns:
+        The chart, updated in place.
+    """
+    stored = {}
+
+    def visit(node):
+        data = getattr(node, "data", alt.Undefined)
+        if isinstance(data, pl.DataFrame):
+            if id(data) not in stored:
+                # The frame is kept so that its id is not reused by another one.
+                stored[id(data)] = (data, _data_object(transform_data(data)))
+            node.data = stored[id(data)][1]
+        for key in _SUBCHART_KEYS:
+            children = getattr(node, key, alt.Undefined)
+            for child in children if isinstance(children, list) else [children]:
+                if isinstance(child, alt.TopLevelMixin):
+                    visit(child)
+
+    if isinstance(chart, alt.TopLevelMixin):
+        visit(chart)
+    return chart
+
+
+class PreTransformedChart:
+    """A Vega spec whose data transforms were evaluated ahead of time by VegaFusion.
+
+    Attributes:
+        spec: The pre-transformed Vega spec.
+        report: One row per inlined source dataset with the number of rows before
+            ("rows_in") and after ("rows_out") the pre-transform, and their difference
+            ("rows_cut"). Rows of every dataset derived from a source, such as
+            precomputed scale domains, are attributed to it, so "rows_cut" is negative
+            when VegaFusion inlines more rows than the source had.
+        warnings: Warnings reported by VegaFusion.
+    """
+
+    def __init__(self, spec: dict, report: pl.DataFrame, warnings: list):
+        self.spec = spec
+        self.report = report
+        self.warnings = warnings
+
+    def to_dict(self) -> dict:
+        return self.spec
+
+    def to_json(self, indent: int | None = 2) -> str:
+        return json.dumps(self.spec, indent=indent)
+
+    def _repr_mimebundle_(self, include=None, exclude=None):
+        return {VEGA_MIMETYPE: self.spec}
+
+
+def _row_report(vega_spec: dict, transformed_spec: dict) -> pl.DataFrame:
+    "Attribute the rows inlined in `transformed_spec` to the source datasets of `vega_spec`."
+    parents = {d["name"]: d.get("source") for d in vega_spec.get("data", [])}
+    rows_in = {
+        d["name"]: len(d["values"])
+        for d in vega_spec.get("data", [])
+        if isinstance(d.get("values"), list)
+    }
+
+    def root(name):
+        if name not in parents:
+            # Datasets introduced by VegaFusion are named after the dataset they derive from.
+            prefixes = [p for p in parents if name.startswith(p + "_")]
+            if not prefixes:
+                return name
+            name = max(prefixes, key=len)
+        while parents.get(name) is not None:
+            name = parents[name]
+        return name
+
+    rows_out = dict.fromkeys(rows_in, 0)
+    for d in transformed_spec.get("data", []):
+        if isinstance(d.get("values"), list):
+            source = root(d.get("source") or d["name"])
+            if source in rows_out:
+                rows_out[source] += len(d["values"])
+
+    return pl.DataFrame(
+        {
+            "dataset": list(rows_in),
+            "rows_in": list(rows_in.values()),
+            "rows_out": [rows_out[name] for name in rows_in],
+        },
+        schema={"dataset": pl.String, "rows_in": pl.Int64, "rows_out": pl.Int64},
+    ).with_columns((pl.col("rows_in") - pl.col("rows_out")).alias("rows_cut"))
+
+
+@traced
+def pre_transform_chart(
+    chart: alt.TopLevelMixin, row_limit: int | None = None
+) -> PreTransformedChart:
+    """Evaluate the data transforms of a chart with VegaFusion.
+
+    Aggregations, box plot statistics, calculations and filters that do not depend on
+    interactive selections are computed in Python, and only their results are inlined
+    in the returned Vega spec.
+
+    Args:
+        chart: The Altair chart to pre-transform.
+        row_limit: Maximum number of rows to inline per dataset. VegaFusion reports a
+            warning when a dataset is truncated.
+
+    Returns:
+        The pre-transformed chart.
+    """
+    import vegafusion as vf
+    import vl_convert as vlc
+
+    stage("to_vega")
+    vl_version = "_".join(alt.SCHEMA_VERSION.split(".")[:2])
+    vega_spec = vlc.vegalite_to_vega(chart.to_dict(), vl_version=vl_version)
+
+    evaluate = stage("evaluate")
+    transformed_spec, warnings = vf.runtime.pre_transform_spec(
+        vega_spec, row_limit=row_limit
+    )
+    report = _row_report(vega_spec, transformed_spec)
+    evaluate.rows_in = report["rows_in"].sum()
+    evaluate.rows_out = report["rows_out"].sum()
+    return PreTransformedChart(transformed_spec, report, warnings)
+
+
+def finish_chart(chart, pre_transform: bool | None = None):
+    "Return `chart` with its data stored, pre-transformed if requested or by the options."
+    store_chart_data(chart)
+    if pre_transform is None:
+        pre_transform = get_config().pre_transform
+    if not pre_transform:
+        return chart
+    stage("pre_transform")
+    return pre_transform_chart(chart)
@@ -0,0 +1,211 @@
+import contextvars
+import math
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+import altair as alt
+import numpy as np
+import polars as pl
+
+from ._frames import Frame, Source, collect, collect_all, scan
+from .config import get_config
+from .pre_transform import pre_transform_chart
+from .spec import Spec
+
+# Number of row blocks a LazyFrame sample is drawn from.
+SAMPLE_BLOCKS = 64
+
+# Normal quantile of the two-sided 95% margins of error.
+Z_95 = 1.959964
+
+
+class Refinement:
+    """One chart of a progressive plot.
+
+    Attributes:
+        chart: The chart.
+        exact: Whether the chart was computed from all rows.
+        fraction: Smallest fraction of the rows of a source the chart was computed
+            from.
+        errors: For `plot_marginal_1d` previews, one row per "column", "source" and
+            "value" with the "count" in the sample, the full-data count it estimates
+            ("estimate") and the 95% margin of error of the estimate ("margin"). None
+            for exact charts and other plots.
+    """
+
+    def __init__(
+        self,
+        chart,
+        exact: bool,
+        fraction: float,
+        errors: pl.DataFrame | None = None,
+    ):
+        self.chart = chart
+        self.exact = exact
+        self.fraction = fraction
+        self.errors = errors
+
+    def _repr_mimebundle_(self, include=None, exclude=None):
+        return self.chart._repr_mimebundle_(include, exclude)
+
+
+def _total_rows(df: Frame) -> int:
+    if isinstance(df, pl.LazyFrame):
+        # Read from the metadata for Parquet and Arrow IPC scans.
+        return collect(df.select(pl.len())).item()
+    return df.height
+
+
+def sample_frame(df: Frame, n: int, seed: int = 0) -> tuple[pl.DataFrame, float]:
+    """Draw a seeded sample of about `n` rows of `df`.
+
+    DataFrames are sampled uniformly. LazyFrames are split into `SAMPLE_BLOCKS` equal
+    strata, from each of which a block of consecutive rows at a random offset is read,
+    so that Parquet and Arrow IPC scans only read the row groups of the blocks.
+
+    Returns:
+        The sample and the fraction of the rows of `df` it holds.
+    """
+    total = _total_rows(df)
+    if total <= n:
+        return collect(df), 1.0
+    if not isinstance(df, pl.LazyFrame):
+        return df.sample(n, seed=seed), n / total
+    rng = np.random.default_rng(seed)
+    blocks = min(SAMPLE_BLOCKS, n)
+    block_rows = math.ceil(n / blocks)
+    stratum = total // blocks
+    offsets = np.arange(blocks) * stratum + rng.integers(
+        0, max(stratum - block_rows, 0) + 1, size=blocks
+    )
+    sample = pl.concat(
+        collect_all([df.slice(int(offset), block_rows) for offset in offsets])
+    )
+    return sample, sample.height / total
+
+
+def _count_errors(
+    samples: dict[str, tuple[pl.DataFrame, float]], columns: list[str]
+) -> pl.DataFrame:
+    "Estimates of the full-data counts of `columns` from samples of each source."
+    frames = []
+    for source, (sample, fraction) in samples.items():
+        for column in columns:
+            counts = sample.group_by(column).agg(pl.len().alias("count"))
+            frames.append(
+                counts.select(
+                    pl.lit(column).alias("column"),
+                    pl.lit(source).alias("source"),
+                    pl.col(column).cast(pl.String).alias("value"),
+                    pl.col("count").cast(pl.Int64),
+                    (pl.col("count") / fraction).alias("estimate"),
+                    # Rows are kept independently with probability `fraction`.
+                    (Z_95 * (pl.col("count") * (1 - fraction)).sqrt() / fraction).alias(
+                        "margin"
+                    ),
+                )
+            )
+    return pl.concat(frames).sort("column", "source", "value")
+
+
+def _subtitle(chart, subtitle: str):
+    "Add `subtitle` under the title of an Altair chart or `Spec`."
+    if isinstance(chart, Spec):
+        title = chart.spec.get("title", "")
+        text = title.get("text", "") if isinstance(title, dict) else title
+        return Spec(
+            {**chart.spec, "title": {"text": text, "subtitle": subtitle}},
+            chart.datasets,
+        )
+    title = chart.title
+    text = "" if title is alt.Undefined else title
+    return chart.properties(title=alt.TitleParams(text=text, subtitle=subtitle))
+
+
+def progressive(
+    plot: Callable,
+    observed_df: Source,
+    synthetic_df: Source,
+    *args,
+    sample_rows: int = 100_000,
+    seed: int = 0,
+    **kwargs,
+) -> Iterator[Refinement]:
+    """Plot a preview from a sample of the data, then the exact chart.
+
+    The exact chart is computed in a background thread as soon as the generator is
+    first advanced, while a preview is computed from a seeded sample of `sample_rows`
+    rows per source and yielded first, subtitled with its sample size. The exact chart
+    is yielded once it is ready. Only the exact chart is yielded if neither source has
+    more than `sample_rows` rows.
+
+    Counts in previews are counts of the sample; with `plot_marginal_1d`, the
+    `errors` of the preview estimate the full-data counts with their margins of error.
+    Blocks sampled from LazyFrames are clustered, so when the rows are ordered, e.g. by
+    time, the margins understate the error.
+
+    Args:
+        plot: A plotting entry point taking the observed and synthetic data as its
+            first arguments: `plot_marginal_1d`, `plot_marginal_numerical_numerical`
+            or `plot_marginal_numerical_categorical`.
+        observed_df: Observed data, as a DataFrame, a LazyFrame, or a path or glob of
+            Parquet or Arrow IPC files.
+        synthetic_df: Synthetic data, in the same forms.
+        *args: Further arguments of `plot`.
+        sample_rows: Number of rows sampled from each source for the preview.
+        seed: Seed of the sample.
+        **kwargs: Further keyword arguments of `plot`.
+
+    Yields:
+        The preview, if any, then the exact chart.
+
+    Example:
+        >>> for refinement in progressive(plot_marginal_1d, observed, synthetic, columns):
+        ...     display(refinement.chart, display_id="marginals", update=True)
+    """
+    observed_df, synthetic_df = scan(observed_df), scan(synthetic_df)
+    pre_transform = kwargs.pop("pre_transform", None)
+    if pre_transform is None:
+        pre_transform = get_config().pre_transform
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lpm_plot")
+    try:
+        # The exact chart is computed with the options in effect here.
+        exact = executor.submit(
+            contextvars.copy_context().run,
+            plot,
+            observed_df,
+            synthetic_df,
+            *args,
+            pre_transform=pre_transform,
+            **kwargs,
+        )
+
+        samples = {
+            "observed": sample_frame(observed_df, sample_rows, seed),
+            "synthetic": sample_frame(synthetic_df, sample_rows, seed + 1),
+        }
+        fraction = min(f for _, f in samples.values())
+        if fraction < 1:
+            chart = plot(
+                samples["observed"][0],
+                samples["synthetic"][0],
+                *args,
+                pre_transform=False,
+                **kwargs,
+            )
+            rows = max(s.height for s, _ in samples.values())
+            chart = _subtitle(
+                chart, f"Preview from {rows:,} sampled rows ({fraction:.2%})"
+            )
+            if pre_transform:
+                chart = pre_transform_chart(chart)
+            errors = None
+            if getattr(plot, "__name__", None) == "plot_marginal_1d":
+                columns = args[0] if args else kwargs["columns"]
+                errors = _count_errors(samples, columns)
+            yield Refinement(chart, exact=False, fraction=fraction, errors=errors)
+
+        yield Refinement(exact.result(), exact=True, fraction=1.0)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,204 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import polars as pl
+
+from ._frames import Source, collect, column_names, scan
+from .instrument import stage, traced
+
+# Ratio of the capacities of consecutive levels, from the top level down.
+CAPACITY_RATIO = 2 / 3
+
+# Rows per partition in `sketch_columns`.
+PARTITION_ROWS = 1_000_000
+
+
+class QuantileSketch:
+    """A mergeable streaming quantile sketch (KLL) of a numerical column.
+
+    Values are kept in levels of buffers, a value at level h standing for 2**h
+    values of the stream. When a level outgrows its capacity, it is compacted: every
+    other value of it, starting at a random offset, is promoted to the next level.
+    Memory stays in O(k log(n / k)) for n values, and the rank of any value is
+    estimated within about 1.7 / k of n with high probability. Sketches of different
+    batches or processes can be merged into a sketch of their union with the same
+    guarantee, and pickled to be sent between processes.
+
+    Args:
+        k: Capacity of the top level, which sets the accuracy.
+        seed: Seed of the compaction offsets.
+    """
+
+    def __init__(self, k: int = 200, seed: int | None = 0):
+        self.k = k
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._levels: list[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - 1 - level
+        return max(2, math.ceil(self.k * CAPACITY_RATIO**depth))
+
+    def _compress(self) -> None:
+        "Compact levels from the bottom up until none exceeds its capacity."
+        # Adding a level lowers the capacities of the levels below, hence the passes.
+        while any(
+            len(values) > self._capacity(level)
+            for level, values in enumerate(self._levels)
+        ):
+            for level in range(len(self._levels)):
+                values = self._levels[level]
+                if len(values) <= self._capacity(level):
+                    continue
+                if level + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+                values = np.sort(values)
+                # An odd value out stays at this level.
+                kept, values = values[: len(values) % 2], values[len(values) % 2 :]
+                promoted = values[self._rng.integers(2) :: 2]
+                self._levels[level] = kept
+                self._levels[level + 1] = np.concatenate(
+                    [self._levels[level + 1], promoted]
+                )
+
+    def update(self, values) -> "QuantileSketch":
+        """Add `values`, an array or Series of numbers. Nulls and NaNs are skipped.
+
+        Returns:
+            The sketch itself.
+        """
+        if isinstance(values, pl.Series):
+            values = values.cast(pl.Float64).drop_nulls().to_numpy()
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+        self.count += values.size
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Add the values summarized by `other` to this sketch.
+
+        Returns:
+            The sketch itself.
+        """
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0))
+        for level, values in enumerate(other._levels):
+            self._levels[level] = np.concatenate([self._levels[level], values])
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _weighted(self) -> tuple[np.ndarray, np.ndarray]:
+        "The retained values in order, with the cumulative weight up to each of them."
+        values = np.concatenate(self._levels)
+        weights = np.concatenate(
+            [np.full(len(v), 2**level) for level, v in enumerate(self._levels)]
+        )
+        order = np.argsort(values, kind="stable")
+        return values[order], np.cumsum(weights[order])
+
+    def quantiles(self, q) -> np.ndarray:
+        """Estimate the quantiles of the values at probabilities `q`, in [0, 1].
+
+        The quantiles at 0 and 1 are the exact minimum and maximum. An empty sketch
+        has NaN quantiles.
+        """
+        q = np.asarray(q, dtype=np.float64)
+        if self.count == 0:
+            return np.full(q.shape, np.nan)
+        values, cumulative = self._weighted()
+        index = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+        result = values[np.minimum(index, len(values) - 1)]
+        return np.where(q <= 0, self.min, np.where(q >= 1, self.max, result))
+
+    def rank(self, x) -> np.ndarray:
+        "Estimate the fraction of the values that are at most `x`."
+        if self.count == 0:
+            return np.full(np.shape(x), np.nan)
+        values, cumulative = self._weighted()
+        index = np.searchsorted(values, x, side="right")
+        return (
+            np.where(index > 0, cumulative[np.maximum(index - 1, 0)], 0)
+            / (cumulative[-1])
+        )
+
+    @property
+    def retained(self) -> int:
+        "Number of values held by the sketch."
+        return sum(len(values) for values in self._levels)
+
+
+def _sketch_partition(
+    df: pl.DataFrame, columns: list[str], k: int, seed: int
+) -> dict[str, QuantileSketch]:
+    return {
+        column: QuantileSketch(k, seed=seed).update(df.get_column(column))
+        for column in columns
+    }
+
+
+@traced
+def sketch_columns(
+    df: Source,
+    columns: list[str] | None = None,
+    k: int = 200,
+    partition_rows: int = PARTITION_ROWS,
+    max_workers: int | None = None,
+    seed: int = 0,
+) -> dict[str, QuantileSketch]:
+    """Build a `QuantileSketch` of every numerical column in one pass over the data.
+
+    The rows are split into partitions of `partition_rows` rows that are sketched in a
+    thread pool, only one partition per worker being in memory at a time, and the
+    sketches of the partitions are merged in order.
+
+    Args:
+        df: The data, as a DataFrame, a LazyFrame, or a path or glob of Parquet or Arrow
+            IPC files.
+        columns: Columns to sketch. Defaults to every numerical column.
+        k: Accuracy parameter of the sketches.
+        partition_rows: Number of rows per partition.
+        max_workers: Number of threads sketching partitions. Defaults to the
+            `ThreadPoolExecutor` default.
+        seed: Seed of the sketches, for reproducible results.
+
+    Returns:
+        The sketch of each column.
+    """
+    df = scan(df)
+    if columns is None:
+        schema = df.collect_schema() if isinstance(df, pl.LazyFrame) else df.schema
+        columns = [name for name, dtype in schema.items() if dtype.is_numeric()]
+    missing = set(columns) - set(column_names(df))
+    if missing:
+        raise KeyError(f"columns not in the data: {sorted(missing)}")
+    df = df.lazy().select(columns)
+    total = collect(df.select(pl.len())).item()
+
+    stage("sketch", rows_in=total)
+    offsets = range(0, max(total, 1), partition_rows)
+
+    def sketch(partition: int):
+        batch = collect(df.slice(offsets[partition], partition_rows))
+        return _sketch_partition(batch, columns, k, seed + partition)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        partitions = list(pool.map(sketch, range(len(offsets))))
+
+    stage("merge", rows_in=len(partitions))
+    sketches = partitions[0]
+    for partition in partitions[1:]:
+        for column in columns:
+            sketches[column].merge(partition[column])
+    return sketches
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+from importlib.metadata import version
+from pathlib import Path
+
+import altair as alt
+import vl_convert as vlc
+
+from ._file_cache import _FileCache
+from .instrument import stage, traced
+
+FORMATS = ("png", "svg", "html")
+
+
+def spec_hash(spec: dict, format: str = "png", scale: float = 1.0) -> str:
+    """Compute a content hash for a rendered artifact.
+
+    The hash covers the full spec (including inlined data), the output
+    format, the scale and the vl-convert version, so that any change to one of
+    them produces a different key.
+
+    Args:
+        spec: A Vega-Lite or Vega spec as a dictionary, e.g. from `chart.to_dict()`.
+        format: Output format, one of "png", "svg" or "html".
+        scale: Scale factor for raster output.
+
+    Returns:
+        A hex-encoded SHA-256 digest.
+    """
+    payload = json.dumps(
+        {
+            "spec": spec,
+            "format": format,
+            "scale": float(scale),
+            "renderer": version("vl-convert-python"),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _vl_version() -> str:
+    # vl-convert expects versions of the form "v5_20".
+    return "_".join(alt.SCHEMA_VERSION.split(".")[:2])
+
+
+def _convert(spec: dict, format: str, scale: float) -> bytes:
+    "Render a Vega-Lite or Vega spec with vl-convert."
+    if "/schema/vega/" in spec.get("$schema", ""):
+        if format == "png":
+            return vlc.vega_to_png(spec, scale=scale)
+        if format == "svg":
+            return vlc.vega_to_svg(spec).encode("utf-8")
+        return vlc.vega_to_html(spec).encode("utf-8")
+    if format == "png":
+        return vlc.vegalite_to_png(spec, vl_version=_vl_version(), scale=scale)
+    if format == "svg":
+        return vlc.vegalite_to_svg(spec, vl_version=_vl_version()).encode("utf-8")
+    return vlc.vegalite_to_html(spec, vl_version=_vl_version()).encode("utf-8")
+
+
+def _decode(data: bytes, format: str) -> bytes | str:
+    return data if format == "png" else data.decode("utf-8")
+
+
+class RenderCache(_FileCache):
+    """A content-addressed on-disk cache of rendered charts.
+
+    Artifacts are stored as one file per key in `directory`. Every hit refreshes the
+    file's modification time, and once the cache grows beyond `max_bytes` the least
+    recently used files are removed. Files are written to a temporary name and then
+    atomically renamed into place, so several processes can share one directory.
+
+    Args:
+        directory: Directory holding the cached artifacts. Created if missing.
+        max_bytes: Upper bound on the total size of the cached artifacts.
+    """
+
+    EXTENSIONS = FORMATS
+
+    def __init__(self, directory: str | os.PathLike, max_bytes: int = 512 * 2**20):
+        super().__init__(directory, max_bytes)
+
+    def get(self, key: str, format: str) -> bytes | None:
+        "Return the cached artifact for `key`, or None on a miss."
+        path = self.path(key, format)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        # Evicted by another process between the read and the touch.
+        if not self._touch(path):
+            return None
+        return data
+
+    def put(self, key: str, format: str, data: bytes) -> None:
+        "Atomically store an artifact and evict old entries if over budget."
+        self._write(
+            self.path(key, format), lambda tmp_path: Path(tmp_path).write_bytes(data)
+        )
+
+    def render(self, chart, format: str = "png", scale: float = 1.0) -> bytes | str:
+        "Render `chart`, serving it from the cache when the same chart was rendered before."
+        return render_chart(chart, format=format, scale=scale, cache=self)
+
+
+@traced
+def render_chart(
+    chart,
+    format: str = "png",
+    scale: float = 1.0,
+    cache: RenderCache | None = None,
+) -> bytes | str:
+    """Render a chart to PNG, SVG or HTML, optionally through a `RenderCache`.
+
+    Args:
+        chart: An Altair chart, a `PreTransformedChart`, or a Vega-Lite or Vega spec as
+            a dictionary.
+        format: Output format, one of "png", "svg" or "html".
+        scale: Scale factor for PNG output.
+        cache: Cache to serve the artifact from. If None, the chart is always rendered.
+
+    Returns:
+        The PNG image as bytes, or the SVG or HTML document as a string.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}, got {format!r}")
+
+    stage("to_dict")
+    spec = chart if isinstance(chart, dict) else chart.to_dict()
+    if cache is None:
+        rendered = stage("render")
+        data = _convert(spec, format, scale)
+    else:
+        rendered = stage("cache")
+        key = spec_hash(spec, format, scale)
+        data = cache.get(key, format)
+        if data is None:
+            rendered = stage("render")
+            data = _convert(spec, format, scale)
+            cache.put(key, format, data)
+    rendered.bytes = len(data)
+    return _decode(data, format)
@@ -0,0 +1,128 @@
+import math
+import os
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+
+from ._frames import Source, column_names, scan
+from .config import get_config
+from .plot_marginal import plot_marginal_1d
+from .pre_transform import pre_transform_chart
+from .progressive import _subtitle
+from .render_cache import FORMATS, RenderCache, render_chart
+from .serialize import write_json
+
+REPORT_FORMATS = ("json", *FORMATS)
+
+
+class Page:
+    """One page of a marginal report.
+
+    Attributes:
+        number: Page number, from 1.
+        pages: Number of pages of the report.
+        columns: Columns plotted on the page.
+        chart: The chart of the page.
+        path: File the page was written to, or None.
+    """
+
+    def __init__(
+        self,
+        number: int,
+        pages: int,
+        columns: list[str],
+        chart,
+        path: Path | None = None,
+    ):
+        self.number = number
+        self.pages = pages
+        self.columns = columns
+        self.chart = chart
+        self.path = path
+
+    def _repr_mimebundle_(self, include=None, exclude=None):
+        return self.chart._repr_mimebundle_(include, exclude)
+
+
+def marginal_report(
+    observed_df: Source,
+    synthetic_df: Source | Mapping[str, Source],
+    columns: list[str] | None = None,
+    page_size: int = 20,
+    directory: str | os.PathLike | None = None,
+    format: str = "json",
+    cache: RenderCache | None = None,
+    **kwargs,
+) -> Iterator[Page]:
+    """Plot the 1D marginals of many columns as a sequence of pages.
+
+    Rather than one `plot_marginal_1d` chart of every column, whose spec and render
+    grow with the number of columns, each page plots `page_size` columns. Pages are
+    built one at a time as the generator is consumed, so the first page is ready after
+    counting its own columns, and only the current page is held in memory. Each page
+    counts its columns in one pass over the data; DataFrames share their counts across
+    pages through the aggregation cache when it is enabled, while paths and LazyFrames
+    are scanned again for every page, for their projected columns only.
+
+    Args:
+        observed_df: Observed data, as accepted by `plot_marginal_1d`.
+        synthetic_df: Synthetic data, or a mapping of model names to their data, as
+            accepted by `plot_marginal_1d`.
+        columns: Columns to plot. Defaults to every column of the observed data.
+        page_size: Number of columns per page.
+        directory: If given, each page is written there as it is built, to
+            "page-001.<format>", "page-002.<format>", ...
+        format: Format of the written pages: "json" for the Vega-Lite spec, streamed
+            with `write_json`, or a format of `render_chart` ("png", "svg", "html").
+        cache: Cache of rendered pages, for image and HTML formats.
+        **kwargs: Further keyword arguments of `plot_marginal_1d`.
+
+    Yields:
+        The pages, in column order.
+
+    Example:
+        >>> for page in marginal_report(observed, synthetic, directory="report", format="svg"):
+        ...     print(f"Wrote {page.path}")
+    """
+    if format not in REPORT_FORMATS:
+        raise ValueError(f"format must be one of {REPORT_FORMATS}, got {format!r}")
+    if page_size < 1:
+        raise ValueError("page_size must be at least 1")
+    observed_df = scan(observed_df)
+    if isinstance(synthetic_df, Mapping):
+        synthetic_df = {name: scan(df) for name, df in synthetic_df.items()}
+    else:
+        synthetic_df = scan(synthetic_df)
+    if columns is None:
+        columns = column_names(observed_df)
+    pre_transform = kwargs.pop("pre_transform", None)
+    if pre_transform is None:
+        pre_transform = get_config().pre_transform
+    if directory is not None:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+    pages = math.ceil(len(columns) / page_size)
+    for number in range(1, pages + 1):
+        page_columns = columns[(number - 1) * page_size : number * page_size]
+        chart = plot_marginal_1d(
+            observed_df, synthetic_df, page_columns, pre_transform=False, **kwargs
+        )
+        chart = _subtitle(
+            chart,
+            f"Page {number} of {pages}: {page_columns[0]} to {page_columns[-1]}",
+        )
+        if pre_transform:
+            chart = pre_transform_chart(chart)
+
+        path = None
+        if directory is not None:
+            path = directory / f"page-{number:03d}.{format}"
+            if format == "json":
+                write_json(chart, path)
+            else:
+                rendered = render_chart(chart, format, cache=cache)
+                if isinstance(rendered, bytes):
+                    path.write_bytes(rendered)
+                else:
+                    path.write_text(rendered, encoding="utf-8")
+        yield Page(number, pages, page_columns, chart, path)
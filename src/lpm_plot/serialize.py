@@ -0,0 +1,408 @@
+import contextlib
+import json
+import os
+import re
+from collections import Counter
+from typing import IO
+
+from .config import get_config
+from .instrument import stage, traced
+
+# Keys holding inlined data rows, which are never walked.
+_DATA_KEYS = {"datasets", "values"}
+
+# Keys of the Vega-Lite specs that can hold a view's `data` and `transform`; other
+# objects with a `data` key, such as the `from` of a lookup, reference a dataset.
+_VIEW_KEYS = {"mark", "layer", "concat", "hconcat", "vconcat", "facet", "repeat"}
+
+# Names of views and parameters Altair generates.
+_GENERATED_NAME = re.compile(r"(view|param)_(\d+)")
+
+# Keys of expression strings, which can refer to parameters by name.
+_EXPRESSION_KEYS = {"expr", "test", "filter", "calculate"}
+
+# `datum` in an expression other than as `datum.field` or `datum["field"]`.
+_BARE_DATUM = re.compile(r"\bdatum\b(?![.\[])")
+
+
+def _decode_expression(field: str, labels: list[str]) -> str:
+    return f"{json.dumps(labels)}[datum[{json.dumps(field)}]]"
+
+
+def _labels(rows: list, decoders: int = 1) -> dict[str, list[str]]:
+    """The string fields of `rows` that are shorter as indices into a dictionary.
+
+    A field is only encoded if the bytes saved on its values outweigh those of the
+    `decoders` transforms mapping the indices back.
+
+    Returns:
+        The sorted dictionary of each such field.
+    """
+    if not rows or not all(isinstance(row, dict) for row in rows):
+        return {}
+    dictionaries = {}
+    for field in rows[0]:
+        # Vega-Lite reads dots and brackets in field names as nested access.
+        if any(c in field for c in ".[]\\"):
+            continue
+        counts = Counter(row.get(field) for row in rows)
+        if not all(isinstance(value, str) for value in counts):
+            continue
+        labels = sorted(counts)
+        saved = sum(
+            counts[label] * (len(label) + 2 - len(str(index)))
+            for index, label in enumerate(labels)
+        )
+        decoder = {"calculate": _decode_expression(field, labels), "as": field}
+        cost = decoders * len(json.dumps(decoder))
+        if saved > cost:
+            dictionaries[field] = labels
+    return dictionaries
+
+
+def _encode_rows(rows: list[dict], dictionaries: dict[str, list[str]]) -> list[dict]:
+    indices = {
+        field: {label: index for index, label in enumerate(labels)}
+        for field, labels in dictionaries.items()
+    }
+    return [
+        {
+            field: indices[field][value] if field in indices else value
+            for field, value in row.items()
+        }
+        for row in rows
+    ]
+
+
+def _copy(node):
+    "Copy the containers of a spec, sharing the (immutable here) inlined data rows."
+    if isinstance(node, dict):
+        return {
+            key: value if key in _DATA_KEYS else _copy(value)
+            for key, value in node.items()
+        }
+    if isinstance(node, list):
+        return [_copy(item) for item in node]
+    return node
+
+
+def _walk(node, visit):
+    if isinstance(node, dict):
+        visit(node)
+        for key, value in node.items():
+            if key not in _DATA_KEYS:
+                _walk(value, visit)
+    elif isinstance(node, list):
+        for item in node:
+            _walk(item, visit)
+
+
+def _encode_vega_lite(spec: dict) -> dict:
+    datasets = spec["datasets"]
+    views, foreign = [], set()
+
+    def visit(node):
+        data = node.get("data")
+        if isinstance(data, dict) and data.get("name") in datasets:
+            if node is spec or _VIEW_KEYS & node.keys():
+                views.append(node)
+            else:
+                foreign.add(data["name"])
+
+    _walk(spec, visit)
+    encoded = dict(datasets)
+    for name, rows in datasets.items():
+        users = [view for view in views if view["data"]["name"] == name]
+        if name in foreign or not users:
+            continue
+        dictionaries = _labels(rows, len(users))
+        if not dictionaries:
+            continue
+        encoded[name] = _encode_rows(rows, dictionaries)
+        decode = [
+            {"calculate": _decode_expression(field, labels), "as": field}
+            for field, labels in dictionaries.items()
+        ]
+        for view in users:
+            view["transform"] = decode + view.get("transform", [])
+    spec["datasets"] = encoded
+    return spec
+
+
+def _encode_vega(spec: dict) -> dict:
+    def visit(node):
+        data = node.get("data")
+        if not isinstance(data, list):
+            return
+        for entry in data:
+            if not isinstance(entry, dict) or not isinstance(entry.get("values"), list):
+                continue
+            parsed = entry.get("format", {}).get("parse")
+            dictionaries = {
+                field: labels
+                for field, labels in _labels(entry["values"]).items()
+                if not isinstance(parsed, dict) or field not in parsed
+            }
+            if not dictionaries:
+                continue
+            entry["values"] = _encode_rows(entry["values"], dictionaries)
+            entry["transform"] = [
+                {
+                    "type": "formula",
+                    "expr": _decode_expression(field, labels),
+                    "as": field,
+                }
+                for field, labels in dictionaries.items()
+            ] + entry.get("transform", [])
+
+    _walk(spec, visit)
+    return spec
+
+
+def _dictionary_encode(spec: dict) -> dict:
+    """Replace repeated strings in the data inlined in `spec` by dictionary indices.
+
+    Every string field whose values are shorter as indices into the sorted dictionary
+    of its distinct values, such as source, model and column labels, is stored as those
+    indices. A `calculate` transform (a `formula` transform in Vega specs) placed before
+    any other transform of the views using the data maps them back to the strings, so
+    the chart renders as before. Datasets that other transforms look up are kept as-is.
+
+    Args:
+        spec: A Vega-Lite spec with named top-level `datasets`, as produced by Altair, or
+            a Vega spec with inline `values`, as produced by `pre_transform_chart`. It is
+            not modified.
+
+    Returns:
+        The encoded spec.
+    """
+    spec = _copy(spec)
+    if "datasets" in spec:
+        return _encode_vega_lite(spec)
+    return _encode_vega(spec)
+
+
+def _strip_data(node):
+    "The spec without its inlined data rows, to search the fields it uses."
+    if isinstance(node, dict):
+        return {
+            key: None if key in _DATA_KEYS else _strip_data(value)
+            for key, value in node.items()
+        }
+    if isinstance(node, list):
+        return [_strip_data(item) for item in node]
+    return node
+
+
+def _drop_fields(rows: list, used) -> list:
+    if not rows or not isinstance(rows[0], dict):
+        return rows
+    keep = [field for field in rows[0] if used(field)]
+    if len(keep) == len(rows[0]):
+        return rows
+    return [{field: row.get(field) for field in keep} for row in rows]
+
+
+def _drop_unused_fields(spec: dict) -> dict:
+    """Drop the fields of the inlined data that `spec` never mentions.
+
+    A field is kept if its name appears anywhere outside the data, in an encoding, a
+    transform or an expression. Nothing is dropped if a tooltip shows whole rows or an
+    expression reads a row as a whole.
+    """
+    text = json.dumps(_strip_data(spec))
+    if _BARE_DATUM.search(text) or '"content": "data"' in text:
+        return spec
+
+    def used(field):
+        return json.dumps(field)[1:-1] in text
+
+    spec = _copy(spec)
+    if "datasets" in spec:
+        spec["datasets"] = {
+            name: _drop_fields(rows, used) for name, rows in spec["datasets"].items()
+        }
+
+    def visit(node):
+        data = node.get("data")
+        entries = data if isinstance(data, list) else [data]
+        for entry in entries:
+            if isinstance(entry, dict) and isinstance(entry.get("values"), list):
+                entry["values"] = _drop_fields(entry["values"], used)
+
+    _walk(spec, visit)
+    return spec
+
+
+def _number_names(spec: dict) -> dict:
+    """Renumber the view and parameter names Altair generates, in order of appearance.
+
+    Altair numbers them with process-wide counters, so the same chart built twice gets
+    different names. Objects are visited in sorted key order, like they are written.
+    Only the places that hold such names are rewritten: the `name` of parameters and
+    views, the `views` of parameters, `param` references and, for the names found
+    there, expressions. Field names and titles that look alike are left as they are.
+    """
+    names = {}
+    counts = {}
+
+    def number(name):
+        match = _GENERATED_NAME.fullmatch(name)
+        if match and name not in names:
+            kind = match.group(1)
+            counts[kind] = counts.get(kind, 0) + 1
+            names[name] = f"{kind}_{counts[kind]}"
+
+    def find(node, names_node=False):
+        if isinstance(node, dict):
+            for key in sorted(node):
+                value = node[key]
+                if key in _DATA_KEYS:
+                    continue
+                if isinstance(value, str):
+                    if key == "param" or (key == "name" and names_node):
+                        number(value)
+                elif key == "views" and isinstance(value, list):
+                    for view in value:
+                        if isinstance(view, str):
+                            number(view)
+                elif key == "params" and isinstance(value, list):
+                    for param in value:
+                        find(param, names_node=True)
+                else:
+                    find(
+                        value, isinstance(value, dict) and bool(_VIEW_KEYS & set(value))
+                    )
+        elif isinstance(node, list):
+            for item in node:
+                find(item, isinstance(item, dict) and bool(_VIEW_KEYS & set(item)))
+
+    find(spec, bool(_VIEW_KEYS & set(spec)))
+    if not names:
+        return spec
+    # Names in expressions, but not as fields (`datum.view_1`) or strings.
+    reference = re.compile(
+        r"(?<![\w.\"'])(" + "|".join(map(re.escape, names)) + r")(?!\w)"
+    )
+
+    def visit(node, key=None):
+        if isinstance(node, str):
+            if key in ("name", "param", "views") and node in names:
+                return names[node]
+            if key in _EXPRESSION_KEYS:
+                return reference.sub(lambda match: names[match.group(0)], node)
+            return node
+        if isinstance(node, dict):
+            return {
+                k: node[k] if k in _DATA_KEYS else visit(node[k], k)
+                for k in sorted(node)
+            }
+        if isinstance(node, list):
+            return [visit(item, key) for item in node]
+        return node
+
+    return visit(spec)
+
+
+def _prepare(chart, dictionary_encode: bool | None, compact: bool | None) -> dict:
+    config = get_config()
+    if dictionary_encode is None:
+        dictionary_encode = config.dictionary_encode
+    if compact is None:
+        compact = config.compact_json
+    stage("to_dict")
+    if hasattr(chart, "validate"):
+        spec = chart.to_dict(validate=False)
+        stage("validate")
+        chart.validate(spec)
+    else:
+        spec = chart.to_dict()
+    if compact:
+        stage("drop_unused")
+        spec = _drop_unused_fields(spec)
+    if dictionary_encode:
+        stage("dictionary_encode")
+        spec = _dictionary_encode(spec)
+    if compact:
+        spec = _number_names(spec)
+    return spec
+
+
+def _encoder(indent: int | None, compact: bool | None) -> json.JSONEncoder:
+    if compact is None:
+        compact = get_config().compact_json
+    if compact:
+        return json.JSONEncoder(
+            indent=indent, separators=(",", ":"), sort_keys=True, ensure_ascii=False
+        )
+    return json.JSONEncoder(indent=indent)
+
+
+@traced
+def to_json(
+    chart,
+    indent: int | None = None,
+    dictionary_encode: bool | None = None,
+    compact: bool | None = None,
+) -> str:
+    """Serialize a chart to a JSON spec.
+
+    Equivalent to `chart.to_json()`, but converting to a dictionary, validating against
+    the Vega-Lite schema and encoding JSON are reported as separate stages to `trace`.
+
+    Args:
+        chart: An Altair chart or a `PreTransformedChart`.
+        indent: Indentation of the JSON output. If None, the output is on one line.
+        dictionary_encode: Whether to store the repeated strings of the inlined data,
+            such as source and column labels, as indices into a dictionary that a
+            transform maps back to the strings when the chart renders. Defaults to the
+            package-wide `dictionary_encode` option.
+        compact: Whether to drop the fields of the inlined data that the chart does not
+            use and write byte-stable JSON: keys are sorted, the view and parameter
+            names Altair generates are numbered in order, and without `indent` there is
+            no whitespace. Defaults to the package-wide `compact_json` option. Combine
+            with the `precision` option to round the inlined floats.
+
+    Returns:
+        The JSON spec.
+    """
+    spec = _prepare(chart, dictionary_encode, compact)
+    serialized = stage("serialize")
+    text = _encoder(indent, compact).encode(spec)
+    serialized.bytes = len(text)
+    return text
+
+
+@traced
+def write_json(
+    chart,
+    fp: str | os.PathLike | IO[str],
+    indent: int | None = None,
+    dictionary_encode: bool | None = None,
+    compact: bool | None = None,
+) -> int:
+    """Write a chart's JSON spec to a file, without building it in memory first.
+
+    The spec is encoded piece by piece, so large inlined datasets are streamed to the
+    file. The output is the same as `to_json`'s.
+
+    Args:
+        chart: An Altair chart or a `PreTransformedChart`.
+        fp: A path, or a text file open for writing.
+        indent: See `to_json`.
+        dictionary_encode: See `to_json`.
+        compact: See `to_json`.
+
+    Returns:
+        The number of characters written.
+    """
+    spec = _prepare(chart, dictionary_encode, compact)
+    serialized = stage("serialize")
+    with contextlib.ExitStack() as stack:
+        if isinstance(fp, (str, os.PathLike)):
+            fp = stack.enter_context(open(fp, "w", encoding="utf-8"))
+        written = 0
+        for chunk in _encoder(indent, compact).iterencode(spec):
+            written += fp.write(chunk)
+    serialized.bytes = written
+    return written
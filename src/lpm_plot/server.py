@@ -0,0 +1,308 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import altair as alt
+import polars as pl
+
+from ._frames import Source, collect, column_names, scan
+from .instrument import stage, traced
+from .plot_heatmap import plot_heatmap, reformat_data
+from .pre_transform import pre_transform_chart, store_chart_data
+from .serialize import to_json
+
+MODES = ("raw", "sample", "aggregate")
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8">
+  <title>Mutual information heatmap</title>
+  <script src="https://cdn.jsdelivr.net/npm/vega@{vega}"></script>
+  <script src="https://cdn.jsdelivr.net/npm/vega-lite@{vega_lite}"></script>
+  <script src="https://cdn.jsdelivr.net/npm/vega-embed@{vega_embed}"></script>
+</head>
+<body>
+  <div id="heatmap"></div>
+  <label>Detail data
+    <select id="mode">
+      <option value="sample">sampled</option>
+      <option value="aggregate">aggregated</option>
+      <option value="raw">raw</option>
+    </select>
+  </label>
+  <div id="detail">Click on a heatmap cell.</div>
+  <script>
+    const mode = document.getElementById("mode");
+    let pair = null;
+    async function showDetail() {{
+      if (pair === null) return;
+      const query = new URLSearchParams({{x: pair[0], y: pair[1], mode: mode.value}});
+      const response = await fetch("detail?" + query);
+      await vegaEmbed("#detail", await response.json());
+    }}
+    mode.addEventListener("change", showDetail);
+    vegaEmbed("#heatmap", "spec").then(({{view}}) => {{
+      view.addEventListener("click", (event, item) => {{
+        if (item && item.datum && "Column 1" in item.datum) {{
+          pair = [item.datum["Column 1"], item.datum["Column 2"]];
+          showDetail();
+        }}
+      }});
+    }});
+  </script>
+</body>
+</html>
+"""
+
+
+class _LRUCache:
+    "A thread-safe mapping keeping the `max_entries` most recently used entries."
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute: Callable[[], bytes]) -> bytes:
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+        # Computed outside the lock, so that slow pairs do not hold up cached ones.
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _detail_chart(detail: pl.DataFrame, x: str, y: str, aggregate: bool):
+    "Chart of the detail rows of one pair of columns, as built by `reformat_data`."
+    comparison_type = detail["comparison_type"][0] if detail.height else "same-same"
+    if comparison_type == "same-same":
+        return store_chart_data(
+            alt.Chart(pl.DataFrame({"text": ["No Data: self comparison"]}))
+            .mark_text()
+            .encode(text="text:N")
+            .properties(width=400, height=300)
+        )
+
+    x_kind, y_kind = comparison_type.split("-")
+    detail = detail.select(
+        pl.col("x_data").cast(pl.Float64) if x_kind == "num" else pl.col("x_data"),
+        pl.col("y_data").cast(pl.Float64) if y_kind == "num" else pl.col("y_data"),
+    )
+    x_type = "Q" if x_kind == "num" else "N"
+    y_type = "Q" if y_kind == "num" else "N"
+    chart = alt.Chart(detail)
+    if comparison_type == "num-num" and aggregate:
+        chart = chart.mark_rect().encode(
+            x=alt.X("x_data:Q", bin=alt.Bin(maxbins=40), title=x),
+            y=alt.Y("y_data:Q", bin=alt.Bin(maxbins=40), title=y),
+            color=alt.Color("count():Q", scale=alt.Scale(scheme="greys")),
+        )
+    elif comparison_type == "num-num":
+        chart = chart.mark_circle(size=60, color="black").encode(
+            x=alt.X("x_data:Q", title=x),
+            y=alt.Y("y_data:Q", title=y),
+            tooltip=["x_data:Q", "y_data:Q"],
+        )
+    elif comparison_type == "cat-cat":
+        chart = chart.mark_rect(stroke="white").encode(
+            x=alt.X("x_data:N", title=x),
+            y=alt.Y("y_data:N", title=y),
+            color=alt.Color(
+                "count():Q", title="Frequency", scale=alt.Scale(scheme="greys")
+            ),
+            tooltip=["x_data:N", "y_data:N", "count():Q"],
+        )
+    else:
+        chart = chart.mark_boxplot(size=60, color="black").encode(
+            x=alt.X(f"x_data:{x_type}", title=x),
+            y=alt.Y(f"y_data:{y_type}", title=y),
+        )
+    chart = store_chart_data(
+        chart.properties(width=400, height=300, title=f"{x} / {y}")
+    )
+    # Aggregations, bins and box plot statistics are computed here, so that only
+    # their results are sent.
+    return pre_transform_chart(chart) if aggregate else chart
+
+
+class DetailServer(ThreadingHTTPServer):
+    """A local HTTP server for a mutual information heatmap and its detail views.
+
+    Rather than inlining the detail data of every pair of columns in the heatmap, as
+    `plot_heatmap` does, the served page requests the detail chart of a pair when its
+    cell is clicked. Only the two columns of the pair are read, so the latency depends
+    on the pair rather than on the whole dataset.
+
+    Routes:
+        /: The page embedding the heatmap.
+        /spec: The Vega-Lite spec of the heatmap.
+        /detail?x=<column>&y=<column>&mode=<mode>: The spec of the detail chart of a
+            pair, with all its rows ("raw"), a seeded sample of `sample_rows` rows
+            ("sample"), or pre-aggregated by VegaFusion ("aggregate"; a Vega spec).
+
+    Responses carry an ETag and are answered with 304 Not Modified when a request's
+    If-None-Match matches it. Detail specs are kept in an LRU cache.
+
+    Args:
+        address: Host and port to listen on. Port 0 picks a free port.
+        data: The data, as a DataFrame, a LazyFrame, or a path or glob of Parquet or
+            Arrow IPC files.
+        scores: "Column 1", "Column 2" and "Score" table of the heatmap, e.g. from
+            `compute_mutual_information`.
+        sample_rows: Number of rows of sampled detail charts.
+        cache_size: Number of detail specs kept in the cache.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        data: Source,
+        scores: Source,
+        sample_rows: int = 1000,
+        cache_size: int = 128,
+    ):
+        super().__init__(address, _Handler)
+        self.data = scan(data)
+        self.columns = set(column_names(self.data))
+        self.scores = collect(
+            scan(scores).lazy().select("Column 1", "Column 2", "Score")
+        )
+        self.sample_rows = sample_rows
+        self.cache = _LRUCache(cache_size)
+        self._heatmap = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def page(self) -> bytes:
+        return PAGE.format(
+            vega=alt.VEGA_VERSION,
+            vega_lite=alt.VEGALITE_VERSION,
+            vega_embed=alt.VEGAEMBED_VERSION,
+        ).encode()
+
+    def heatmap(self) -> bytes:
+        if self._heatmap is None:
+            self._heatmap = to_json(plot_heatmap(self.scores)).encode()
+        return self._heatmap
+
+    def detail(self, x: str, y: str, mode: str) -> bytes:
+        "The detail spec of the pair (`x`, `y`), from the cache if it was requested before."
+        return self.cache.get_or_compute(
+            (x, y, mode), lambda: _detail_spec(self, x, y, mode)
+        )
+
+
+@traced
+def _detail_spec(server: DetailServer, x: str, y: str, mode: str) -> bytes:
+    pair = pl.DataFrame(
+        {"Column 1": [x], "Column 2": [y], "Score": [None]},
+        schema={"Column 1": pl.String, "Column 2": pl.String, "Score": pl.Float64},
+    )
+    _, detail = reformat_data(pair, server.data)
+    if mode == "sample" and detail.height > server.sample_rows:
+        stage("sample", rows_in=detail.height)
+        detail = detail.sample(server.sample_rows, seed=0)
+    stage("build", rows_in=detail.height)
+    chart = _detail_chart(detail, x, y, aggregate=mode == "aggregate")
+    return to_json(chart).encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: DetailServer
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == "/":
+            self._send(self.server.page(), "text/html; charset=utf-8")
+        elif url.path == "/spec":
+            self._send(self.server.heatmap(), "application/json")
+        elif url.path == "/detail":
+            x, y, mode = query.get("x"), query.get("y"), query.get("mode", "sample")
+            if x is None or y is None or mode not in MODES:
+                self.send_error(
+                    HTTPStatus.BAD_REQUEST, f"expected x, y and a mode among {MODES}"
+                )
+            elif x not in self.server.columns or y not in self.server.columns:
+                self.send_error(HTTPStatus.NOT_FOUND, "unknown column")
+            else:
+                self._send(self.server.detail(x, y, mode), "application/json")
+        else:
+            self.send_error(HTTPStatus.NOT_FOUND)
+
+    def _send(self, body: bytes, content_type: str) -> None:
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        requested = self.headers.get("If-None-Match", "")
+        if requested == "*" or etag in (tag.strip() for tag in requested.split(",")):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        # Clients may keep responses, but revalidate them with If-None-Match.
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(
+    data: Source,
+    scores: Source | None = None,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    sample_rows: int = 1000,
+    cache_size: int = 128,
+) -> None:
+    """Serve a mutual information heatmap with on-demand detail views until interrupted.
+
+    Args:
+        data: The data, as a DataFrame, a LazyFrame, or a path or glob of Parquet or
+            Arrow IPC files.
+        scores: "Column 1", "Column 2" and "Score" table of the heatmap. Defaults to
+            `compute_mutual_information(data)`.
+        host: Host to listen on.
+        port: Port to listen on.
+        sample_rows: Number of rows of sampled detail charts.
+        cache_size: Number of detail specs kept in the cache.
+    """
+    if scores is None:
+        from .mutual_information import compute_mutual_information
+
+        scores = compute_mutual_information(data)
+    with DetailServer(
+        (host, port), data, scores, sample_rows=sample_rows, cache_size=cache_size
+    ) as server:
+        print(f"Serving on {server.url}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,119 @@
+import hashlib
+import json
+
+import altair as alt
+import polars as pl
+
+from .config import get_config
+from .pre_transform import transform_data
+
+VEGA_LITE_MIMETYPE = "application/vnd.vegalite.v5+json"
+
+# Altair chart classes by the key that identifies their kind of top-level spec.
+_CHART_CLASSES = {
+    "layer": alt.LayerChart,
+    "hconcat": alt.HConcatChart,
+    "vconcat": alt.VConcatChart,
+    "concat": alt.ConcatChart,
+    "facet": alt.FacetChart,
+    "repeat": alt.RepeatChart,
+}
+
+# The theme registry, `alt.themes` before Altair 5.5, which added `alt.theme.get`.
+_THEMES = alt.theme if hasattr(getattr(alt, "theme", None), "get") else alt.themes
+
+
+def dataset_name(df: pl.DataFrame) -> str:
+    """Name the data of `df` after a hash of its content.
+
+    Frames with the same columns and rows get the same name, so that data shared by
+    several views is inlined once. The rows are hashed by Polars rather than by
+    hashing their JSON serialization, as Altair does.
+    """
+    # Categorical hashes depend on the order categories were first seen in.
+    hashable = df.with_columns(pl.col(pl.Categorical).cast(pl.String))
+    digest = hashlib.sha256(repr(df.schema).encode())
+    digest.update(hashable.hash_rows(seed=0, seed_1=1, seed_2=2, seed_3=3).to_numpy())
+    return "data-" + digest.hexdigest()[:32]
+
+
+def field_type(dtype: pl.DataType) -> str:
+    "The Vega-Lite type Altair infers for a column of `dtype`."
+    if dtype.is_numeric():
+        return "quantitative"
+    if dtype.is_temporal():
+        return "temporal"
+    return "nominal"
+
+
+def _replace_data(node, urls: dict[str, dict]):
+    "Copy of `node` referencing the URL data in `urls` instead of their named datasets."
+    if isinstance(node, list):
+        return [_replace_data(item, urls) for item in node]
+    if not isinstance(node, dict):
+        return node
+    return {
+        key: urls[value["name"]]
+        if key == "data" and isinstance(value, dict) and value.get("name") in urls
+        else _replace_data(value, urls)
+        for key, value in node.items()
+    }
+
+
+class Spec:
+    """A Vega-Lite spec built from a template, without Altair chart objects.
+
+    Entry points return a `Spec` when the package-wide `backend` option is "spec". It
+    can be used wherever an Altair chart is accepted for serializing and rendering
+    (`to_json`, `render_chart`, `pre_transform_chart`, notebooks), and converted to an
+    Altair chart with `to_chart` when it needs to be modified.
+
+    Attributes:
+        spec: The spec without its inline data, whose views reference `datasets` by
+            name.
+        datasets: The frames inlined in the spec, by name.
+    """
+
+    def __init__(self, spec: dict, datasets: dict[str, pl.DataFrame]):
+        self.spec = spec
+        self.datasets = datasets
+
+    def to_dict(self, validate: bool | None = None) -> dict:
+        """Return the Vega-Lite spec with its data stored as the data options say.
+
+        Args:
+            validate: Whether to validate the spec against the Vega-Lite schema.
+                Defaults to the package-wide `debug` option.
+        """
+        datasets, urls = {}, {}
+        for name, df in self.datasets.items():
+            data = transform_data(df)
+            if "values" in data:
+                datasets[name] = data["values"]
+            else:
+                urls[name] = data
+        spec = {
+            "$schema": alt.SCHEMA_URL,
+            **_THEMES.get()(),
+            **(_replace_data(self.spec, urls) if urls else self.spec),
+        }
+        if datasets:
+            spec["datasets"] = datasets
+        if validate is None:
+            validate = get_config().debug
+        if validate:
+            alt.TopLevelSpec.validate(spec)
+        return spec
+
+    def to_json(self, indent: int | None = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def to_chart(self) -> alt.TopLevelMixin:
+        "Build the equivalent Altair chart."
+        cls = next((c for key, c in _CHART_CLASSES.items() if key in self.spec), None)
+        return (cls or alt.Chart).from_dict(
+            self.to_dict(validate=False), validate=get_config().debug
+        )
+
+    def _repr_mimebundle_(self, include=None, exclude=None):
+        return {VEGA_LITE_MIMETYPE: self.to_dict()}
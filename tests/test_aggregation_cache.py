@@ -0,0 +1,78 @@
+import polars as pl
+import pytest
+
+from lpm_plot import (
+    AggregationCache,
+    disable_aggregation_cache,
+    enable_aggregation_cache,
+    plot_marginal_1d,
+)
+from lpm_plot.aggregation_cache import frame_fingerprint
+from lpm_plot.plot_marginal import prepare_2d_marginal_data
+
+
+@pytest.fixture
+def session_cache():
+    cache = enable_aggregation_cache()
+    yield cache
+    disable_aggregation_cache()
+
+
+def test_frame_fingerprint():
+    df = pl.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]})
+    assert frame_fingerprint(df) == frame_fingerprint(df.clone())
+    assert frame_fingerprint(df) != frame_fingerprint(df.reverse())
+    assert frame_fingerprint(df) != frame_fingerprint(df.head(2))
+    assert frame_fingerprint(df) != frame_fingerprint(df.cast({"a": pl.Int32}))
+
+
+def test_counts_are_cached():
+    cache = AggregationCache()
+    df = pl.DataFrame({"a": ["x", "x", None], "b": ["u", "v", "v"]})
+    counts = cache.counts(df, ["a"]).sort("a", nulls_last=True)
+    assert counts.rows() == [("x", 2), (None, 1)]
+    assert (cache.hits, cache.misses) == (0, 1)
+    cache.counts_many(df, [["a"], ["a", "b"]])
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_cache_evicts_least_recently_used():
+    df = pl.DataFrame({"a": list(range(100)), "b": list(range(100))})
+    size = AggregationCache().counts(df, ["a"]).estimated_size()
+    cache = AggregationCache(max_bytes=2 * size)
+    cache.counts(df, ["a"])
+    cache.counts(df, ["b"])
+    cache.counts(df, ["a"])
+    cache.counts(df, ["a", "b"])
+    assert len(cache) == 1
+    assert cache.nbytes <= cache.max_bytes
+
+
+def test_marginal_plots_share_counts(session_cache):
+    observed_df = pl.read_csv("tests/resources/hand-written-observed.csv")
+    synthetic_df = pl.read_csv("tests/resources/hand-written-synthetic.csv")
+
+    plot_marginal_1d(observed_df, synthetic_df, ["foo", "bar"])
+    assert session_cache.misses == 4
+    plot_marginal_1d(observed_df, synthetic_df, ["foo", "bar", "quagga"])
+    assert (session_cache.hits, session_cache.misses) == (4, 6)
+
+    combined_df = prepare_2d_marginal_data(observed_df, synthetic_df, "foo", "bar")
+    assert combined_df.equals(
+        prepare_2d_marginal_data(observed_df, synthetic_df, "foo", "bar")
+    )
+    assert session_cache.misses == 8
+
+
+def test_prepare_2d_marginal_data_frequencies():
+    observed_df = pl.DataFrame({"x": ["a", "a", "b", "b"], "y": ["u", "u", "u", "v"]})
+    synthetic_df = pl.DataFrame({"x": ["a", "b"], "y": ["v", "v"]})
+    result = prepare_2d_marginal_data(observed_df, synthetic_df, "x", "y")
+    assert result.columns == ["Source", "x", "y", "count", "Normalized frequency"]
+    assert sorted(result.rows()) == [
+        ("Observed", "a", "u", 2, 0.5),
+        ("Observed", "b", "u", 1, 0.25),
+        ("Observed", "b", "v", 1, 0.25),
+        ("Synthetic", "a", "v", 1, 0.5),
+        ("Synthetic", "b", "v", 1, 0.5),
+    ]
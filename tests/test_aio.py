@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import time
+
+import altair
+import pytest
+
+from lpm_plot import AsyncPlotter, config_context
+
+
+def test_entry_point_runs_off_the_loop():
+    async def main():
+        async with AsyncPlotter(max_workers=2) as plotter:
+            with config_context(precision=2):
+                return await plotter.plot_lines({"a": [0.123456, 1.0]})
+
+    chart = asyncio.run(main())
+    assert isinstance(chart, altair.Chart)
+    # The options where the call was awaited apply in the worker thread.
+    assert [row["y"] for row in chart.data.values] == [0.12, 1.0]
+
+
+def test_timeout():
+    async def main():
+        async with AsyncPlotter(timeout=0.05) as plotter:
+            with pytest.raises(TimeoutError):
+                await plotter.run(time.sleep, 1)
+            # A per-call timeout overrides the default one.
+            await plotter.run(time.sleep, 0.1, timeout=1)
+
+    asyncio.run(main())
+
+
+def test_heavy_calls_are_bounded():
+    running, peak = 0, 0
+    lock = threading.Lock()
+
+    def heavy_work():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+
+    async def main():
+        nonlocal peak
+        async with AsyncPlotter(max_workers=4, max_heavy=2) as plotter:
+            await asyncio.gather(
+                *(plotter.run(heavy_work, heavy=True) for _ in range(6))
+            )
+            assert peak == 2
+            # Light calls are only bounded by the executor.
+            peak = 0
+            await asyncio.gather(*(plotter.run(heavy_work) for _ in range(4)))
+            assert peak == 4
+
+    asyncio.run(main())
+
+
+def test_timed_out_heavy_calls_keep_their_slot():
+    running, peak = 0, 0
+    lock = threading.Lock()
+
+    def heavy_work():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.1)
+        with lock:
+            running -= 1
+
+    async def main():
+        async with AsyncPlotter(max_workers=5, max_heavy=1) as plotter:
+            for _ in range(5):
+                with pytest.raises(TimeoutError):
+                    await plotter.run(heavy_work, heavy=True, timeout=0.02)
+            # Wait for the calls still running in the executor.
+            await plotter.run(heavy_work, heavy=True)
+            assert peak == 1
+
+    asyncio.run(main())
+
+
+def test_cancellation():
+    async def main():
+        async with AsyncPlotter(max_workers=1, max_heavy=1) as plotter:
+            task = asyncio.create_task(plotter.run(time.sleep, 0.2, heavy=True))
+            queued = asyncio.create_task(plotter.run(time.sleep, 0.2, heavy=True))
+            await asyncio.sleep(0.01)
+            queued.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await queued
+            await task
+            # The cancelled call never held a heavy slot.
+            assert not plotter.heavy.locked()
+
+    asyncio.run(main())
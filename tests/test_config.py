@@ -0,0 +1,94 @@
+import json
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import altair
+import polars as pl
+import pytest
+
+from lpm_plot import config_context, get_config, plot_lines, set_config, to_json
+
+DATA = {"a": [0.123456, 1.0], "b": [2.5, 3.75]}
+
+
+def test_config_context_is_local_to_threads():
+    barrier = threading.Barrier(2)
+
+    def build(precision):
+        with config_context(precision=precision):
+            # Both threads are inside their context before either builds its chart.
+            barrier.wait()
+            return plot_lines(DATA).to_dict()["datasets"]
+
+    with ThreadPoolExecutor(2) as pool:
+        rounded, exact = pool.map(build, [2, None])
+    values = [row["y"] for rows in rounded.values() for row in rows]
+    assert 0.12 in values and 0.123456 not in values
+    values = [row["y"] for rows in exact.values() for row in rows]
+    assert 0.123456 in values
+    assert get_config().precision is None
+
+
+def test_config_context_overrides_package_options():
+    set_config(compact_json=True)
+    try:
+        with config_context(compact_json=False) as config:
+            assert get_config() is config
+            assert not config.compact_json
+        assert get_config().compact_json
+    finally:
+        set_config(compact_json=False)
+
+
+def test_max_rows():
+    with config_context(max_rows=3), pytest.raises(altair.MaxRowsError):
+        plot_lines(DATA)
+    plot_lines(DATA).to_dict()
+
+
+@pytest.mark.parametrize("backend", ["altair", "spec"])
+def test_url_data(tmp_path, backend):
+    with config_context(backend=backend, data_transformer="json", data_dir=tmp_path):
+        spec = json.loads(to_json(plot_lines(DATA)))
+    assert "datasets" not in spec
+    url = spec["data"]["url"]
+    assert url.startswith(str(tmp_path))
+    with open(url) as f:
+        assert len(json.load(f)) == 4
+
+
+def test_data_transformer_of_the_user_is_kept():
+    # Importing the package does not switch Altair's transformer.
+    code = "import altair, lpm_plot.plot_lines; print(altair.data_transformers.active)"
+    imported = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert imported.stdout.strip() == "default"
+
+    altair.data_transformers.register("user", lambda data: {"url": "user.json"})
+    with altair.data_transformers.enable("user"):
+        with config_context(max_rows=3):
+            assert altair.data_transformers.active == "user"
+        # Charts of the package store their data as the options say, and unrelated
+        # charts go through the transformer of the user.
+        assert "url" not in plot_lines(DATA).to_dict()["data"]
+        assert "url" in altair.Chart(pl.DataFrame(DATA)).mark_line().to_dict()["data"]
+        assert altair.data_transformers.active == "user"
+
+
+def test_large_charts_ignore_the_altair_row_limit():
+    # More than the 5000 rows Altair's default transformer accepts.
+    data = {f"s{i}": list(range(1000)) for i in range(6)}
+    assert altair.data_transformers.active == "default"
+    assert len(plot_lines(data).to_dict()["datasets"]) == 1
+    assert plot_lines(data)._repr_mimebundle_()
+
+
+def test_unknown_data_transformer():
+    with (
+        pytest.raises(ValueError, match="data_transformer must be one of"),
+        config_context(data_transformer="parquet"),
+    ):
+        pass
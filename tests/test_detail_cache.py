@@ -0,0 +1,73 @@
+import importlib
+
+import polars as pl
+
+from lpm_plot import DetailCache, reformat_data
+
+# The module, rather than the function of the same name exported by the package.
+plot_heatmap = importlib.import_module("lpm_plot.plot_heatmap")
+
+HEATMAP = pl.DataFrame(
+    {
+        "Column 1": ["a", "a", "b"],
+        "Column 2": ["a", "b", "c"],
+        "Score": [None, 0.5, 0.25],
+    }
+)
+DATA = pl.DataFrame(
+    {"a": [1.0, 2.0, 3.0, 4.0], "b": list("wxyz"), "c": [1, 2, None, 4]}
+)
+
+
+def count_builds(monkeypatch):
+    calls = []
+    collect = plot_heatmap.collect
+
+    def counting_collect(df):
+        calls.append(df)
+        return collect(df)
+
+    monkeypatch.setattr(plot_heatmap, "collect", counting_collect)
+    return calls
+
+
+def test_detail_cache_reuses_tables(tmp_path, monkeypatch):
+    expected = reformat_data(HEATMAP, DATA)
+    calls = count_builds(monkeypatch)
+
+    heatmap_df, detail_df = reformat_data(HEATMAP, DATA, cache=DetailCache(tmp_path))
+    assert heatmap_df.equals(expected[0])
+    assert detail_df.equals(expected[1])
+    assert [p.suffix for p in tmp_path.iterdir()] == [".arrow"]
+    built = len(calls)
+
+    # A new session reads the table back instead of rebuilding it.
+    heatmap_df, detail_df = reformat_data(HEATMAP, DATA, cache=DetailCache(tmp_path))
+    assert len(calls) == built + 1
+    assert heatmap_df.equals(expected[0])
+    assert detail_df.equals(expected[1])
+
+
+def test_detail_cache_keys(tmp_path):
+    cache = DetailCache(tmp_path)
+    reformat_data(HEATMAP, DATA, cache=cache)
+    reformat_data(HEATMAP, DATA, data_margin=0.5, cache=cache)
+    reformat_data(HEATMAP, DATA.with_columns(pl.col("a") * 2), cache=cache)
+    reformat_data(HEATMAP, DATA.with_columns(d=pl.lit(0)), cache=cache)
+    assert len(list(tmp_path.iterdir())) == 3
+
+    # Frames differing in a single row outside any sample get their own table.
+    data = pl.DataFrame({"a": [float(i) for i in range(5000)], "b": ["x"] * 5000})
+    reformat_data(HEATMAP.head(2), data, cache=cache)
+    changed = data.with_columns(
+        pl.when(pl.int_range(pl.len()) == 1).then(-1.0).otherwise("a").alias("a")
+    )
+    reformat_data(HEATMAP.head(2), changed, cache=cache)
+    assert len(list(tmp_path.iterdir())) == 5
+
+    # LazyFrames are not cached.
+    reformat_data(HEATMAP, DATA.lazy(), data_margin=0.25, cache=cache)
+    assert len(list(tmp_path.iterdir())) == 5
+
+    cache.clear()
+    assert cache.size() == 0
@@ -0,0 +1,128 @@
+import numpy as np
+import polars as pl
+import pytest
+
+from lpm_plot import compute_fidelity, plot_fidelity
+
+
+@pytest.fixture
+def frames():
+    observed_df = pl.read_csv("tests/resources/hand-written-observed.csv")
+    synthetic_df = pl.read_csv("tests/resources/hand-written-synthetic.csv")
+    return observed_df, synthetic_df
+
+
+def reference_metrics(observed_df, synthetic_df, a, b):
+    "Metrics of one pair computed directly from joined probability tables."
+
+    def probabilities(df, name):
+        return (
+            df.drop_nulls([a, b])
+            .group_by(a, b)
+            .len()
+            .select(a, b, (pl.col("len") / pl.col("len").sum()).alias(name))
+        )
+
+    joined = (
+        probabilities(observed_df, "p")
+        .join(probabilities(synthetic_df, "q"), on=[a, b], how="full", coalesce=True)
+        .fill_null(0.0)
+    )
+    p, q = joined["p"].to_numpy(), joined["q"].to_numpy()
+    m = (p + q) / 2
+    nonzero_p, nonzero_q = p > 0, q > 0
+    return {
+        "tvd": 0.5 * np.abs(p - q).sum(),
+        "kl": np.sum(
+            p[nonzero_p] * np.log(p[nonzero_p] / np.maximum(q[nonzero_p], 1e-10))
+        ),
+        "js": 0.5 * np.sum(p[nonzero_p] * np.log(p[nonzero_p] / m[nonzero_p]))
+        + 0.5 * np.sum(q[nonzero_q] * np.log(q[nonzero_q] / m[nonzero_q])),
+    }
+
+
+def test_compute_fidelity_matches_reference(frames):
+    observed_df, synthetic_df = frames
+    fidelity_df = compute_fidelity(observed_df, synthetic_df, model="LPM")
+    assert fidelity_df.columns == [
+        "column-1",
+        "column-2",
+        "tvd",
+        "kl",
+        "js",
+        "model",
+        "index",
+    ]
+    assert fidelity_df["index"].to_list() == [0, 1, 2]
+    assert fidelity_df["tvd"].is_sorted()
+    for row in fidelity_df.iter_rows(named=True):
+        expected = reference_metrics(
+            observed_df, synthetic_df, row["column-1"], row["column-2"]
+        )
+        for metric, value in expected.items():
+            assert row[metric] == pytest.approx(value)
+    plot_fidelity(fidelity_df, metric="js").to_dict()
+
+
+def test_compute_fidelity_bins_numerical_columns():
+    rng = np.random.default_rng(0)
+    df = pl.DataFrame(
+        {"x": rng.normal(size=2000), "c": rng.choice(["a", "b", "c"], size=2000)}
+    )
+    fidelity_df = compute_fidelity(df, df.reverse(), pairs=[("x", "c")])
+    assert fidelity_df["tvd"].to_list() == [pytest.approx(0.0)]
+    shifted = compute_fidelity(df, df.with_columns(pl.col("x") + 1), pairs=[("x", "c")])
+    assert shifted["tvd"][0] > 0.3
+
+
+def test_compute_fidelity_high_cardinality():
+    # Dense contingency tables of these pairs would hold 60k x 60k cells.
+    rng = np.random.default_rng(0)
+    n = 200_000
+    df = pl.DataFrame(
+        {
+            "a": rng.integers(0, 60_000, size=n).astype(str),
+            "b": rng.integers(0, 60_000, size=n).astype(str),
+        }
+    )
+    fidelity_df = compute_fidelity(df, df.reverse(), bootstrap=10, seed=0)
+    assert fidelity_df["tvd"].to_list() == [pytest.approx(0.0)]
+    assert fidelity_df["kl"].to_list() == [pytest.approx(0.0)]
+
+
+def test_compute_fidelity_unknown_metric(frames):
+    with pytest.raises(ValueError, match="metrics must be among"):
+        compute_fidelity(*frames, metrics=["hellinger"])
+
+
+def test_compute_fidelity_bootstrap_contains_estimate():
+    rng = np.random.default_rng(0)
+
+    def frame(n):
+        return pl.DataFrame({f"c{i}": rng.integers(0, 8, size=n) for i in range(8)})
+
+    fidelity_df = compute_fidelity(frame(2000), frame(2000), bootstrap=100, seed=0)
+    assert fidelity_df.height == 28
+    for name in ["tvd", "kl", "js"]:
+        lower, value = fidelity_df[f"{name}_lower"], fidelity_df[name]
+        upper = fidelity_df[f"{name}_upper"]
+        assert (lower <= value).all()
+        assert (value <= upper).all()
+        assert (lower < upper).all()
+
+
+def test_compute_fidelity_bootstrap(frames):
+    fidelity_df = compute_fidelity(*frames, metrics=["tvd"], bootstrap=200, seed=0)
+    assert fidelity_df.columns[2:5] == ["tvd", "tvd_lower", "tvd_upper"]
+    assert (fidelity_df["tvd_lower"] < fidelity_df["tvd_upper"]).all()
+    assert (fidelity_df["tvd_lower"] <= fidelity_df["tvd"]).all()
+    assert (fidelity_df["tvd"] <= fidelity_df["tvd_upper"]).all()
+    assert fidelity_df.equals(
+        compute_fidelity(*frames, metrics=["tvd"], bootstrap=200, seed=0)
+    )
+
+    spec = plot_fidelity(fidelity_df).to_dict()
+    band = spec["layer"][0]
+    assert band["mark"]["type"] == "errorband"
+    assert band["encoding"]["y"]["field"] == "tvd_lower"
+    assert band["encoding"]["y2"]["field"] == "tvd_upper"
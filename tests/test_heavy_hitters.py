@@ -0,0 +1,77 @@
+import pickle
+
+import numpy as np
+import polars as pl
+import pytest
+
+from lpm_plot import HeavyHitters, count_heavy_hitters, plot_marginal_1d
+from lpm_plot.plot_marginal import prepare_2d_marginal_data
+
+
+@pytest.fixture
+def df():
+    values = np.random.default_rng(0).zipf(1.5, size=200_000)
+    return pl.DataFrame({"c": values.astype(str), "d": values % 3})
+
+
+def within_bounds(estimates, exact, column):
+    "Whether every true count is within the reported error of its estimate."
+    joined = estimates.rename({"value": column}).join(exact, on=column)
+    return (
+        joined["len"].le(joined["count"]).all()
+        and joined["len"].ge(joined["count"] - joined["error"]).all()
+    )
+
+
+def test_heavy_hitters_bounds(df):
+    sketch = HeavyHitters(capacity=20, width=256)
+    for batch in df.iter_slices(10_000):
+        sketch.update(batch["c"])
+    exact = df.group_by("c").len()
+    assert sketch.count == df.height
+    top = sketch.top(10)
+    assert top["value"].to_list() == [str(i) for i in range(1, 11)]
+    assert within_bounds(top, exact, "c")
+    # Rare values are bounded by the Count-Min sketch.
+    assert within_bounds(sketch.estimate(exact["c"].head(1000)), exact, "c")
+    assert sketch.distinct() == pytest.approx(exact.height, rel=0.05)
+
+
+def test_heavy_hitters_merge(df):
+    parts = [HeavyHitters(capacity=50).update(s["c"]) for s in df.iter_slices(30_000)]
+    merged = HeavyHitters(capacity=50)
+    for part in parts:
+        merged.merge(pickle.loads(pickle.dumps(part)))
+    assert merged.count == df.height
+    assert within_bounds(merged.top(20), df.group_by("c").len(), "c")
+    with pytest.raises(ValueError, match="different parameters"):
+        merged.merge(HeavyHitters(width=16))
+
+
+def test_count_heavy_hitters(tmp_path, df):
+    path = tmp_path / "data.parquet"
+    df.write_parquet(path)
+    sketches = count_heavy_hitters(
+        path, ["c", ("c", "d")], partition_rows=40_000, max_workers=2
+    )
+    assert sketches["c"].top(1)["value"].to_list() == ["1"]
+    assert sketches[("c", "d")].top(1)["value"].to_list() == [{"c": "1", "d": 1}]
+    with pytest.raises(KeyError):
+        count_heavy_hitters(df, ["missing"])
+
+
+def test_top_k_matches_exact_counts():
+    df = pl.DataFrame({"a": list("aabbbc"), "b": [1, 1, 2, 2, 2, 3]})
+    exact = prepare_2d_marginal_data(df, df.reverse(), "a", "b")
+    approximate = prepare_2d_marginal_data(df, df.reverse(), "a", "b", top_k=10)
+    assert approximate.drop("error").equals(exact)
+    assert approximate["error"].sum() == 0
+
+    chart = plot_marginal_1d(df, df, ["a"], top_k=2).to_dict()
+    observed = chart["vconcat"][0]["hconcat"][0]
+    assert observed["title"].startswith("Top 2 of ~3 values")
+    assert sorted(chart["datasets"][chart["vconcat"][0]["data"]["name"]][0]) == [
+        "a",
+        "count",
+        "data_source",
+    ]
@@ -0,0 +1,23 @@
+import subprocess
+import sys
+
+import lpm_plot
+
+HEAVY_MODULES = ["altair", "polars", "numpy", "scipy", "vegafusion", "vl_convert"]
+
+
+def test_import_is_lazy():
+    # Run in a fresh interpreter, as other tests have already imported everything.
+    code = (
+        "import sys, lpm_plot; "
+        f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    )
+    output = subprocess.check_output([sys.executable, "-c", code], text=True)
+    assert output.strip() == "[]"
+
+
+def test_exports_resolve():
+    for name in lpm_plot.__all__:
+        assert getattr(lpm_plot, name) is not None
+    assert callable(lpm_plot.plot_heatmap)
+    assert callable(lpm_plot.plot_lines)
@@ -0,0 +1,65 @@
+import json
+
+import polars as pl
+
+from lpm_plot import (
+    add_span_callback,
+    plot_heatmap,
+    remove_span_callback,
+    to_json,
+    trace,
+)
+from lpm_plot.plot_marginal import plot_marginal_1d
+
+
+def test_trace_records_entry_point_stages(tmp_path):
+    df = pl.read_csv("tests/resources/heatmap-test-data.csv")
+    detailed_df = pl.read_csv("tests/resources/heatmap-detailed-test-data.csv")
+    path = tmp_path / "trace.json"
+
+    with trace(path) as recorded:
+        chart = plot_heatmap(df, detailed_df)
+        to_json(chart)
+
+    spans = {s.name: s for s in recorded.spans}
+    assert list(spans) == [
+        "plot_heatmap.cluster",
+        "plot_heatmap.build",
+        "plot_heatmap.detail_counts",
+        "plot_heatmap.build_detail",
+        "plot_heatmap",
+        "to_json.to_dict",
+        "to_json.validate",
+        "to_json.serialize",
+        "to_json",
+    ]
+    assert spans["plot_heatmap.cluster"].rows_in == df.height
+    assert spans["plot_heatmap.detail_counts"].rows_in == detailed_df.height
+    assert spans["to_json.serialize"].bytes > 0
+    outer = spans["plot_heatmap"]
+    for name in ["cluster", "build", "detail_counts", "build_detail"]:
+        inner = spans[f"plot_heatmap.{name}"]
+        assert outer.start <= inner.start
+        assert inner.start + inner.duration <= outer.start + outer.duration
+
+    events = json.loads(path.read_text())["traceEvents"]
+    assert events[0]["name"] == "plot_heatmap"
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
+
+
+def test_span_callback():
+    observed_df = pl.read_csv("tests/resources/hand-written-observed.csv")
+    spans = []
+    add_span_callback(spans.append)
+    try:
+        plot_marginal_1d(observed_df, observed_df, ["foo", "bar"])
+    finally:
+        remove_span_callback(spans.append)
+    plot_marginal_1d(observed_df, observed_df, ["foo"])
+
+    aggregate, _, outer = spans
+    assert outer.name == "plot_marginal_1d"
+    assert aggregate.rows_in == 2 * observed_df.height
+    assert aggregate.rows_out == 2 * (
+        observed_df["foo"].n_unique() + observed_df["bar"].n_unique()
+    )
@@ -0,0 +1,92 @@
+import numpy as np
+import polars as pl
+import pytest
+
+from lpm_plot import MarginalAccumulator, plot_marginal_1d
+from lpm_plot.plot_marginal import prepare_2d_marginal_data
+
+
+@pytest.fixture
+def frames():
+    observed_df = pl.read_csv("tests/resources/hand-written-observed.csv")
+    synthetic_df = pl.read_csv("tests/resources/hand-written-synthetic.csv")
+    return observed_df, synthetic_df
+
+
+def accumulate(df, batch_size=3, **kwargs):
+    accumulator = MarginalAccumulator(**kwargs)
+    for batch in df.iter_slices(batch_size):
+        accumulator.update(batch)
+    return accumulator
+
+
+def test_accumulator_matches_full_frame(frames):
+    observed_df, synthetic_df = frames
+    columns = ["foo", "bar", "quagga"]
+    accumulator = accumulate(synthetic_df, columns=columns)
+    assert accumulator.height == synthetic_df.height
+    assert (
+        plot_marginal_1d(observed_df, accumulator, columns).to_dict()
+        == plot_marginal_1d(observed_df, synthetic_df, columns).to_dict()
+    )
+
+
+def test_accumulator_pairs(frames):
+    observed_df, synthetic_df = frames
+    accumulator = accumulate(synthetic_df, pairs=[("foo", "bar")])
+    expected = prepare_2d_marginal_data(observed_df, synthetic_df, "bar", "foo")
+    result = prepare_2d_marginal_data(observed_df, accumulator, "bar", "foo")
+    assert result.sort(pl.all()).equals(expected.sort(pl.all()))
+    with pytest.raises(KeyError):
+        accumulator.counts(["foo"])
+
+
+def test_accumulator_histogram():
+    values = np.random.default_rng(0).normal(size=1000)
+    df = pl.DataFrame({"x": values}).with_columns(
+        pl.when(pl.int_range(pl.len()) % 10 == 0).then(None).otherwise("x").alias("x")
+    )
+    edges = [-2.0, -1.0, 0.0, 1.0, 2.0]
+    accumulator = accumulate(df, batch_size=64, edges={"x": edges})
+    expected, _ = np.histogram(df["x"].drop_nulls().to_numpy(), bins=edges)
+    histogram = accumulator.histogram("x")
+    assert histogram["count"].to_list() == expected.tolist()
+    assert histogram["bin_start"].to_list() == edges[:-1]
+
+
+def test_accumulator_histogram_is_plotted():
+    rng = np.random.default_rng(0)
+    observed_df = pl.DataFrame({"x": rng.normal(size=500), "c": ["a", "b"] * 250})
+    synthetic_df = pl.DataFrame({"x": rng.normal(size=300), "c": ["b", "c"] * 150})
+    edges = [-2.0, -1.0, 0.0, 1.0, 2.0]
+    accumulator = accumulate(
+        synthetic_df, batch_size=64, columns=["c"], edges={"x": edges}
+    )
+
+    chart = plot_marginal_1d(observed_df, accumulator, ["x", "c"])
+    (rows,) = (
+        rows
+        for rows in chart.to_dict()["datasets"].values()
+        if rows and "bin_start" in rows[0]
+    )
+    for source, df in (("observed", observed_df), ("synthetic", synthetic_df)):
+        expected, _ = np.histogram(df["x"].to_numpy(), bins=edges)
+        counts = [row for row in rows if row["data_source"] == source]
+        assert [row["bin_start"] for row in counts] == edges[:-1]
+        assert [row["bin_end"] for row in counts] == edges[1:]
+        assert [row["count"] for row in counts] == expected.tolist()
+    encoding = chart.to_dict()["vconcat"][0]["hconcat"][0]["encoding"]
+    assert encoding["x"] == {
+        "bin": "binned",
+        "field": "bin_start",
+        "title": "x",
+        "type": "quantitative",
+    }
+    assert encoding["x2"] == {"field": "bin_end"}
+
+    models = plot_marginal_1d(observed_df, {"a": accumulator, "b": synthetic_df}, ["x"])
+    (rows,) = models.to_dict()["datasets"].values()
+    assert {row["data_source"] for row in rows} == {"Observed", "a", "b"}
+    assert sum(row["count"] for row in rows if row["data_source"] == "a") == sum(
+        row["count"] for row in rows if row["data_source"] == "b"
+    )
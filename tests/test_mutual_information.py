@@ -0,0 +1,57 @@
+import altair
+import numpy as np
+import polars as pl
+import pytest
+
+from lpm_plot import compute_mutual_information, plot_heatmap
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=5000)
+    return pl.DataFrame(
+        {
+            "x": x,
+            "sign": np.where(x > 0, "pos", "neg"),
+            "noise": rng.choice(["a", "b", "c"], size=5000),
+            "copy": np.where(x > 0, "pos", "neg"),
+        }
+    ).with_columns(
+        pl.when(pl.int_range(pl.len()) % 7 == 0)
+        .then(None)
+        .otherwise(pl.col("noise"))
+        .alias("noise")
+    )
+
+
+def test_mutual_information_table(df):
+    mi = compute_mutual_information(df, max_workers=2)
+    assert mi.height == 16
+    scores = {(a, b): score for a, b, score in mi.iter_rows()}
+    for a in df.columns:
+        assert scores[(a, a)] is None
+        for b in df.columns:
+            assert scores[(a, b)] == scores[(b, a)]
+    assert scores[("sign", "copy")] == pytest.approx(1.0)
+    assert scores[("sign", "noise")] < 0.01
+    assert 0.2 < scores[("x", "sign")] < 1.0
+    assert isinstance(plot_heatmap(mi), altair.TopLevelMixin)
+
+
+def test_mutual_information_unnormalized(df):
+    mi = compute_mutual_information(df, columns=["sign", "copy"], normalization=None)
+    score = mi.filter(pl.col("Column 1") != pl.col("Column 2"))["Score"][0]
+    # The mutual information of a column with a copy of itself is its entropy.
+    p = df["sign"].value_counts()["count"].to_numpy() / df.height
+    assert score == pytest.approx(-(p * np.log(p)).sum())
+
+
+def test_mutual_information_high_cardinality():
+    # A dense contingency table of these columns would have 10**10 cells.
+    n = 100_000
+    ids = np.arange(n)
+    df = pl.DataFrame({"id": ids.astype(str), "copy": (ids[::-1]).astype(str)})
+    mi = compute_mutual_information(df, normalization="sqrt")
+    score = mi.filter(pl.col("Column 1") != pl.col("Column 2"))["Score"][0]
+    assert score == pytest.approx(1.0)
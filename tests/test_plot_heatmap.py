@@ -1,7 +1,7 @@
 import altair
 import polars as pl
 
-from lpm_plot import plot_heatmap
+from lpm_plot import plot_heatmap, reformat_data
 
 
 def test_plot_heatmap_smoke():
@@ -31,6 +31,57 @@ def test_cluster_order():
     assert sort_order == ["num1", "num2", "cat1", "cat2"]
 
 
+def test_reformat_data_mixed_types():
+    heatmap_df = pl.read_csv("tests/resources/heatmap-test-data.csv")
+    all_data = pl.DataFrame(
+        {
+            "num1": [1.5, 2.0, None, 4.0],
+            "num2": [1, 2, 3, 4],
+            "cat1": ["a", "b", "a", "b"],
+            "cat2": ["x", "y", "y", None],
+            "unused": [0, 0, 0, 0],
+        }
+    )
+    _, detail_df = reformat_data(heatmap_df, all_data.lazy(), data_margin=0.75)
+    assert detail_df.schema == dict.fromkeys(
+        ["Column 1", "Column 2", "comparison_type", "x_data", "y_data"], pl.String
+    )
+    num_cat = detail_df.filter(
+        (pl.col("Column 1") == "num1") & (pl.col("Column 2") == "cat2")
+    )
+    assert num_cat["comparison_type"].to_list() == ["num-cat", "num-cat"]
+    assert num_cat["x_data"].to_list() == ["1.5", "2.0"]
+    assert num_cat["y_data"].to_list() == ["x", "y"]
+    assert detail_df.filter(pl.col("comparison_type") == "same-same").height == 4
+
+
+def test_plot_heatmap_fills_missing_category_combos():
+    df = pl.DataFrame(
+        {
+            "Column 1": ["A", "A", "B", "B"],
+            "Column 2": ["A", "B", "B", "A"],
+            "Score": [None, 0.5, None, 0.5],
+        }
+    )
+    detailed_df = pl.LazyFrame(
+        {
+            "Column 1": ["A", "A", "A"],
+            "Column 2": ["B", "B", "B"],
+            "comparison_type": ["cat-cat", "cat-cat", "cat-cat"],
+            "x_data": ["x", "x", "y"],
+            "y_data": ["u", "u", "v"],
+        }
+    )
+    spec = plot_heatmap(df, detailed_df).to_dict()
+    detail_values = max(spec["datasets"].values(), key=len)
+    frequencies = {
+        (row["x_data"], row["y_data"]): row["Frequency"]
+        for row in detail_values
+        if row["comparison_type"] == "cat-cat"
+    }
+    assert frequencies == {("x", "u"): 2, ("y", "v"): 1, ("x", "v"): 0, ("y", "u"): 0}
+
+
 # %%
 if __name__ == "__main__":
     import polars as pl
@@ -1,7 +1,13 @@
 import altair
 import polars as pl
+import pytest
 
-from lpm_plot import plot_marginal_1d, plot_marginal_2d
+from lpm_plot import (
+    plot_marginal_1d,
+    plot_marginal_2d,
+    plot_marginal_numerical_categorical,
+)
+from lpm_plot.plot_marginal import prepare_2d_marginal_data
 
 
 def test_plot_marginal_1d_smoke():
@@ -56,6 +62,114 @@ def test_plot_marginal_2d_smoke():
     )
 
 
+def test_plot_marginal_sources_share_datasets():
+    observed_df = pl.read_csv("tests/resources/hand-written-observed.csv")
+    synthetic_df = pl.read_csv("tests/resources/hand-written-synthetic.csv")
+    columns = ["foo", "bar", "quagga"]
+    spec = plot_marginal_1d(observed_df, synthetic_df, columns).to_dict()
+    # One dataset of both sources' counts per column, and the legend's.
+    assert len(spec["datasets"]) == len(columns) + 1
+    first = spec["vconcat"][0]
+    assert first["data"]["name"] in spec["datasets"]
+    assert [c["transform"] for c in first["hconcat"]] == [
+        [{"filter": "(datum.data_source === 'observed')"}],
+        [{"filter": "(datum.data_source === 'synthetic')"}],
+    ]
+
+    combined_df = prepare_2d_marginal_data(observed_df, synthetic_df, "foo", "bar")
+    spec = plot_marginal_2d(combined_df, "foo", "bar").to_dict()
+    assert len(spec["datasets"]) == 1
+    assert spec["data"]["name"] in spec["datasets"]
+
+
+def test_plot_marginal_1d_lazy_matches_eager():
+    observed_df = pl.read_csv("tests/resources/hand-written-observed.csv")
+    synthetic_df = pl.read_csv("tests/resources/hand-written-synthetic.csv")
+    columns = ["foo", "bar"]
+    eager = plot_marginal_1d(observed_df, synthetic_df, columns)
+    lazy = plot_marginal_1d(observed_df.lazy(), synthetic_df.lazy(), columns)
+    assert lazy.to_dict() == eager.to_dict()
+
+
+def test_plot_marginal_numerical_categorical_inlines_plotted_columns():
+    observed_df = pl.read_csv("tests/resources/num-cat-observed.csv").with_columns(
+        pl.lit("unused").alias("extra")
+    )
+    synthetic_df = pl.read_csv("tests/resources/num-cat-synthetic.csv").with_columns(
+        pl.lit("unused").alias("extra")
+    )
+    eager = plot_marginal_numerical_categorical(
+        observed_df, synthetic_df, "class", "data"
+    )
+    lazy = plot_marginal_numerical_categorical(
+        observed_df.lazy(), synthetic_df.lazy(), "class", "data"
+    )
+    spec = lazy.to_dict()
+    assert spec == eager.to_dict()
+    (values,) = spec["datasets"].values()
+    assert set(values[0]) == {"class", "data", "dataset"}
+
+
+def test_plot_marginal_1d_scans_paths(tmp_path):
+    observed_df = pl.read_csv("tests/resources/hand-written-observed.csv")
+    synthetic_df = pl.read_csv("tests/resources/hand-written-synthetic.csv")
+    (tmp_path / "synthetic").mkdir()
+    half = synthetic_df.height // 2
+    synthetic_df[:half].write_parquet(tmp_path / "synthetic" / "part-0.parquet")
+    synthetic_df[half:].write_parquet(tmp_path / "synthetic" / "part-1.parquet")
+    observed_df.write_ipc(tmp_path / "observed.arrow")
+
+    columns = ["foo", "bar"]
+    expected = plot_marginal_1d(observed_df, synthetic_df, columns).to_dict()
+    for synthetic in (
+        tmp_path / "synthetic",
+        str(tmp_path / "synthetic" / "*.parquet"),
+    ):
+        chart = plot_marginal_1d(tmp_path / "observed.arrow", synthetic, columns)
+        assert chart.to_dict() == expected
+
+
+def test_plot_marginal_compares_several_models():
+    observed_df = pl.read_csv("tests/resources/hand-written-observed.csv")
+    synthetic_df = pl.read_csv("tests/resources/hand-written-synthetic.csv")
+    models = {"first": synthetic_df, "second": observed_df.head(10).lazy()}
+
+    combined_df = prepare_2d_marginal_data(observed_df, models, "foo", "bar")
+    assert combined_df["Source"].unique().sort().to_list() == [
+        "Observed",
+        "first",
+        "second",
+    ]
+    # Each model is counted as it would be alone.
+    pairwise = prepare_2d_marginal_data(observed_df, synthetic_df, "foo", "bar")
+    assert (
+        combined_df.filter(pl.col("Source") == "first")
+        .drop("Source")
+        .equals(pairwise.filter(pl.col("Source") == "Synthetic").drop("Source"))
+    )
+
+    spec = plot_marginal_1d(observed_df, models, ["foo", "bar"]).to_dict()
+    assert len(spec["vconcat"]) == 2
+    facet = spec["vconcat"][0]
+    assert facet["facet"]["column"]["sort"] == ["Observed", "first", "second"]
+    assert facet["spec"]["encoding"]["color"]["scale"]["domain"] == [
+        "Observed",
+        "first",
+        "second",
+    ]
+    with pytest.raises(ValueError, match="reserved"):
+        plot_marginal_1d(observed_df, {"Observed": synthetic_df}, ["foo"])
+
+
+def test_plot_marginal_1d_rejects_unknown_format():
+    with pytest.raises(ValueError, match="cannot scan"):
+        plot_marginal_1d(
+            "tests/resources/hand-written-observed.csv",
+            "tests/resources/hand-written-synthetic.csv",
+            ["foo"],
+        )
+
+
 # %%
 if __name__ == "__main__":
     import polars as pl
@@ -0,0 +1,47 @@
+import altair
+import polars as pl
+import pytest
+
+from lpm_plot import (
+    PreTransformedChart,
+    plot_lines,
+    plot_marginal_numerical_categorical,
+    render_chart,
+    set_config,
+)
+
+
+@pytest.fixture
+def num_cat_data():
+    return (
+        pl.read_csv("tests/resources/num-cat-observed.csv"),
+        pl.read_csv("tests/resources/num-cat-synthetic.csv"),
+    )
+
+
+def test_pre_transform_per_call(num_cat_data):
+    chart = plot_marginal_numerical_categorical(
+        *num_cat_data, "class", "data", pre_transform=True
+    )
+    assert isinstance(chart, PreTransformedChart)
+    assert chart.spec["$schema"].endswith("/vega/v5.json")
+
+    # The box plot statistics are computed ahead of time, so far fewer rows are inlined.
+    n_rows = sum(len(df) for df in num_cat_data)
+    (row,) = chart.report.iter_rows(named=True)
+    assert row["rows_in"] == n_rows
+    assert 0 < row["rows_out"] < n_rows
+    assert row["rows_cut"] == row["rows_in"] - row["rows_out"]
+    assert render_chart(chart, format="svg").startswith("<svg")
+
+
+def test_pre_transform_global_option(num_cat_data):
+    set_config(pre_transform=True)
+    try:
+        assert isinstance(plot_lines({"a": [1.0, 2.0]}), PreTransformedChart)
+        assert isinstance(
+            plot_lines({"a": [1.0, 2.0]}, pre_transform=False), altair.Chart
+        )
+    finally:
+        set_config(pre_transform=False)
+    assert isinstance(plot_lines({"a": [1.0, 2.0]}), altair.Chart)
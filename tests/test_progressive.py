@@ -0,0 +1,89 @@
+import numpy as np
+import polars as pl
+import pytest
+
+from lpm_plot import (
+    config_context,
+    plot_marginal_1d,
+    plot_marginal_numerical_numerical,
+    progressive,
+)
+from lpm_plot.progressive import sample_frame
+
+
+@pytest.fixture
+def frames():
+    def frame(seed):
+        rng = np.random.default_rng(seed)
+        return pl.DataFrame(
+            {
+                "a": rng.choice(["p", "q", "r"], size=20_000, p=[0.6, 0.3, 0.1]),
+                "x": rng.normal(size=20_000),
+                "y": rng.normal(size=20_000),
+            }
+        )
+
+    return frame(0), frame(1)
+
+
+def test_progressive_marginal_1d(frames):
+    observed, synthetic = frames
+    preview, exact = progressive(
+        plot_marginal_1d, observed, synthetic, ["a"], sample_rows=2_000
+    )
+    assert not preview.exact and exact.exact
+    assert preview.fraction == pytest.approx(0.1)
+    assert preview.chart.title.subtitle.startswith("Preview from 2,000 sampled rows")
+    assert (
+        exact.chart.to_dict() == plot_marginal_1d(observed, synthetic, ["a"]).to_dict()
+    )
+
+    # The exact counts are within the margins of error of the estimates.
+    errors = preview.errors.filter(source="observed")
+    counts = observed["a"].value_counts()
+    joined = errors.join(counts, left_on="value", right_on="a", suffix="_exact")
+    assert (
+        (joined["estimate"] - joined["count_exact"]).abs() <= joined["margin"]
+    ).all()
+
+
+def test_progressive_small_data_is_exact(frames):
+    observed, synthetic = frames
+    (only,) = progressive(
+        plot_marginal_numerical_numerical, observed, synthetic, "x", "y"
+    )
+    assert only.exact
+
+
+def test_progressive_options(frames):
+    observed, synthetic = frames
+    with config_context(backend="spec"):
+        refinements = list(
+            progressive(
+                plot_marginal_numerical_numerical,
+                observed,
+                synthetic,
+                "x",
+                "y",
+                sample_rows=500,
+            )
+        )
+    spec = refinements[0].chart.to_dict()
+    assert spec["title"]["subtitle"].startswith("Preview from 500 sampled rows")
+    assert len(spec["datasets"]) == 1
+    assert sum(map(len, spec["datasets"].values())) == 1000
+    # The exact chart was built in the background with the same options.
+    assert not hasattr(refinements[1].chart, "mark")
+
+
+def test_sample_lazy_frame_reads_blocks(tmp_path, frames):
+    observed, _ = frames
+    path = tmp_path / "observed.parquet"
+    observed.with_row_index().write_parquet(path, row_group_size=1_000)
+    sample, fraction = sample_frame(pl.scan_parquet(path), 1_000, seed=0)
+    assert sample.height == 1_024
+    assert fraction == pytest.approx(1_024 / 20_000)
+    # Blocks come from every stratum of the file.
+    strata = sample["index"] // (20_000 // 64)
+    assert strata.n_unique() == 64
+    assert sample.equals(sample_frame(pl.scan_parquet(path), 1_000, seed=0)[0])
@@ -0,0 +1,75 @@
+import pickle
+
+import numpy as np
+import polars as pl
+import pytest
+
+from lpm_plot import QuantileSketch, plot_qq, sketch_columns
+
+PROBABILITIES = np.linspace(0, 1, 101)
+
+
+def rank_error(sketch, values):
+    "Largest difference between the requested and actual ranks of the estimates."
+    ranks = np.searchsorted(np.sort(values), sketch.quantiles(PROBABILITIES))
+    return np.abs(ranks / len(values) - PROBABILITIES).max()
+
+
+@pytest.fixture
+def values():
+    return np.random.default_rng(0).lognormal(size=200_000)
+
+
+def test_sketch_accuracy(values):
+    sketch = QuantileSketch(k=200)
+    for batch in np.array_split(values, 100):
+        sketch.update(batch)
+    assert sketch.count == values.size
+    assert sketch.retained < 1_000
+    assert rank_error(sketch, values) < 0.015
+    assert sketch.quantiles([0, 1]).tolist() == [values.min(), values.max()]
+    assert sketch.rank(np.median(values)) == pytest.approx(0.5, abs=0.015)
+
+
+def test_sketch_merge(values):
+    parts = np.array_split(values, 7)
+    sketches = [QuantileSketch(seed=i).update(part) for i, part in enumerate(parts)]
+    merged = QuantileSketch()
+    for sketch in sketches:
+        merged.merge(pickle.loads(pickle.dumps(sketch)))
+    assert merged.count == values.size
+    assert rank_error(merged, values) < 0.015
+
+
+def test_sketch_skips_missing_values():
+    sketch = QuantileSketch().update(pl.Series([1.0, None, float("nan"), 3.0]))
+    assert sketch.count == 2
+    assert np.isnan(QuantileSketch().quantiles(0.5))
+
+
+def test_sketch_columns(tmp_path, values):
+    df = pl.DataFrame({"x": values, "n": np.arange(values.size), "c": "a"})
+    path = tmp_path / "data.parquet"
+    df.write_parquet(path)
+    sketches = sketch_columns(path, partition_rows=30_000, max_workers=2)
+    assert list(sketches) == ["x", "n"]
+    assert sketches["x"].count == values.size
+    assert rank_error(sketches["x"], values) < 0.015
+    with pytest.raises(KeyError):
+        sketch_columns(df, ["missing"])
+
+
+def test_plot_qq(values):
+    observed = pl.DataFrame({"x": values})
+    synthetic = pl.DataFrame({"x": values * 1.1})
+    spec = plot_qq(observed, synthetic, "x", n_quantiles=19).to_dict()
+    (rows,) = spec["datasets"].values()
+    assert len(rows) == 19
+    for row in rows:
+        assert row["synthetic"] == pytest.approx(row["observed"] * 1.1, rel=0.05)
+
+    # Sketches can stand in for data.
+    sketch = QuantileSketch().update(values)
+    spec = plot_qq(sketch, sketch, "x", difference=True).to_dict()
+    (rows,) = spec["datasets"].values()
+    assert all(row["difference"] == 0 for row in rows)
@@ -0,0 +1,84 @@
+import os
+
+import polars as pl
+import pytest
+
+import lpm_plot.render_cache
+from lpm_plot import DetailCache, RenderCache, plot_lines, render_chart
+
+
+def count_conversions(monkeypatch):
+    calls = []
+    convert = lpm_plot.render_cache._convert
+
+    def counting_convert(spec, format, scale):
+        calls.append(format)
+        return convert(spec, format, scale)
+
+    monkeypatch.setattr(lpm_plot.render_cache, "_convert", counting_convert)
+    return calls
+
+
+def test_render_cache_hit_skips_conversion(tmp_path, monkeypatch):
+    calls = count_conversions(monkeypatch)
+    cache = RenderCache(tmp_path)
+    chart = plot_lines({"a": [1.0, 2.0, 3.0]})
+
+    svg = render_chart(chart, format="svg", cache=cache)
+    assert svg.startswith("<svg")
+    assert render_chart(plot_lines({"a": [1.0, 2.0, 3.0]}), "svg", cache=cache) == svg
+    assert calls == ["svg"]
+
+    png = cache.render(chart, format="png", scale=2.0)
+    assert png.startswith(b"\x89PNG")
+    assert calls == ["svg", "png"]
+
+
+def test_render_cache_key_includes_data():
+    spec = plot_lines({"a": [1.0, 2.0]}).to_dict()
+    other = plot_lines({"a": [1.0, 2.5]}).to_dict()
+    key = lpm_plot.render_cache.spec_hash(spec, "png", 1.0)
+    assert key == lpm_plot.render_cache.spec_hash(dict(reversed(spec.items())))
+    assert key != lpm_plot.render_cache.spec_hash(other, "png", 1.0)
+    assert key != lpm_plot.render_cache.spec_hash(spec, "png", 2.0)
+    assert key != lpm_plot.render_cache.spec_hash(spec, "svg", 1.0)
+
+
+def test_render_cache_evicts_least_recently_used(tmp_path):
+    a, b, c = ("a" * 64, "b" * 64, "c" * 64)
+    cache = RenderCache(tmp_path, max_bytes=250)
+    cache.put(a, "svg", b"x" * 100)
+    cache.put(b, "svg", b"x" * 100)
+    assert cache.get(a, "svg") is not None
+    # Make b unambiguously the least recently used entry.
+    os.utime(cache.path(b, "svg"), (0, 0))
+    cache.put(c, "svg", b"x" * 100)
+    assert cache.get(b, "svg") is None
+    assert cache.get(a, "svg") is not None
+    assert cache.get(c, "svg") is not None
+    assert cache.size() <= 250
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_render_cache_keeps_other_files(tmp_path):
+    foreign = [tmp_path / "notes.txt", tmp_path / "draft.tmp", tmp_path / "a.svg"]
+    for path in foreign:
+        path.write_bytes(b"x" * 1000)
+    os.utime(tmp_path / "draft.tmp", (0, 0))
+    render_cache = RenderCache(tmp_path, max_bytes=150)
+    detail_cache = DetailCache(tmp_path, max_bytes=10**6)
+    detail_cache.put("d" * 64, pl.DataFrame({"x": range(1000)}))
+    render_cache.put("a" * 64, "svg", b"x" * 100)
+    render_cache.put("b" * 64, "svg", b"x" * 100)
+    assert render_cache.size() == 100
+    assert detail_cache.get("d" * 64) is not None
+
+    render_cache.clear()
+    assert render_cache.size() == 0
+    assert detail_cache.size() > 0
+    assert all(path.exists() for path in foreign)
+
+
+def test_render_chart_unknown_format():
+    with pytest.raises(ValueError, match="format must be one of"):
+        render_chart(plot_lines({"a": [1.0]}), format="gif")
@@ -0,0 +1,60 @@
+import json
+
+import polars as pl
+import pytest
+
+from lpm_plot import marginal_report, plot_marginal_1d
+from lpm_plot.__main__ import main
+
+
+@pytest.fixture
+def observed_df():
+    return pl.DataFrame(
+        {f"c{i}": [str(j % (i + 2)) for j in range(50)] for i in range(5)}
+    )
+
+
+def test_report_pages(tmp_path, observed_df):
+    synthetic_df = observed_df.reverse()
+    report = marginal_report(observed_df, synthetic_df, page_size=2, directory=tmp_path)
+    first = next(report)
+    # Pages are only built as they are consumed.
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["page-001.json"]
+    assert (first.number, first.pages, first.columns) == (1, 3, ["c0", "c1"])
+
+    pages = [first, *report]
+    assert [page.columns for page in pages] == [["c0", "c1"], ["c2", "c3"], ["c4"]]
+    spec = json.loads(pages[-1].path.read_text())
+    assert spec["title"] == {
+        "text": "1-D Marginals",
+        "subtitle": "Page 3 of 3: c4 to c4",
+    }
+    expected = plot_marginal_1d(observed_df, synthetic_df, ["c4"]).to_dict()
+    assert spec["datasets"] == expected["datasets"]
+
+
+def test_report_renders_pages(tmp_path, observed_df):
+    (page,) = marginal_report(
+        observed_df, observed_df, ["c0"], directory=tmp_path, format="svg"
+    )
+    assert page.path.read_text().startswith("<svg")
+    with pytest.raises(ValueError, match="format must be one of"):
+        next(marginal_report(observed_df, observed_df, format="pdf"))
+
+
+def test_report_command(tmp_path, observed_df):
+    observed_df.write_parquet(tmp_path / "observed.parquet")
+    main(
+        [
+            "report",
+            str(tmp_path / "observed.parquet"),
+            str(tmp_path / "observed.parquet"),
+            str(tmp_path / "report"),
+            "--page-size",
+            "4",
+        ]
+    )
+    assert sorted(p.name for p in (tmp_path / "report").iterdir()) == [
+        "page-001.json",
+        "page-002.json",
+    ]
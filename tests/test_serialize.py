@@ -0,0 +1,146 @@
+import json
+import re
+
+import altair as alt
+import numpy as np
+import polars as pl
+import pytest
+import vl_convert as vlc
+
+from lpm_plot import (
+    compute_mutual_information,
+    plot_heatmap,
+    plot_marginal_numerical_categorical,
+    reformat_data,
+    set_config,
+    to_json,
+    write_json,
+)
+from lpm_plot._frames import compact
+
+
+@pytest.fixture
+def chart():
+    rng = np.random.default_rng(0)
+    df = pl.DataFrame(
+        {"x": rng.choice(["a", "b", "c"], size=500), "y": rng.normal(size=500)}
+    )
+    return plot_marginal_numerical_categorical(df, df, "x", "y")
+
+
+def render(spec):
+    # Gradient ids are numbered per process, not per chart.
+    return re.sub(r"gradient_\d+", "", vlc.vegalite_to_svg(spec))
+
+
+def test_compact_chart_data():
+    rng = np.random.default_rng(0)
+    df = pl.DataFrame(
+        {
+            "x": rng.choice(["a", "b", "c"], size=500),
+            "y": rng.normal(size=500),
+            "dataset": ["Observed", "Synthetic"] * 250,
+        }
+    )
+    assert compact(df).schema == {
+        "x": pl.Categorical("lexical"),
+        "y": pl.Float64,
+        "dataset": pl.Categorical("lexical"),
+    }
+
+
+def test_dictionary_encode_renders_the_same(chart):
+    spec = json.loads(to_json(chart))
+    encoded = json.loads(to_json(chart, dictionary_encode=True))
+    assert len(json.dumps(encoded)) < len(json.dumps(spec))
+
+    (rows,) = encoded["datasets"].values()
+    assert {row["dataset"] for row in rows} == {0, 1}
+    assert encoded["transform"][:2] == [
+        {"calculate": '["a", "b", "c"][datum["x"]]', "as": "x"},
+        {"calculate": '["Observed", "Synthetic"][datum["dataset"]]', "as": "dataset"},
+    ]
+    assert render(encoded) == render(spec)
+
+
+def test_dictionary_encode_option(chart):
+    set_config(dictionary_encode=True)
+    try:
+        assert to_json(chart) == to_json(chart, dictionary_encode=True)
+    finally:
+        set_config(dictionary_encode=False)
+    assert to_json(chart) != to_json(chart, dictionary_encode=True)
+
+
+def test_compact_json_is_byte_stable(tmp_path):
+    df = pl.read_csv("tests/resources/hand-written-observed.csv")
+
+    def build():
+        mi = compute_mutual_information(df)
+        return plot_heatmap(mi, reformat_data(mi, df)[1])
+
+    text = to_json(build(), compact=True)
+    assert text == to_json(build(), compact=True)
+    minified = json.dumps(
+        json.loads(text), separators=(",", ":"), sort_keys=True, ensure_ascii=False
+    )
+    assert text == minified
+    assert '"name":"view_1"' in text
+
+    path = tmp_path / "chart.json"
+    assert write_json(build(), path, compact=True) == len(text)
+    assert path.read_text(encoding="utf-8") == text
+
+
+def test_compact_json_keeps_lookalike_fields():
+    df = pl.DataFrame({"param_1": [1.0, 2.0], "view_1": ["a", "b"]})
+    brush = alt.selection_interval()
+    chart = (
+        alt.Chart(df, title="param_1 by view_1")
+        .mark_point()
+        .encode(
+            x="param_1:Q",
+            y="view_1:N",
+            color=alt.condition(brush, "view_1:N", alt.value("gray")),
+        )
+        .add_params(brush)
+    )
+    spec = json.loads(to_json(chart | chart.mark_line(), compact=True))
+    assert spec["params"][0]["name"] == "param_1"
+    assert spec["params"][0]["views"] == ["view_1", "view_2"]
+    for view, name in zip(spec["hconcat"], ["view_1", "view_2"]):
+        assert view["name"] == name
+        assert view["title"] == "param_1 by view_1"
+        assert view["encoding"]["x"]["field"] == "param_1"
+        assert view["encoding"]["color"]["condition"]["field"] == "view_1"
+        assert view["encoding"]["color"]["condition"]["param"] == "param_1"
+
+
+def test_compact_json_drops_unused_fields():
+    df = pl.DataFrame({"x": [1.0, 2.0], "unused": ["a", "b"]})
+    chart = alt.Chart(df).mark_point().encode(x="x:Q")
+    (rows,) = json.loads(to_json(chart, compact=True))["datasets"].values()
+    assert rows == [{"x": 1.0}, {"x": 2.0}]
+
+    whole_rows = chart.mark_point(tooltip=alt.TooltipContent("data"))
+    (rows,) = json.loads(to_json(whole_rows, compact=True))["datasets"].values()
+    assert rows[0] == {"x": 1.0, "unused": "a"}
+
+
+def test_precision_rounds_chart_data():
+    df = pl.DataFrame(
+        {"x": ["a", "b"] * 3, "y": [1 / 3, 2 / 3, 1e6 / 7, 1.0, 12.0, 0.5]}
+    )
+    set_config(precision=3)
+    try:
+        chart = plot_marginal_numerical_categorical(df, df, "x", "y")
+        mi = compute_mutual_information(df)
+        detail = plot_heatmap(mi, reformat_data(mi, df)[1]).to_dict()
+    finally:
+        set_config(precision=None)
+    y = [row["y"] for row in chart.data.values]
+    assert y[:6] == [0.333, 0.667, 143000.0, 1.0, 12.0, 0.5]
+
+    (rows,) = [rows for rows in detail["datasets"].values() if len(rows) > 6]
+    y_data = {row["y_data"] for row in rows if row["comparison_type"] == "cat-num"}
+    assert y_data == {"0.333", "0.667", "143000.0", "1.0", "12.0", "0.5"}
@@ -0,0 +1,100 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+import polars as pl
+import pytest
+
+from lpm_plot import DetailServer, compute_mutual_information
+
+
+@pytest.fixture
+def server():
+    rng = np.random.default_rng(0)
+    data = pl.DataFrame(
+        {
+            "x": rng.normal(size=3000),
+            "y": rng.normal(size=3000),
+            "a": rng.choice(["p", "q", "r"], size=3000),
+            "b": rng.choice(["s", "t"], size=3000),
+        }
+    )
+    server = DetailServer(
+        ("127.0.0.1", 0),
+        data,
+        compute_mutual_information(data),
+        sample_rows=100,
+        cache_size=2,
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(server, path, headers=None):
+    request = urllib.request.Request(server.url + path, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as error:
+        return error.code, error.headers, error.read()
+
+
+def test_page_and_heatmap(server):
+    status, _, body = get(server, "")
+    assert status == 200
+    assert b"vegaEmbed" in body
+    status, _, body = get(server, "spec")
+    assert status == 200
+    spec = json.loads(body)
+    # The heatmap does not inline any detail data.
+    assert len(spec["datasets"]) == 1
+
+
+@pytest.mark.parametrize(
+    "x, y, mark",
+    [("x", "y", "circle"), ("a", "b", "rect"), ("a", "x", "boxplot")],
+)
+def test_detail_modes(server, x, y, mark):
+    _, _, raw = get(server, f"detail?x={x}&y={y}&mode=raw")
+    spec = json.loads(raw)
+    assert spec["mark"]["type"] == mark
+    assert sum(len(rows) for rows in spec["datasets"].values()) == 3000
+
+    _, _, sample = get(server, f"detail?x={x}&y={y}&mode=sample")
+    spec = json.loads(sample)
+    assert sum(len(rows) for rows in spec["datasets"].values()) == 100
+
+    # Aggregated details are pre-transformed Vega specs, with fewer rows than the data.
+    status, _, aggregate = get(server, f"detail?x={x}&y={y}&mode=aggregate")
+    assert status == 200
+    spec = json.loads(aggregate)
+    assert "vega/v5" in spec["$schema"]
+    assert sum(len(data.get("values", [])) for data in spec["data"]) < 1000
+
+
+def test_detail_cache_and_etag(server):
+    _, headers, body = get(server, "detail?x=x&y=a")
+    etag = headers["ETag"]
+    assert get(server, "detail?x=x&y=a")[2] == body
+    assert server.cache.hits == 1
+
+    status, headers, body = get(server, "detail?x=x&y=a", {"If-None-Match": etag})
+    assert status == 304
+    assert headers["ETag"] == etag
+    assert body == b""
+
+    get(server, "detail?x=a&y=x")
+    get(server, "detail?x=x&y=x")
+    assert len(server.cache) == 2
+
+
+def test_detail_errors(server):
+    assert get(server, "detail?x=x")[0] == 400
+    assert get(server, "detail?x=x&y=a&mode=everything")[0] == 400
+    assert get(server, "detail?x=x&y=missing")[0] == 404
+    assert get(server, "nothing")[0] == 404
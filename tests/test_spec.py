@@ -0,0 +1,115 @@
+import json
+
+import numpy as np
+import polars as pl
+import pytest
+
+from lpm_plot import (
+    MarginalAccumulator,
+    Spec,
+    compute_fidelity,
+    compute_mutual_information,
+    plot_fidelity,
+    plot_heatmap,
+    plot_lines,
+    plot_marginal_1d,
+    plot_marginal_2d,
+    plot_marginal_numerical_categorical,
+    plot_marginal_numerical_numerical,
+    plot_qq,
+    reformat_data,
+    set_config,
+    to_json,
+)
+from lpm_plot.plot_marginal import prepare_2d_marginal_data
+from lpm_plot.serialize import _number_names
+
+rng = np.random.default_rng(0)
+DF = pl.DataFrame(
+    {
+        "x": rng.normal(size=300),
+        "n": rng.integers(0, 10, size=300),
+        "a": rng.choice(["p", "q", "r"], size=300),
+        "b": rng.choice(["s", "t"], size=300),
+    }
+)
+MI = compute_mutual_information(DF)
+
+MODELS = {"reversed": DF.reverse(), "head": DF.head(5)}
+
+BINNED = MarginalAccumulator(columns=["a"], edges={"x": [-2.0, -1.0, 0.0, 1.0, 2.0]})
+BINNED.update(DF.reverse())
+
+CHARTS = {
+    "1d": lambda: plot_marginal_1d(DF, DF.reverse(), ["a", "b"]),
+    "1d top-k": lambda: plot_marginal_1d(DF, DF.reverse(), ["a", "b"], top_k=2),
+    "2d": lambda: plot_marginal_2d(
+        prepare_2d_marginal_data(DF, DF.reverse(), "a", "b"), "a", "b"
+    ),
+    "1d models": lambda: plot_marginal_1d(DF, MODELS, ["a", "b"]),
+    "1d binned": lambda: plot_marginal_1d(DF, BINNED, ["x", "a"]),
+    "1d binned models": lambda: plot_marginal_1d(DF, {"binned": BINNED}, ["x", "a"]),
+    "2d models": lambda: plot_marginal_2d(
+        prepare_2d_marginal_data(DF, MODELS, "a", "b"), "a", "b"
+    ),
+    "num-num": lambda: plot_marginal_numerical_numerical(DF, DF, "x", "n"),
+    "num-num models": lambda: plot_marginal_numerical_numerical(DF, MODELS, "x", "n"),
+    "num-cat": lambda: plot_marginal_numerical_categorical(DF, DF, "a", "x"),
+    "jitter": lambda: plot_marginal_numerical_categorical(
+        DF, DF, "a", "x", jitter=True
+    ),
+    "num-cat models": lambda: plot_marginal_numerical_categorical(
+        DF, MODELS, "a", "x", jitter=True
+    ),
+    "fidelity": lambda: plot_fidelity(
+        compute_fidelity(DF, DF.reverse(), bootstrap=20, seed=0)
+    ),
+    "lines": lambda: plot_lines({"a": [1.0, 2.0], "b": [3.0, 0.5]}, y_scale="log"),
+    "qq": lambda: plot_qq(DF, DF.reverse(), "x", n_quantiles=9),
+    "quantile difference": lambda: plot_qq(DF, DF, "n", difference=True),
+    "heatmap": lambda: plot_heatmap(MI),
+    "static heatmap": lambda: plot_heatmap(MI, interactive=False),
+    "detailed heatmap": lambda: plot_heatmap(*reformat_data(MI, DF)),
+}
+
+
+def normalize(spec):
+    "Name datasets after their content and renumber generated names."
+    text = json.dumps(spec)
+    datasets = spec["datasets"]
+    for i, name in enumerate(sorted(datasets, key=lambda n: json.dumps(datasets[n]))):
+        text = text.replace(name, f"dataset-{i}")
+    return _number_names(json.loads(text))
+
+
+def by_content(spec):
+    return sorted(json.dumps(values) for values in spec["datasets"].values())
+
+
+@pytest.mark.parametrize("name", CHARTS)
+def test_spec_backend_matches_altair(name):
+    expected = CHARTS[name]().to_dict()
+    set_config(backend="spec", debug=True)
+    try:
+        spec = CHARTS[name]()
+    finally:
+        set_config(backend="altair", debug=False)
+    assert isinstance(spec, Spec)
+    actual = spec.to_dict()
+    assert by_content(actual) == by_content(expected)
+    assert normalize(actual) == normalize(expected)
+    assert normalize(spec.to_chart().to_dict()) == normalize(expected)
+
+
+def test_spec_serializes_like_a_chart():
+    set_config(backend="spec")
+    try:
+        spec = CHARTS["num-cat"]()
+    finally:
+        set_config(backend="altair")
+    assert json.loads(to_json(spec)) == spec.to_dict()
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match="backend must be one of"):
+        set_config(backend="matplotlib")